@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+キャッシュコーデックのベンチマークスクリプト
+
+meeting_full:{id} と同じ形の会議データを規模別に生成し、
+コーデック・圧縮方式ごとのエンコード/デコード時間とサイズを比較します。
+Redisは不要です。
+
+    python bench_cache_codecs.py
+"""
+import time
+import timeit
+
+from cache_codecs import CacheCodec, codec_available, compression_available
+
+# (セクション数, セクションあたりの項目数, タスク数)
+MEETING_SIZES = [
+    (3, 3, 2),
+    (10, 10, 10),
+    (50, 20, 50),
+    (200, 20, 200),
+]
+
+CODEC_CONFIGS = [
+    ('json', 'none'),
+    ('json', 'zstd'),
+    ('json', 'lz4'),
+    ('msgpack', 'none'),
+    ('msgpack', 'zstd'),
+    ('msgpack', 'lz4'),
+]
+
+
+def build_meeting_full(meeting_id: str, section_count: int, items_per_section: int, task_count: int) -> dict:
+    """GET /meetings/{meeting_id}/full と同じ構造の会議データを生成する"""
+    sections = []
+    for s in range(1, section_count + 1):
+        section_id = f"s_{meeting_id}_{s}"
+        sections.append({
+            "id": section_id,
+            "title": f"議題 {s}: 進捗状況と課題の共有",
+            "order": s,
+            "status": "completed" if s % 3 == 0 else "in_progress" if s % 3 == 1 else "not_started",
+            "items": [
+                {
+                    "id": f"i_{section_id}_{i}",
+                    "section_id": section_id,
+                    "text": f"項目 {i}: 前回の議事録の確認と次回までのアクションについて話し合う（担当者と期限を決める）",
+                    "order": i,
+                }
+                for i in range(1, items_per_section + 1)
+            ],
+        })
+    return {
+        "meeting": {
+            "id": meeting_id,
+            "title": "週次チームミーティング",
+            "datetime": "2025-06-22T16:00:00",
+            "template_id": "t1",
+            "status": "in_progress",
+        },
+        "sections": sections,
+        "tasks": [
+            {
+                "id": f"task{t}",
+                "text": f"フォローアップメール送信 {t}",
+                "assignee": "Bob",
+                "due_date": "2025-06-23",
+                "status": "open",
+            }
+            for t in range(1, task_count + 1)
+        ],
+        "recording_status": "recording",
+    }
+
+
+def measure(codec: CacheCodec, payload: dict, number: int) -> tuple:
+    """1回あたりのエンコード・デコード時間（マイクロ秒）とバイト数を計測する"""
+    soft_expiry = time.time() + 30
+    encoded = codec.encode(payload, soft_expiry, 0.01)
+    encode_us = timeit.timeit(lambda: codec.encode(payload, soft_expiry, 0.01), number=number) / number * 1e6
+    decode_us = timeit.timeit(lambda: codec.decode(encoded), number=number) / number * 1e6
+    return encode_us, decode_us, len(encoded)
+
+
+def main():
+    print("🚀 キャッシュコーデック ベンチマーク")
+    print("=" * 78)
+
+    for section_count, items_per_section, task_count in MEETING_SIZES:
+        payload = build_meeting_full("m1", section_count, items_per_section, task_count)
+        item_count = section_count * items_per_section
+        # 大きな会議ほど計測回数を減らす
+        number = max(20, 20000 // max(item_count, 1))
+
+        print(f"\n📋 セクション {section_count} × 項目 {items_per_section}（タスク {task_count}）")
+        print(f"{'codec':<10}{'compression':<13}{'bytes':>10}{'ratio':>8}{'encode µs':>13}{'decode µs':>13}")
+        print("-" * 78)
+
+        baseline_bytes = None
+        for codec_name, compression_name in CODEC_CONFIGS:
+            if not codec_available(codec_name) or not compression_available(compression_name):
+                print(f"{codec_name:<10}{compression_name:<13}{'(not installed)':>24}")
+                continue
+            # しきい値を0にして常に圧縮を試す
+            codec = CacheCodec(codec=codec_name, compression=compression_name, compression_threshold=0)
+            encode_us, decode_us, size = measure(codec, payload, number)
+            if baseline_bytes is None:
+                baseline_bytes = size
+            print(f"{codec_name:<10}{compression_name:<13}{size:>10}{size / baseline_bytes:>8.2f}"
+                  f"{encode_us:>13.1f}{decode_us:>13.1f}")
+
+    print("\n" + "=" * 78)
+    print(f"json encoder: {CacheCodec().describe()['json_encoder']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+再接続時の同期（差分取得）のベンチマークスクリプト
+
+bench_cache_codecs.py と同じ形の会議データを規模別に生成し、再接続したクライアントが
+会議データ全体（GET /meetings/{meeting_id}/full）を取り直す場合と、変更ログの差分
+（GET /meetings/{meeting_id}/changes?since=N）だけを受け取る場合の、レスポンスのバイト数と
+JSONのエンコード・デコード時間を比較します。差分の大きさは会議の規模ではなく変更数で決まります。
+Redisは不要です。
+
+    python bench_changes.py
+"""
+import json
+import time
+import timeit
+
+from bench_cache_codecs import MEETING_SIZES, build_meeting_full
+
+CHANGE_COUNTS = [1, 10, 100]
+
+
+def build_changes(full_data: dict, count: int) -> list:
+    """会議中によくある変更（ステータス変更・項目の追加と編集）を count 件生成する"""
+    sections = full_data["sections"]
+    version = int(time.time() * 1000) * 1000
+    changes = []
+    for c in range(count):
+        section = sections[c % len(sections)]
+        version += 1
+        if c % 3 == 0:
+            change = {"type": "section", "op": "update", "id": section["id"], "data": {"status": "in_progress"}}
+        else:
+            item = dict(section["items"][0], id=f"new_{c}", text=f"追加した項目 {c}: 次回までに担当者が確認する")
+            change = {"type": "item", "op": "set", "id": item["id"], "data": item}
+        changes.append({"version": version, **change, "at": time.time()})
+    return changes
+
+
+def measure(payload, number: int) -> tuple:
+    """1回あたりのエンコード・デコード時間（マイクロ秒）とバイト数を計測する"""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    encode_us = timeit.timeit(lambda: json.dumps(payload, ensure_ascii=False).encode('utf-8'), number=number) / number * 1e6
+    decode_us = timeit.timeit(lambda: json.loads(body), number=number) / number * 1e6
+    return encode_us, decode_us, len(body)
+
+
+def main():
+    print("🚀 再接続時の同期（変更差分）ベンチマーク")
+    print("=" * 72)
+
+    for section_count, items_per_section, task_count in MEETING_SIZES:
+        full_data = build_meeting_full("m1", section_count, items_per_section, task_count)
+        number = max(20, 20000 // (section_count * items_per_section))
+        print(f"\n📋 セクション {section_count} / 項目 {section_count * items_per_section:,} / タスク {task_count}")
+        print(f"{'response':<26}{'encode µs':>12}{'decode µs':>12}{'bytes':>14}")
+        print("-" * 72)
+        cases = [("full snapshot", {"version": 1, "changes": [], "snapshot": full_data})]
+        for count in CHANGE_COUNTS:
+            cases.append((f"{count} changes", {"version": 1, "changes": build_changes(full_data, count), "snapshot": None}))
+        for name, payload in cases:
+            encode_us, decode_us, size = measure(payload, number)
+            print(f"{name:<26}{encode_us:>12.1f}{decode_us:>12.1f}{size:>14,}")
+
+    print("\n" + "=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+会議一覧のページ取得のベンチマークスクリプト
+
+会議数を変えながら、全件の一覧（従来の GET /meetings）と、InMemoryRepository の索引による
+1ページ（先頭・中ほどのカーソル位置・ステータスとテンプレートでの絞り込み）の取得時間と
+レスポンスのJSONのバイト数を比較します。ページの時間とサイズは会議数によらずほぼ一定になります。
+Redisは不要です。
+
+    python bench_pagination.py
+"""
+import json
+import random
+import time
+
+from pydantic import BaseModel
+
+from pagination import decode_cursor, encode_cursor
+from repository import InMemoryRepository
+
+MEETING_COUNTS = [1000, 10000, 100000]
+PAGE_SIZE = 100
+STATUSES = ["scheduled", "in_progress", "completed"]
+TEMPLATES = [f"t{t}" for t in range(20)]
+
+
+class Meeting(BaseModel):
+    id: str
+    title: str
+    datetime: str
+    template_id: str | None = None
+    status: str = "scheduled"
+
+
+def build_repository(meeting_count: int) -> InMemoryRepository:
+    rng = random.Random(0)
+    repository = InMemoryRepository()
+    for m in range(meeting_count):
+        repository.put_meeting(Meeting(
+            id=f"m{m}",
+            title=f"会議 {m}",
+            datetime=f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(8, 19):02d}:00:00",
+            template_id=rng.choice(TEMPLATES),
+            # 進行中の会議は少ない
+            status="in_progress" if rng.random() < 0.01 else rng.choice(["scheduled", "completed"]),
+        ))
+    return repository
+
+
+def payload(meetings) -> bytes:
+    return json.dumps([m.dict() for m in meetings], ensure_ascii=False).encode('utf-8')
+
+
+def measure(func, number: int):
+    started = time.perf_counter()
+    for _ in range(number):
+        body = func()
+    return (time.perf_counter() - started) / number * 1e3, len(body)
+
+
+def main():
+    print("🚀 会議一覧ページ取得ベンチマーク")
+    print("=" * 78)
+    print(f"1ページ {PAGE_SIZE} 件")
+
+    for meeting_count in MEETING_COUNTS:
+        repository = build_repository(meeting_count)
+
+        # 中ほどのページのカーソル（一覧の半分の位置）
+        half = sorted((m.datetime, m.id) for m in repository.list_meetings())[meeting_count // 2]
+        middle_cursor = encode_cursor("meetings", {}, half)
+        filters = {"status": "in_progress", "template_id": "t3"}
+
+        def full_list():
+            return payload(repository.list_meetings())
+
+        def first_page():
+            return payload(repository.page_meetings(PAGE_SIZE)[0])
+
+        def middle_page():
+            after = decode_cursor(middle_cursor, "meetings", {})
+            return payload(repository.page_meetings(PAGE_SIZE, after)[0])
+
+        def filtered_page():
+            return payload(repository.page_meetings(PAGE_SIZE, None, **filters)[0])
+
+        number = max(3, 200000 // meeting_count)
+        cases = [
+            ("full list", full_list, number),
+            ("first page", first_page, 500),
+            ("middle page (cursor)", middle_page, 500),
+            ("in_progress + template", filtered_page, 500),
+        ]
+
+        print(f"\n📋 会議 {meeting_count:,} 件")
+        print(f"{'request':<28}{'ms/request':>14}{'payload bytes':>18}")
+        print("-" * 78)
+        for name, func, runs in cases:
+            ms, size = measure(func, runs)
+            print(f"{name:<28}{ms:>14.3f}{size:>18,}")
+
+    print("\n" + "=" * 78)
+
+
+if __name__ == "__main__":
+    main()
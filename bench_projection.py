@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+会議データ全体の部分・フィールド指定（include / fields）のベンチマークスクリプト
+
+bench_cache_codecs.py と同じ形の会議データを規模別に生成し、GET /meetings/{meeting_id}/full の
+全体と、よく使う指定（セクションのステータスのみ、項目の本文のみ、タスクのみ）について、
+キャッシュに置く値のエンコード・デコード時間とバイト数を比較します。Redisは不要です。
+
+    python bench_projection.py
+"""
+import timeit
+
+from bench_cache_codecs import MEETING_SIZES, build_meeting_full
+from cache_codecs import CacheCodec
+from projection import FULL, Projection
+
+PROJECTIONS = [
+    ("full", FULL),
+    ("section statuses", Projection(['sections'], {'sections': ['status']})),
+    ("items id,text", Projection(['items'], {'sections': ['title'], 'items': ['text']})),
+    ("tasks only", Projection(['tasks'])),
+]
+
+
+def measure(codec: CacheCodec, payload: dict, number: int) -> tuple:
+    """1回あたりのエンコード・デコード時間（マイクロ秒）とバイト数を計測する"""
+    encoded = codec.encode(payload, 0, 0.01)
+    encode_us = timeit.timeit(lambda: codec.encode(payload, 0, 0.01), number=number) / number * 1e6
+    decode_us = timeit.timeit(lambda: codec.decode(encoded), number=number) / number * 1e6
+    return encode_us, decode_us, len(encoded)
+
+
+def main():
+    print("🚀 会議データ全体の部分・フィールド指定ベンチマーク")
+    print("=" * 102)
+    codec = CacheCodec('json', 'none')
+
+    for section_count, items_per_section, task_count in MEETING_SIZES:
+        full_data = build_meeting_full("m1", section_count, items_per_section, task_count)
+        number = max(20, 20000 // (section_count * items_per_section))
+        print(f"\n📋 セクション {section_count} / 項目 {section_count * items_per_section:,} / タスク {task_count}")
+        print(f"{'projection':<20}{'cache key suffix':<48}{'encode µs':>11}{'decode µs':>11}{'bytes':>12}")
+        print("-" * 102)
+        for name, projection in PROJECTIONS:
+            payload = full_data if projection.is_full else projection.apply(full_data)
+            encode_us, decode_us, size = measure(codec, payload, number)
+            suffix = '-' if projection.is_full else projection.key()
+            print(f"{name:<20}{suffix:<48}{encode_us:>11.1f}{decode_us:>11.1f}{size:>12,}")
+
+    print("\n" + "=" * 102)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+セクション・項目の並べ替えのベンチマークスクリプト
+
+項目数 1,000 のセクション内で項目の並べ替えを繰り返し、整数の order を連番に保つ方式
+（移動した範囲の項目の order を全て書き換える）と、rank（ranking.py の並びのキー）で
+移動する項目だけを書き換える方式の、1回あたりの書き込みドキュメント数と計算時間を比較します。
+rank 方式はキーの間が詰まった場合のみセクション全体を振り直します。Redis・Firestoreは不要です。
+
+    python bench_ranking.py
+"""
+import random
+import time
+
+from ranking import MAX_RANK_LENGTH, plan_move, rank_of
+
+SECTION_SIZES = [1000]
+MOVES = 5000
+PATTERNS = {
+    # 任意の項目を任意の位置へ
+    "random": lambda rng, n: (rng.randrange(n), rng.randrange(n)),
+    # 末尾の項目を先頭へ（先頭の前にキーを作り続ける）
+    "to front": lambda rng, n: (n - 1, 0),
+    # 末尾の項目を1件目と2件目の間へ（同じ間にキーを作り続ける）
+    "same gap": lambda rng, n: (n - 1, 1),
+}
+
+
+def build_items(count: int):
+    return [{"id": f"i{i}", "order": i + 1, "rank": None} for i in range(count)]
+
+
+def run_integer(count: int, pattern, rng):
+    """order を 1..n の連番に保つ方式（移動で位置が変わった項目を全て書き換える）"""
+    items = build_items(count)
+    writes = []
+    started = time.perf_counter()
+    for _ in range(MOVES):
+        source, target = pattern(rng, count)
+        items.insert(target, items.pop(source))
+        written = 0
+        for order, item in enumerate(items, start=1):
+            if item["order"] != order:
+                item["order"] = order
+                written += 1
+        writes.append(written)
+    elapsed = time.perf_counter() - started
+    return writes, elapsed, 0, 0
+
+
+def run_rank(count: int, pattern, rng):
+    """rank 方式（移動する項目のみ書き換え、間が詰まったら振り直す）"""
+    items = build_items(count)
+    by_id = {item["id"]: item for item in items}
+    writes = []
+    rebalances = 0
+    longest = 0
+    started = time.perf_counter()
+    for _ in range(MOVES):
+        source, target = pattern(rng, count)
+        moved = items.pop(source)
+        moves = plan_move(items, moved["id"], target)
+        items.insert(target, moved)
+        for item_id, fields in moves.items():
+            by_id[item_id].update(fields)
+        writes.append(len(moves))
+        if len(moves) > 1:
+            rebalances += 1
+        longest = max(longest, len(moved["rank"]))
+    elapsed = time.perf_counter() - started
+    ranks = [rank_of(item) for item in items]
+    assert ranks == sorted(ranks) and len(set(ranks)) == len(ranks), "rank order is inconsistent"
+    return writes, elapsed, rebalances, longest
+
+
+def main():
+    print("🚀 並べ替え（rank）ベンチマーク")
+    print("=" * 96)
+    print(f"移動 {MOVES:,} 回 / パターンごと、キーの最大長 {MAX_RANK_LENGTH}")
+
+    for count in SECTION_SIZES:
+        print(f"\n📋 項目 {count:,} 件のセクション")
+        print(f"{'pattern':<12}{'method':<10}{'avg docs/move':>15}{'max docs/move':>15}"
+              f"{'total docs':>12}{'rebalances':>12}{'max key len':>13}{'µs/move':>10}")
+        print("-" * 96)
+        for name, pattern in PATTERNS.items():
+            for method, run in (("integer", run_integer), ("rank", run_rank)):
+                writes, elapsed, rebalances, longest = run(count, pattern, random.Random(0))
+                print(f"{name:<12}{method:<10}{sum(writes) / len(writes):>15.2f}{max(writes):>15,}"
+                      f"{sum(writes):>12,}{rebalances:>12,}{longest if method == 'rank' else '-':>13}"
+                      f"{elapsed / MOVES * 1e6:>10.1f}")
+
+    print("\n" + "=" * 96)
+
+
+if __name__ == "__main__":
+    main()
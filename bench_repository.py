@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+会議データリポジトリのベンチマークスクリプト
+
+会議数を変えながら、従来のリスト・辞書の線形走査（for meet in mock_meetings: ...）と
+InMemoryRepository のIDによる参照の1回あたりの時間を比較します。
+リポジトリの参照時間は会議数によらずほぼ一定になります。Redisは不要です。
+
+    python bench_repository.py
+"""
+import random
+import timeit
+
+from pydantic import BaseModel
+
+from repository import InMemoryRepository
+
+MEETING_COUNTS = [10, 1000, 10000, 100000]
+SECTIONS_PER_MEETING = 3
+ITEMS_PER_SECTION = 3
+
+
+class Meeting(BaseModel):
+    id: str
+    title: str
+    status: str = "scheduled"
+
+
+class Section(BaseModel):
+    id: str
+    title: str
+    order: int
+    status: str = "not_started"
+
+
+class Item(BaseModel):
+    id: str
+    section_id: str
+    text: str
+    order: int
+
+
+def build_data(meeting_count: int):
+    """main.py の mock_* と同じ形のデータを生成する"""
+    meetings = []
+    sections = {}
+    items = {}
+    for m in range(meeting_count):
+        meeting_id = f"m{m}"
+        meetings.append(Meeting(id=meeting_id, title=f"会議 {m}"))
+        sections[meeting_id] = []
+        for s in range(SECTIONS_PER_MEETING):
+            section_id = f"s_{m}_{s}"
+            sections[meeting_id].append(Section(id=section_id, title=f"議題 {s}", order=s))
+            # 逆順に追加しても order 順に並ぶ
+            items[section_id] = [
+                Item(id=f"i_{m}_{s}_{i}", section_id=section_id, text=f"項目 {i}", order=i)
+                for i in reversed(range(ITEMS_PER_SECTION))
+            ]
+    return meetings, sections, items
+
+
+# ----- 従来の線形走査 -----
+def scan_meeting(meetings, meeting_id):
+    for meet in meetings:
+        if meet.id == meeting_id:
+            return meet
+    return None
+
+
+def scan_section(sections, section_id):
+    for meeting_sections in sections.values():
+        for s in meeting_sections:
+            if s.id == section_id:
+                return s
+    return None
+
+
+def scan_items(items, section_id):
+    return sorted(items.get(section_id, []), key=lambda it: it.order)
+
+
+def scan_item(items, item_id):
+    for section_items in items.values():
+        for it in section_items:
+            if it.id == item_id:
+                return it
+    return None
+
+
+def per_call_us(func, number: int) -> float:
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def main():
+    print("🚀 会議データリポジトリ ベンチマーク")
+    print("=" * 78)
+    rng = random.Random(0)
+
+    for meeting_count in MEETING_COUNTS:
+        meetings, sections, items = build_data(meeting_count)
+        repository = InMemoryRepository()
+        repository.load(meetings=meetings, sections=sections,
+                        items=[it for section_items in items.values() for it in section_items])
+
+        # 走査は会議数に比例して遅くなるため、大きいほど計測回数を減らす
+        scan_number = max(3, 200000 // meeting_count)
+        index_number = 20000
+        targets = [rng.randrange(meeting_count) for _ in range(16)]
+        meeting_ids = [f"m{m}" for m in targets]
+        section_ids = [f"s_{m}_{SECTIONS_PER_MEETING - 1}" for m in targets]
+        item_ids = [f"i_{m}_{SECTIONS_PER_MEETING - 1}_{ITEMS_PER_SECTION - 1}" for m in targets]
+
+        cases = [
+            ("meeting by id",
+             lambda: [scan_meeting(meetings, mid) for mid in meeting_ids],
+             lambda: [repository.get_meeting(mid) for mid in meeting_ids]),
+            ("section by id",
+             lambda: [scan_section(sections, sid) for sid in section_ids],
+             lambda: [repository.get_section(sid) for sid in section_ids]),
+            ("items of section",
+             lambda: [scan_items(items, sid) for sid in section_ids],
+             lambda: [repository.list_items(sid) for sid in section_ids]),
+            ("item by id",
+             lambda: [scan_item(items, iid) for iid in item_ids],
+             lambda: [repository.get_item(iid) for iid in item_ids]),
+        ]
+
+        print(f"\n📋 会議 {meeting_count:,}（セクション {meeting_count * SECTIONS_PER_MEETING:,}、"
+              f"項目 {meeting_count * SECTIONS_PER_MEETING * ITEMS_PER_SECTION:,}）")
+        print(f"{'lookup':<20}{'linear scan µs':>18}{'repository µs':>18}{'speedup':>12}")
+        print("-" * 78)
+        for name, scan, indexed in cases:
+            # 1回の呼び出しで16件を参照するため、1件あたりに換算する
+            scan_us = per_call_us(scan, scan_number) / len(targets)
+            index_us = per_call_us(indexed, index_number) / len(targets)
+            print(f"{name:<20}{scan_us:>18.2f}{index_us:>18.3f}{scan_us / index_us:>11.0f}x")
+
+    print("\n" + "=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+# 高速なJSONエンコーダ・MessagePack・圧縮ライブラリはオプション
+# インストールされていない場合は標準ライブラリのjsonのみで動作する
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# ヘッダー: マジック(2) + フォーマットバージョン(1) + コーデックID(1) + 圧縮ID(1) + フラグ(1)
+#           + ソフト期限(8) + 計算コスト(8)
+HEADER_MAGIC = b'CM'
+HEADER_VERSION = 1
+HEADER_FORMAT = '>2sBBBBdd'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# メタデータ付きJSON形式（ヘッダー導入前）のエントリを示すキー
+LEGACY_ENTRY_MARKER = '__cache_entry__'
+
+# コーデックID（値に記録されるため、既存の番号は変更しないこと）
+CODEC_JSON = 1
+CODEC_MSGPACK = 2
+
+# 圧縮ID（値に記録されるため、既存の番号は変更しないこと）
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+COMPRESSION_LZ4 = 2
+
+CODEC_NAMES = {'json': CODEC_JSON, 'msgpack': CODEC_MSGPACK}
+COMPRESSION_NAMES = {'none': COMPRESSION_NONE, 'zstd': COMPRESSION_ZSTD, 'lz4': COMPRESSION_LZ4}
+
+# フラグ（ビットごとに意味を持つ。値に記録されるため、既存のビットは変更しないこと）
+FLAG_TOMBSTONE = 0x01  # 存在しないことが確認された値（ネガティブキャッシュ）
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+def codec_available(codec: str) -> bool:
+    """コーデックが利用可能か（必要なライブラリがインストールされているか）"""
+    if codec == 'json':
+        return True
+    if codec == 'msgpack':
+        return msgpack is not None
+    return False
+
+
+def compression_available(compression: str) -> bool:
+    """圧縮方式が利用可能か（必要なライブラリがインストールされているか）"""
+    if compression == 'none':
+        return True
+    if compression == 'zstd':
+        return zstandard is not None
+    if compression == 'lz4':
+        return lz4_frame is not None
+    return False
+
+
+class CacheCodec:
+    """キャッシュ値のシリアライズと圧縮を行うクラス
+
+    値の先頭にコーデック・圧縮方式・フォーマットバージョンを記録したヘッダーを付けるため、
+    設定を変更しても既存のキャッシュを消さずに読み出せる。
+    """
+
+    def __init__(self, codec: str = 'json', compression: str = 'none',
+                 compression_threshold: int = 1024, compression_level: int = 3):
+        if codec not in CODEC_NAMES:
+            raise ValueError(f"Unknown cache codec: {codec}")
+        if compression not in COMPRESSION_NAMES:
+            raise ValueError(f"Unknown cache compression: {compression}")
+
+        # ライブラリがなければ標準の形式にフォールバック
+        if not codec_available(codec):
+            print(f"Cache codec '{codec}' is not installed, falling back to json")
+            codec = 'json'
+        if not compression_available(compression):
+            print(f"Cache compression '{compression}' is not installed, compression disabled")
+            compression = 'none'
+
+        self.codec = codec
+        self.compression = compression
+        self.codec_id = CODEC_NAMES[codec]
+        self.compression_id = COMPRESSION_NAMES[compression]
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+        # zstdの圧縮器・展開器は使い回す
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+        if zstandard is not None:
+            self._zstd_compressor = zstandard.ZstdCompressor(level=compression_level)
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+
+    def _serialize(self, codec_id: int, value: Any) -> bytes:
+        if codec_id == CODEC_MSGPACK:
+            return _msgpack_dumps(value)
+        return _json_dumps(value)
+
+    def _deserialize(self, codec_id: int, data: bytes) -> Any:
+        if codec_id == CODEC_JSON:
+            return _json_loads(data)
+        if codec_id == CODEC_MSGPACK:
+            if msgpack is None:
+                raise ValueError("Cache value is encoded with msgpack, which is not installed")
+            return _msgpack_loads(data)
+        raise ValueError(f"Unknown cache codec id: {codec_id}")
+
+    def _compress(self, compression_id: int, data: bytes) -> bytes:
+        if compression_id == COMPRESSION_ZSTD:
+            return self._zstd_compressor.compress(data)
+        if compression_id == COMPRESSION_LZ4:
+            return lz4_frame.compress(data, compression_level=self.compression_level)
+        return data
+
+    def _decompress(self, compression_id: int, data: bytes) -> bytes:
+        if compression_id == COMPRESSION_NONE:
+            return data
+        if compression_id == COMPRESSION_ZSTD:
+            if zstandard is None:
+                raise ValueError("Cache value is compressed with zstd, which is not installed")
+            return self._zstd_decompressor.decompress(data)
+        if compression_id == COMPRESSION_LZ4:
+            if lz4_frame is None:
+                raise ValueError("Cache value is compressed with lz4, which is not installed")
+            return lz4_frame.decompress(data)
+        raise ValueError(f"Unknown cache compression id: {compression_id}")
+
+    def encode(self, value: Any, soft_expiry: float, cost: float, tombstone: bool = False) -> bytes:
+        """値とメタデータをヘッダー付きのバイト列に変換"""
+        body = self._serialize(self.codec_id, value)
+        compression_id = COMPRESSION_NONE
+        if self.compression_id != COMPRESSION_NONE and len(body) >= self.compression_threshold:
+            compressed = self._compress(self.compression_id, body)
+            # 圧縮しても小さくならない場合は非圧縮のまま保存する
+            if len(compressed) < len(body):
+                body = compressed
+                compression_id = self.compression_id
+        header = struct.pack(HEADER_FORMAT, HEADER_MAGIC, HEADER_VERSION,
+                             self.codec_id, compression_id, FLAG_TOMBSTONE if tombstone else 0,
+                             soft_expiry, cost)
+        return header + body
+
+    def decode(self, data: bytes) -> Tuple[Any, float, float, bool]:
+        """バイト列から (値, ソフト期限, 計算コスト, 墓標か) を復元
+
+        ヘッダーのない旧形式（メタデータ付きJSON・素のJSON）にも対応する。
+        """
+        if data[:2] == HEADER_MAGIC and len(data) >= HEADER_SIZE:
+            _, version, codec_id, compression_id, flags, soft_expiry, cost = struct.unpack_from(HEADER_FORMAT, data)
+            if version != HEADER_VERSION:
+                raise ValueError(f"Unsupported cache format version: {version}")
+            body = self._decompress(compression_id, data[HEADER_SIZE:])
+            return self._deserialize(codec_id, body), soft_expiry, cost, bool(flags & FLAG_TOMBSTONE)
+
+        obj = json.loads(data)
+        if isinstance(obj, dict) and obj.get(LEGACY_ENTRY_MARKER) == 1:
+            return obj["value"], obj["soft_expiry"], obj["cost"], False
+        return obj, float('inf'), 0.0, False
+
+    def describe(self) -> Dict[str, Any]:
+        """現在の設定を取得"""
+        return {
+            "codec": self.codec,
+            "compression": self.compression,
+            "compression_threshold": self.compression_threshold,
+            "compression_level": self.compression_level,
+            "format_version": HEADER_VERSION,
+            "json_encoder": "orjson" if orjson is not None else "json",
+        }
@@ -1,10 +1,239 @@
 import redis
+import redis.asyncio as aioredis
 import json
-from typing import Dict, Any, Optional, List, Set
+import hashlib
+from typing import Awaitable, Callable, Dict, Any, Optional, List, Set, NamedTuple
 import time
 import asyncio
 import os
+import math
+import random
+import uuid
+from collections import OrderedDict
 from functools import wraps
+from cache_codecs import CacheCodec
+from cache_metrics import CacheMetrics, key_prefix
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN
+from ttl_policy import TTLPolicy
+
+# ローカルキャッシュのミス判定用センチネル
+_MISS = object()
+
+class CacheEntry(NamedTuple):
+    """キャッシュされた値とそのメタデータ"""
+    value: Any
+    soft_expiry: float  # この時刻（UNIX時間）を過ぎたら再計算が必要
+    cost: float         # 値の計算にかかった秒数
+    tombstone: bool = False  # 存在しないことが確認された値（ネガティブキャッシュ）
+
+class TaggedValue(NamedTuple):
+    """ETag付きの取得結果（get_or_compute_tagged の返り値）"""
+    value: Any
+    etag: Optional[str]
+    not_modified: bool = False  # If-None-Match と一致した（value は None）
+
+def content_etag(value: Any) -> str:
+    """値の内容から強いETagを作る（同じ内容ならワーカー・再計算によらず同じ値）"""
+    body = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return '"' + hashlib.sha1(body.encode('utf-8')).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match ヘッダーの値が etag と一致するか（弱い比較。* は常に一致）"""
+    if not if_none_match or not etag:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+class LocalCache:
+    """プロセス内のLRUキャッシュ（エントリ数とバイト数の両方で上限を管理）
+    
+    格納した値はデコード済みのオブジェクトをそのまま返すため、
+    呼び出し側は取得した値を書き換えないこと（読み取り専用として扱う）。
+    """
+    
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Any:
+        """値を取得（存在しない・期限切れの場合は _MISS を返す）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISS
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return _MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        """値を保存し、上限を超えた分を古い順に追い出す"""
+        if self.max_entries <= 0 or size > self.max_bytes:
+            # 上限を超える巨大な値はローカルには保持しない
+            self._remove(key)
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self.current_bytes += size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+    
+    def delete(self, key: str) -> None:
+        """値を削除"""
+        self._remove(key)
+    
+    def clear(self) -> None:
+        """全ての値を削除"""
+        self._entries.clear()
+        self.current_bytes = 0
+    
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+    
+    def stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+# ロックの所有者のみが解放できるようにするLuaスクリプト
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 依存関係をたどってキャッシュを削除するLuaスクリプト
+# 反復的な深さ優先探索で、探索中（スタック上）のノードへの辺を循環として数える。
+# 依存先のキーはKEYSで宣言していないため、Redis Cluster ではなく単一ノード構成を前提とする。
+# 返り値: {削除したキー数, 削除した依存関係セット数, 循環の数, 上限で打ち切ったか, 訪問したキー}
+INVALIDATE_DEPENDENCIES_LUA = """
+local prefix = ARGV[1]
+local max_nodes = tonumber(ARGV[2])
+local state = {}
+local visited = {}
+local stack = {}
+local removed_keys = 0
+local removed_sets = 0
+local cycles = 0
+local truncated = 0
+
+local function enter(key)
+    state[key] = 1
+    visited[#visited + 1] = key
+    local members = redis.call('SMEMBERS', prefix .. key)
+    removed_keys = removed_keys + redis.call('DEL', key)
+    removed_sets = removed_sets + redis.call('DEL', prefix .. key)
+    stack[#stack + 1] = {key, members, 1}
+end
+
+enter(KEYS[1])
+while #stack > 0 do
+    local frame = stack[#stack]
+    local members = frame[2]
+    local i = frame[3]
+    if i > #members then
+        state[frame[1]] = 2
+        stack[#stack] = nil
+    else
+        frame[3] = i + 1
+        local child = members[i]
+        local child_state = state[child]
+        if child_state == 1 then
+            cycles = cycles + 1
+        elseif child_state == nil then
+            if #visited >= max_nodes then
+                truncated = 1
+            else
+                enter(child)
+            end
+        end
+    end
+end
+
+return {removed_keys, removed_sets, cycles, truncated, visited}
+"""
+
+# 依存関係を追加し、依存関係セットの有効期限を親・子のうち長い方に合わせるLuaスクリプト
+# KEYS: {依存関係セット, 親キー, 子キー, 子の依存関係セット}
+# ARGV: {子キー, どれも有効期限を持たない場合の有効期限（ミリ秒）}
+ADD_DEPENDENCY_LUA = """
+redis.call('SADD', KEYS[1], ARGV[1])
+local ttl = 0
+for i = 1, #KEYS do
+    local pttl = redis.call('PTTL', KEYS[i])
+    if pttl > ttl then
+        ttl = pttl
+    end
+end
+if ttl <= 0 then
+    ttl = tonumber(ARGV[2])
+end
+redis.call('PEXPIRE', KEYS[1], ttl)
+return ttl
+"""
+
+# 依存関係セットから参照先が存在しないメンバーを削除するLuaスクリプト
+# キー本体も依存関係セットも存在しないメンバーは、無効化でたどっても何も削除しないため取り除く。
+# 確認と削除を同じスクリプト内で行い、並行するキャッシュ保存と競合しないようにする。
+# KEYS: 依存関係セット, ARGV: {接頭辞, 有効期限のないセットに設定する有効期限（ミリ秒）}
+# 返り値: {調べたメンバー数, 削除したメンバー数, 削除したメンバーのバイト数, 削除したセット数, 有効期限を設定したセット数}
+SWEEP_DEPENDENCIES_LUA = """
+local prefix = ARGV[1]
+local ttl = tonumber(ARGV[2])
+local scanned = 0
+local removed = 0
+local removed_bytes = 0
+local removed_sets = 0
+local ttl_assigned = 0
+for i = 1, #KEYS do
+    local members = redis.call('SMEMBERS', KEYS[i])
+    for _, member in ipairs(members) do
+        scanned = scanned + 1
+        if redis.call('EXISTS', member, prefix .. member) == 0 then
+            redis.call('SREM', KEYS[i], member)
+            removed = removed + 1
+            removed_bytes = removed_bytes + #member
+        end
+    end
+    if #members > 0 and redis.call('EXISTS', KEYS[i]) == 0 then
+        removed_sets = removed_sets + 1
+    elseif redis.call('PTTL', KEYS[i]) == -1 then
+        -- 有効期限導入前に作られたセット
+        redis.call('PEXPIRE', KEYS[i], ttl)
+        ttl_assigned = ttl_assigned + 1
+    end
+end
+return {scanned, removed, removed_bytes, removed_sets, ttl_assigned}
+"""
 
 class CacheManager:
     """会議データに特化したキャッシュ管理クラス"""
@@ -14,17 +243,74 @@ class CacheManager:
         # 環境変数から設定を読み取る
         redis_host = redis_host or os.environ.get('REDIS_HOST', 'localhost')
         redis_port = redis_port or int(os.environ.get('REDIS_PORT', 6379))
+        self.redis_host = redis_host
+        self.redis_port = redis_port
         
-        # Redisクライアントの初期化（接続エラーに対応）
-        try:
-            self.redis = redis.Redis(host=redis_host, port=redis_port, db=redis_db)
-            self.redis.ping()  # 接続テスト
-            self.redis_available = True
-            print(f"Redis cache initialized: {redis_host}:{redis_port}")
-        except redis.ConnectionError:
-            self.redis_available = False
-            print(f"Redis connection failed: {redis_host}:{redis_port}")
-            print("Running with cache disabled")
+        # 接続プールとタイムアウトの設定（秒）
+        self.max_connections = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
+        self.pool_timeout = float(os.environ.get('REDIS_POOL_TIMEOUT', 1.0))
+        self.connect_timeout = float(os.environ.get('REDIS_CONNECT_TIMEOUT', 1.0))
+        self.command_timeout = float(os.environ.get('REDIS_COMMAND_TIMEOUT', 0.5))
+        
+        # 非同期Redisクライアントの初期化
+        # 接続はイベントループ上で行う必要があるため、疎通確認は connect() で実施する
+        # BlockingConnectionPool はプールが枯渇した場合に pool_timeout まで空きを待つ
+        self.pool = aioredis.BlockingConnectionPool(
+            host=redis_host,
+            port=redis_port,
+            db=redis_db,
+            max_connections=self.max_connections,
+            timeout=self.pool_timeout,
+            socket_timeout=self.command_timeout,
+            socket_connect_timeout=self.connect_timeout,
+        )
+        self.redis = aioredis.Redis(connection_pool=self.pool)
+        
+        # Redisの障害時に即座にキャッシュを迂回するサーキットブレーカー
+        # 連続して失敗すると open になり、バックグラウンドで疎通確認（half_open）を繰り返して復旧する
+        # connect() で疎通が確認できるまでは open として扱う
+        self.breaker = CircuitBreaker(
+            'redis',
+            failure_threshold=int(os.environ.get('CACHE_CIRCUIT_FAILURE_THRESHOLD', 5)),
+            reset_timeout=float(os.environ.get('CACHE_CIRCUIT_RESET_TIMEOUT', 1.0)),
+            max_reset_timeout=float(os.environ.get('CACHE_CIRCUIT_MAX_RESET_TIMEOUT', 30.0)),
+            initial_state=OPEN,
+            on_transition=self._on_circuit_transition,
+        )
+        self._reconnect_task: Optional[asyncio.Task] = None
+        # 遮断中に反映できなかった無効化（復旧時にまとめて反映する）
+        self.max_pending_invalidations = int(os.environ.get('CACHE_MAX_PENDING_INVALIDATIONS', 10000))
+        self._pending_deletes: Set[str] = set()
+        self._pending_generations: Set[str] = set()
+        # 復旧時、キャッシュを再開する前に呼び出す処理（遮断中に記録した他の変更の反映）
+        self.reconnect_hooks: List[Callable[[], Awaitable[None]]] = []
+        
+        # プロセス内L1キャッシュ（Redisの手前に置く）
+        self.l1 = LocalCache(
+            max_entries=int(os.environ.get('CACHE_L1_MAX_ENTRIES', 10000)),
+            max_bytes=int(os.environ.get('CACHE_L1_MAX_BYTES', 64 * 1024 * 1024)),
+            ttl=float(os.environ.get('CACHE_L1_TTL', 5)),
+        )
+        # L2（Redis）のヒット・ミス数
+        self.l2_hits = 0
+        self.l2_misses = 0
+        # キープレフィックスごとの操作回数・レイテンシ・バイト数
+        self.metrics = CacheMetrics()
+        
+        # L1無効化通知用のPub/Subチャンネル
+        # 自分自身が発行した通知を区別するためにワーカーIDを付与する
+        self.invalidation_channel = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache:invalidate')
+        self.worker_id = uuid.uuid4().hex
+        self._invalidation_task: Optional[asyncio.Task] = None
+        
+        # キャッシュ値のシリアライズ形式と圧縮方式
+        # 値のヘッダーに形式が記録されるため、変更しても既存のキャッシュはそのまま読める
+        self.codec = CacheCodec(
+            codec=os.environ.get('CACHE_CODEC', 'json'),
+            compression=os.environ.get('CACHE_COMPRESSION', 'none'),
+            compression_threshold=int(os.environ.get('CACHE_COMPRESSION_THRESHOLD', 1024)),
+            compression_level=int(os.environ.get('CACHE_COMPRESSION_LEVEL', 3)),
+        )
         
         # キャッシュのデフォルトTTL（秒）
         self.default_ttl = {
@@ -36,150 +322,1133 @@ class CacheManager:
             'user': 300           # ユーザー情報は5分
         }
         
+        # 会議のステータス・書き込み頻度・参照頻度に応じてキーごとのTTLを決めるポリシー
+        # 会議から派生するキー（get_or_compute に meeting_id を渡したもの）に適用する
+        self.ttl_policy = TTLPolicy(
+            completed_ttl=float(os.environ.get('CACHE_TTL_COMPLETED', 6 * 3600)),
+            live_ttl=float(os.environ.get('CACHE_TTL_LIVE', 600)),
+            idle_factor=float(os.environ.get('CACHE_TTL_IDLE_FACTOR', 4.0)),
+            hot_factor=float(os.environ.get('CACHE_TTL_HOT_FACTOR', 2.0)),
+            max_ttl=float(os.environ.get('CACHE_TTL_MAX', 24 * 3600)),
+            hot_access_rate=float(os.environ.get('CACHE_TTL_HOT_ACCESS_RATE', 1.0)),
+        )
+        
         # 依存関係の追跡用ハッシュマップ
         # 例: {'meeting:m1': ['section:s1', 'section:s2', 'task:t1']}
         self.dependency_prefix = 'deps:'
+        # 一度の無効化でたどる最大ノード数（Redisを長時間ブロックしないための上限）
+        self.invalidation_max_nodes = int(os.environ.get('CACHE_INVALIDATION_MAX_NODES', 10000))
+        # 依存関係セットの有効期限は親・子のキャッシュのうち長い方に合わせる
+        # どちらもキャッシュされていない場合はこの秒数で期限切れにする
+        self.dependency_ttl = float(os.environ.get('CACHE_DEPENDENCY_TTL', 600))
+        # 参照先が消えた依存関係を掃除する間隔（秒、0で無効）と1回のスクリプトで処理するセット数
+        self.dependency_sweep_interval = float(os.environ.get('CACHE_DEPENDENCY_SWEEP_INTERVAL', 600))
+        self.dependency_sweep_batch = int(os.environ.get('CACHE_DEPENDENCY_SWEEP_BATCH', 100))
+        self._sweep_task: Optional[asyncio.Task] = None
+        self.last_sweep: Optional[Dict[str, Any]] = None
+        self.sweep_totals = {"runs": 0, "members_removed": 0, "sets_removed": 0, "bytes_reclaimed": 0}
+        
+        # 会議単位の世代カウンター
+        # 会議から派生するキャッシュのキーには世代番号を含め、書き込み時は世代を1つ進めるだけで
+        # 派生エントリをまとめて無効化する（古い世代のエントリはTTLで自然に消える）。
+        # カウンターが消えると世代が0に戻るため、有効期限はどのエントリのハード期限よりも長くする。
+        self.generation_prefix = 'gen:meeting:'
+        self.generation_ttl = int(os.environ.get('CACHE_GENERATION_TTL', 7 * 24 * 3600))
+        self._invalidate_script = None
+        self._release_lock_script = None
+        self._add_dependency_script = None
+        self._sweep_script = None
+        
+        # キャッシュミス時の再計算の集約（シングルフライト）
+        # プロセス内はキーごとの Future、ワーカー間はRedisの短期ロックで1回に抑える
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.lock_prefix = 'lock:'
+        self.lock_ttl = float(os.environ.get('CACHE_LOCK_TTL', 10))
+        self.lock_wait = float(os.environ.get('CACHE_LOCK_WAIT', 5))
+        
+        # stale-while-revalidate と確率的な早期再計算（XFetch）の設定
+        # ソフト期限後も TTL × stale_factor の間は古い値を返しつつ再計算する
+        self.stale_factor = float(os.environ.get('CACHE_STALE_FACTOR', 1.0))
+        # 大きいほど早めに再計算を始める（1.0 が標準）
+        self.early_refresh_beta = float(os.environ.get('CACHE_EARLY_REFRESH_BETA', 1.0))
+        self._background_tasks: Set[asyncio.Task] = set()
+        # バックグラウンドで再計算中のキー（_inflight とは別に管理し、キャッシュミスの待機者には共有しない。
+        # ロックを取れなかった再計算は値を返さないため）
+        self._refreshing: Set[str] = set()
+        
+        # 条件付きGET（ETag / If-None-Match）
+        # これらのプレフィックスのキーは、保存時に内容のETagを隣のキー（etag:{key}）にも保存する。
+        # ETagのキーはソフト期限で消えるため、期限後の条件付きリクエストは通常の取得（再計算）に進む。
+        self.etag_prefix = 'etag:'
+        self.etag_prefixes = set(filter(None, os.environ.get(
+            'CACHE_ETAG_PREFIXES', 'meeting_full,section_statuses').split(',')))
+        
+        # ネガティブキャッシュ: 存在しないことが確認されたキーに置く墓標の有効期間（秒）
+        self.negative_ttl = float(os.environ.get('CACHE_NEGATIVE_TTL', 10))
     
-    async def get(self, key: str) -> Optional[Dict[str, Any]]:
-        """キャッシュからデータを取得"""
-        if not hasattr(self, 'redis_available') or not self.redis_available:
+    @property
+    def redis_available(self) -> bool:
+        """Redisを使ってよいか（サーキットが closed の場合のみ。状態を読むだけで、拒否として数えない）"""
+        return self.breaker.closed
+    
+    def allow_redis(self) -> bool:
+        """Redisを呼び出す直前の確認（使えない場合は呼び出しを省略したものとして、拒否の件数に数える）"""
+        return self.breaker.allow()
+    
+    async def connect(self) -> bool:
+        """Redisへの疎通を確認し、キャッシュを有効化する（アプリ起動時に呼び出す）
+        
+        接続できない場合もバックグラウンドで再接続を試み、復旧した時点でキャッシュを有効化する。
+        """
+        try:
+            await self._call(self.redis.ping())  # 接続テスト
+            self.breaker.reset()
+            print(f"Redis cache initialized: {self.redis_host}:{self.redis_port} "
+                  f"(pool={self.max_connections})")
+        except (redis.RedisError, asyncio.TimeoutError, OSError):
+            print(f"Redis connection failed: {self.redis_host}:{self.redis_port}")
+            print("Running with cache disabled until Redis becomes reachable")
+            self.breaker.trip()
+            self._start_reconnect()
+        return self.breaker.closed
+    
+    def _on_circuit_transition(self, previous: str, state: str) -> None:
+        """サーキットの状態が変わったときの処理"""
+        print(f"Redis circuit {previous} -> {state}")
+        if state == CLOSED:
+            # 遮断中に他ワーカーからの無効化通知を受け取れていないため、L1を空にする
+            self.l1.clear()
+            if self._invalidation_task is None:
+                self._invalidation_task = asyncio.create_task(self._listen_invalidations())
+            if self._sweep_task is None and self.dependency_sweep_interval > 0:
+                self._sweep_task = asyncio.create_task(self._run_dependency_sweeper())
+        elif state == OPEN and previous == CLOSED:
+            self._start_reconnect()
+    
+    def _start_reconnect(self) -> None:
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+    
+    async def _reconnect(self) -> None:
+        """open の間、間隔を空けて疎通を確認し、復旧したら closed に戻す"""
+        while not self.breaker.closed:
+            await asyncio.sleep(self.breaker.retry_delay())
+            self.breaker.begin_probe()
+            try:
+                await asyncio.wait_for(self.redis.ping(), timeout=self.connect_timeout)
+                # 遮断中の無効化を反映してからキャッシュを再開する
+                await self._flush_pending_invalidations()
+                for hook in self.reconnect_hooks:
+                    await hook()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis reconnect probe failed: {e}")
+                self.breaker.trip()
+                continue
+            self.breaker.reset()
+            print(f"Redis cache reconnected: {self.redis_host}:{self.redis_port}")
+    
+    def _defer_invalidation(self, pending: Set[str], key: str) -> None:
+        """遮断中に実行できなかった無効化を記録する"""
+        if len(pending) >= self.max_pending_invalidations:
+            print(f"Cache pending invalidations exceeded {self.max_pending_invalidations}, dropping {key}")
+            return
+        pending.add(key)
+    
+    async def _flush_pending_invalidations(self) -> None:
+        """遮断中に記録した削除と世代の更新をまとめて反映する"""
+        if not self._pending_deletes and not self._pending_generations:
+            return
+        deletes = list(self._pending_deletes)
+        meeting_ids = list(self._pending_generations)
+        pipe = self.redis.pipeline(transaction=False)
+        if deletes:
+            pipe.delete(*deletes, *[f"{self.dependency_prefix}{key}" for key in deletes])
+        for meeting_id in meeting_ids:
+            pipe.incr(self.generation_key(meeting_id))
+            pipe.expire(self.generation_key(meeting_id), self.generation_ttl)
+        keys = deletes + [self.generation_key(meeting_id) for meeting_id in meeting_ids]
+        pipe.publish(self.invalidation_channel, self._invalidation_message(keys))
+        await asyncio.wait_for(pipe.execute(), timeout=self.command_timeout)
+        self._pending_deletes.difference_update(deletes)
+        self._pending_generations.difference_update(meeting_ids)
+        print(f"Cache replayed {len(deletes)} delete(s) and {len(meeting_ids)} generation bump(s) after reconnect")
+    
+    async def close(self) -> None:
+        """接続プールを解放する（アプリ終了時に呼び出す）"""
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._invalidation_task is not None:
+            self._invalidation_task.cancel()
+            self._invalidation_task = None
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+        for task in list(self._background_tasks):
+            task.cancel()
+        try:
+            await self.redis.aclose()
+            await self.pool.disconnect()
+        except Exception as e:
+            print(f"Cache close error: {e}")
+    
+    async def _call(self, awaitable):
+        """Redisコマンドをコマンド単位のタイムアウト付きで実行
+        
+        接続エラー・タイムアウトはサーキットブレーカーに失敗として記録する
+        （コマンド自体のエラーである ResponseError は数えない）。
+        """
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=self.command_timeout)
+        except (redis.ConnectionError, redis.TimeoutError, asyncio.TimeoutError, OSError):
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+    
+    def _invalidation_message(self, keys: List[str]) -> str:
+        return json.dumps({"origin": self.worker_id, "keys": keys})
+    
+    async def _listen_invalidations(self) -> None:
+        """他ワーカーからの無効化通知を受信し、L1キャッシュから削除する"""
+        while True:
+            if not self.breaker.closed:
+                await asyncio.sleep(1.0)
+                continue
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                # 購読開始前の通知は受け取れないため、L1を空にしてから始める
+                self.l1.clear()
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None or message.get('type') != 'message':
+                        continue
+                    payload = json.loads(message['data'])
+                    if payload.get('origin') == self.worker_id:
+                        continue
+                    for key in payload.get('keys', []):
+                        self.l1.delete(key)
+                        self.l1.delete(f"{self.etag_prefix}{key}")
+                        if key.startswith(self.generation_prefix):
+                            # 他ワーカーでの書き込みも書き込み頻度に含める
+                            self.ttl_policy.observe_write(key[len(self.generation_prefix):])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 切断中の通知は失われるため、L1を空にして再購読する
+                print(f"Cache invalidation listener error: {e}")
+                self.l1.clear()
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """階層ごとのヒット率などの統計情報を取得"""
+        l1_stats = self.l1.stats()
+        l2_lookups = self.l2_hits + self.l2_misses
+        total_lookups = l1_stats["hits"] + l1_stats["misses"]
+        return {
+            "redis_available": self.breaker.closed,
+            "circuit": {
+                **self.breaker.snapshot(),
+                "pending_invalidations": len(self._pending_deletes) + len(self._pending_generations),
+            },
+            "codec": self.codec.describe(),
+            "l1": l1_stats,
+            "l2": {
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "hit_ratio": self.l2_hits / l2_lookups if l2_lookups else 0.0,
+            },
+            "overall_hit_ratio": (
+                (l1_stats["hits"] + self.l2_hits) / total_lookups if total_lookups else 0.0
+            ),
+            "prefixes": self.metrics.snapshot(),
+            "ttl_policy": self.ttl_policy.snapshot(),
+            "dependency_sweep": {
+                "interval": self.dependency_sweep_interval,
+                "last": self.last_sweep,
+                "totals": self.sweep_totals,
+            },
+        }
+    
+    def render_metrics(self) -> str:
+        """計測値をPrometheusのテキスト形式で取得"""
+        l1_stats = self.l1.stats()
+        lines = [
+            "# HELP cache_redis_available Whether Redis is currently used (1) or bypassed (0)",
+            "# TYPE cache_redis_available gauge",
+            f"cache_redis_available {1 if self.breaker.closed else 0}",
+            "# HELP cache_l1_entries Entries held in the in-process cache",
+            "# TYPE cache_l1_entries gauge",
+            f"cache_l1_entries {l1_stats['entries']}",
+            "# HELP cache_l1_bytes Serialized bytes held in the in-process cache",
+            "# TYPE cache_l1_bytes gauge",
+            f"cache_l1_bytes {l1_stats['bytes']}",
+            "# HELP cache_l1_evictions_total Entries evicted from the in-process cache",
+            "# TYPE cache_l1_evictions_total counter",
+            f"cache_l1_evictions_total {l1_stats['evictions']}",
+            "# HELP cache_pending_invalidations Invalidations waiting for Redis to recover",
+            "# TYPE cache_pending_invalidations gauge",
+            f"cache_pending_invalidations {len(self._pending_deletes) + len(self._pending_generations)}",
+            *self.breaker.render_prometheus(),
+            *self.ttl_policy.render_prometheus(),
+            "# HELP cache_dependency_sweep_members_removed_total Dangling dependency members removed by the sweeper",
+            "# TYPE cache_dependency_sweep_members_removed_total counter",
+            f"cache_dependency_sweep_members_removed_total {self.sweep_totals['members_removed']}",
+            "# HELP cache_dependency_sweep_reclaimed_bytes_total Redis memory reclaimed by the dependency sweeper",
+            "# TYPE cache_dependency_sweep_reclaimed_bytes_total counter",
+            f"cache_dependency_sweep_reclaimed_bytes_total {self.sweep_totals['bytes_reclaimed']}",
+        ]
+        return "\n".join(lines) + "\n" + self.metrics.render_prometheus()
+    
+    def _encode_entry(self, entry: CacheEntry) -> bytes:
+        """エントリをコーデック・メタデータのヘッダー付きでシリアライズ"""
+        return self.codec.encode(entry.value, entry.soft_expiry, entry.cost, entry.tombstone)
+    
+    def _decode_entry(self, data: bytes) -> CacheEntry:
+        """シリアライズされたエントリを復元（ヘッダーのない旧形式の値にも対応）"""
+        return CacheEntry(*self.codec.decode(data))
+    
+    async def _get_entry(self, key: str) -> Optional[CacheEntry]:
+        """メタデータ付きのエントリを取得（L1 → Redis の順に参照、期限切れ判定はしない）"""
+        if not self.allow_redis():
             return None
+        
+        entry = self.l1.get(key)
+        if entry is not _MISS:
+            self.metrics.record('get', key, self._lookup_result(entry, 'hit_l1'))
+            return entry
             
+        started = time.perf_counter()
         try:
-            data = self.redis.get(key)
+            data = await self._call(self.redis.get(key))
+            self.metrics.observe_latency('get', key, time.perf_counter() - started)
             if data:
-                return json.loads(data)
+                self.l2_hits += 1
+                entry = self._decode_entry(data)
+                self.l1.set(key, entry, len(data))
+                self.metrics.observe_bytes('get', key, len(data))
+                self.metrics.record('get', key, self._lookup_result(entry, 'hit_l2'))
+                return entry
+            self.l2_misses += 1
+            self.metrics.record('get', key, 'miss')
         except Exception as e:
+            self.metrics.record('get', key, 'error')
             print(f"Cache get error: {e}")
         return None
     
+    @staticmethod
+    def _lookup_result(entry: CacheEntry, hit: str) -> str:
+        """メトリクスに記録する参照結果（期限切れは stale、有効な墓標は negative）"""
+        if entry.soft_expiry <= time.time():
+            return 'stale'
+        return 'negative' if entry.tombstone else hit
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """キャッシュからデータを取得（L1 → Redis の順に参照）
+        
+        ソフト期限を過ぎた値・墓標は返さない（古い値を返すのは get_or_compute のみ）。
+        返り値はL1キャッシュと共有されるため、書き換えないこと。
+        """
+        entry = await self._get_entry(key)
+        if entry is None or entry.tombstone or entry.soft_expiry <= time.time():
+            return None
+        return entry.value
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """複数のキーをまとめて取得（L1にないものはMGETで1往復）
+        
+        返り値はキャッシュに存在したキーのみを含む辞書。値はL1と共有されるため書き換えないこと。
+        ソフト期限を過ぎた値・墓標は含まない。
+        """
+        result: Dict[str, Any] = {}
+        if not keys or not self.allow_redis():
+            return result
+        
+        now = time.time()
+        remaining = []
+        for key in keys:
+            entry = self.l1.get(key)
+            if entry is _MISS:
+                remaining.append(key)
+                continue
+            self.metrics.record('get', key, self._lookup_result(entry, 'hit_l1'))
+            if not entry.tombstone and entry.soft_expiry > now:
+                result[key] = entry.value
+        if not remaining:
+            return result
+        
+        started = time.perf_counter()
+        try:
+            values = await self._call(self.redis.mget(remaining))
+            elapsed = time.perf_counter() - started
+            # MGETのレイテンシは含まれるプレフィックスごとに1回ずつ記録する
+            for prefix_key in {key.split(':', 1)[0]: key for key in remaining}.values():
+                self.metrics.observe_latency('get_many', prefix_key, elapsed)
+            for key, data in zip(remaining, values):
+                if data:
+                    self.l2_hits += 1
+                    entry = self._decode_entry(data)
+                    self.l1.set(key, entry, len(data))
+                    self.metrics.observe_bytes('get', key, len(data))
+                    self.metrics.record('get', key, self._lookup_result(entry, 'hit_l2'))
+                    if not entry.tombstone and entry.soft_expiry > now:
+                        result[key] = entry.value
+                else:
+                    self.l2_misses += 1
+                    self.metrics.record('get', key, 'miss')
+        except Exception as e:
+            for key in remaining:
+                self.metrics.record('get', key, 'error')
+            print(f"Cache get_many error: {e}")
+        return result
+    
+    async def get_or_compute(self, key: str, compute, ttl: Optional[int] = None,
+                             entity_type: Optional[str] = None, cache_misses: bool = False,
+                             meeting_id: Optional[str] = None) -> Any:
+        """キャッシュから取得し、なければ compute() の結果をキャッシュして返す
+        
+        値はTTL（ソフト期限）を過ぎても猶予期間（ハード期限）まではRedisに残し、
+        その間のリクエストには古い値を即座に返してバックグラウンドで再計算する。
+        ソフト期限の前でも、再計算コストに応じた確率で早めに再計算を始める（XFetch）。
+        
+        同じキーへの同時のキャッシュミスは1回の計算に集約する。
+        プロセス内では実行中の計算の結果を待ち、他ワーカーが計算中の場合は
+        Redisのロックが解放されるか結果が書き込まれるまで待つ。
+        compute() が偽となる値を返した場合はキャッシュしない。
+        cache_misses=True の場合は、代わりに短い期限（negative_ttl）の墓標をキャッシュし、
+        期限までは compute() を呼ばずに None を返す（存在しないIDへの問い合わせの繰り返し対策）。
+        墓標は通常の値と同じく delete や世代の更新で消える。
+        
+        meeting_id を渡した場合（会議の世代付きのキー）は、ttl を基準にTTLポリシーで実際のTTLを決める。
+        """
+        if meeting_id is not None:
+            self.ttl_policy.observe_access(meeting_id)
+        while True:
+            entry = await self._get_entry(key)
+            if entry is not None and entry.tombstone:
+                if time.time() < entry.soft_expiry:
+                    return None
+                # 期限切れの墓標（L1に残っていたもの）はキャッシュミスとして扱う
+                entry = None
+            if entry is not None:
+                now = time.time()
+                if now >= entry.soft_expiry or self._should_refresh_early(entry, now):
+                    self._schedule_refresh(key, compute, ttl, entity_type, cache_misses, meeting_id)
+                return entry.value
+            
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # 計算していたリクエスト自体がキャンセルされた場合は、改めて自分が計算する
+                if inflight.cancelled():
+                    continue
+                raise
+        
+        return await self._run_inflight(key, compute, ttl, entity_type, cache_misses, meeting_id)
+    
+    async def get_etag(self, key: str) -> Optional[str]:
+        """キーに保存されている値のETagを取得（値本体は読み込まない。ソフト期限後は None）"""
+        if not self.allow_redis():
+            return None
+        etag_key = f"{self.etag_prefix}{key}"
+        etag = self.l1.get(etag_key)
+        if etag is not _MISS:
+            return etag
+        try:
+            data = await self._call(self.redis.get(etag_key))
+        except Exception as e:
+            self.metrics.record('etag', key, 'error')
+            print(f"Cache get_etag error: {e}")
+            return None
+        if not data:
+            self.metrics.record('etag', key, 'miss')
+            return None
+        soft_expiry, etag = (data.decode() if isinstance(data, bytes) else data).split(' ', 1)
+        remaining = float(soft_expiry) - time.time()
+        if remaining <= 0:
+            return None
+        self.metrics.record('etag', key, 'hit_l2')
+        self.l1.set(etag_key, etag, len(etag), remaining)
+        return etag
+    
+    async def get_or_compute_tagged(self, key: str, compute, if_none_match: Optional[str] = None,
+                                    **kwargs) -> TaggedValue:
+        """get_or_compute と同じく取得し、値のETagも返す（条件付きGET用）
+        
+        if_none_match（If-None-Match ヘッダーの値）が保存されているETagと一致する場合は、
+        値を読み込まず（再計算・デコードもせず）に not_modified=True を返す。
+        ETagは保存時に作ったものを使い、なければ（Redisを使えない・他ワーカーが保存した値など）値から作る。
+        値がない場合は TaggedValue(None, None) を返す。
+        """
+        if if_none_match:
+            etag = await self.get_etag(key)
+            if etag_matches(if_none_match, etag):
+                if kwargs.get('meeting_id') is not None:
+                    self.ttl_policy.observe_access(kwargs['meeting_id'])
+                self.metrics.record('etag', key, 'not_modified')
+                return TaggedValue(None, etag, True)
+        value = await self.get_or_compute(key, compute, **kwargs)
+        if value is None:
+            return TaggedValue(None, None)
+        # 値の取得後に待ち合わせを挟まない（L1のETagだけを使う）ため、値とETagが食い違わない
+        etag = self.l1.get(f"{self.etag_prefix}{key}")
+        if etag is _MISS:
+            etag = content_etag(value)
+        not_modified = etag_matches(if_none_match, etag)
+        if if_none_match:
+            self.metrics.record('etag', key, 'not_modified' if not_modified else 'modified')
+        return TaggedValue(None if not_modified else value, etag, not_modified)
+    
+    def _should_refresh_early(self, entry: CacheEntry, now: float) -> bool:
+        """XFetch: 再計算コストが大きいほど、期限に近いほど高い確率で早期再計算する"""
+        if entry.cost <= 0 or entry.soft_expiry == float('inf'):
+            return False
+        # 1 - random() は (0, 1] の範囲なので log の引数が0にならない
+        return now - entry.cost * self.early_refresh_beta * math.log(1.0 - random.random()) >= entry.soft_expiry
+    
+    def _schedule_refresh(self, key: str, compute, ttl: Optional[int], entity_type: Optional[str],
+                          cache_misses: bool = False, meeting_id: Optional[str] = None) -> None:
+        """バックグラウンドで再計算を開始（既に実行中なら何もしない）"""
+        if key in self._inflight or key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(
+            self._refresh(key, compute, ttl, entity_type, cache_misses, meeting_id))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_refresh_done)
+    
+    async def _refresh(self, key: str, compute, ttl: Optional[int], entity_type: Optional[str],
+                       cache_misses: bool, meeting_id: Optional[str]) -> None:
+        try:
+            await self._compute_with_lock(key, compute, ttl, entity_type, cache_misses, meeting_id,
+                                          background=True)
+        finally:
+            self._refreshing.discard(key)
+    
+    def _on_refresh_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Cache background refresh error: {task.exception()}")
+    
+    async def _run_inflight(self, key: str, compute, ttl: Optional[int], entity_type: Optional[str],
+                            cache_misses: bool, meeting_id: Optional[str]) -> Any:
+        """実行中の計算として登録して計算し、結果を待機者に共有する（キャッシュミス時のみ）"""
+        future = asyncio.get_running_loop().create_future()
+        # 待機者がいない場合に例外が未取得の警告を出さないようにする
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            value = await self._compute_with_lock(key, compute, ttl, entity_type, cache_misses,
+                                                  meeting_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def _compute_with_lock(self, key: str, compute, ttl: Optional[int],
+                                 entity_type: Optional[str], cache_misses: bool = False,
+                                 meeting_id: Optional[str] = None, background: bool = False) -> Any:
+        """ワーカー間ロックを取得して計算し、結果をキャッシュする"""
+        lock_key = f"{self.lock_prefix}{key}"
+        token = uuid.uuid4().hex
+        acquired = await self._acquire_lock(lock_key, token)
+        
+        if not acquired:
+            if background:
+                # バックグラウンド再計算は他のワーカーに任せる
+                return None
+            # 他のワーカーが計算中: 結果（または墓標）が書き込まれるのを待つ
+            entry = await self._wait_for_other_worker(key, lock_key)
+            if entry is not None:
+                return None if entry.tombstone else entry.value
+            # 待機がタイムアウトした・結果が得られなかった場合は自分で計算する
+        
+        try:
+            started = time.perf_counter()
+            value = await compute()
+            cost = time.perf_counter() - started
+            self.metrics.observe_latency('compute', key, cost)
+            self.metrics.record('compute', key, 'background' if background else 'foreground')
+            if value:
+                await self._set_entry(key, value, ttl, entity_type, cost=cost, stale=True,
+                                      meeting_id=meeting_id)
+            elif cache_misses:
+                # 存在しないことが確認できたので、短い期限の墓標を置く（猶予期間なし）
+                await self._set_entry(key, None, self.negative_ttl, None, cost=cost, stale=False,
+                                      tombstone=True)
+            return value
+        finally:
+            if acquired:
+                await self._release_lock(lock_key, token)
+    
+    async def _acquire_lock(self, lock_key: str, token: str) -> bool:
+        """ワーカー間ロックの取得を試みる（Redisが使えない場合は常に取得成功とみなす）"""
+        if not self.allow_redis():
+            return True
+        try:
+            acquired = bool(await self._call(
+                self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))))
+            self.metrics.record('lock', lock_key, 'acquired' if acquired else 'contended')
+            return acquired
+        except Exception as e:
+            self.metrics.record('lock', lock_key, 'error')
+            print(f"Cache lock error: {e}")
+            return True
+    
+    async def claim(self, key: str, ttl: float) -> bool:
+        """キーを一定時間だけ確保する（他のワーカーが確保済みなら False）
+        
+        処理をワーカー間で1回にまとめるために使う。Redisが使えない場合は常に True を返す。
+        """
+        if not self.allow_redis():
+            return True
+        try:
+            claimed = bool(await self._call(
+                self.redis.set(key, self.worker_id, nx=True, px=int(ttl * 1000))))
+            self.metrics.record('claim', key, 'acquired' if claimed else 'contended')
+            return claimed
+        except Exception as e:
+            self.metrics.record('claim', key, 'error')
+            print(f"Cache claim error: {e}")
+            return True
+    
+    async def _release_lock(self, lock_key: str, token: str) -> None:
+        """自分が取得したロックのみを解放する"""
+        if not self.allow_redis():
+            return
+        try:
+            if self._release_lock_script is None:
+                self._release_lock_script = self.redis.register_script(RELEASE_LOCK_LUA)
+            await self._call(self._release_lock_script(keys=[lock_key], args=[token]))
+        except Exception as e:
+            print(f"Cache unlock error: {e}")
+    
+    async def _wait_for_other_worker(self, key: str, lock_key: str) -> Optional[CacheEntry]:
+        """他ワーカーの計算結果（墓標を含む）がキャッシュされるまで待つ"""
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.01
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            entry = await self._get_entry(key)
+            if entry is not None and entry.soft_expiry > time.time():
+                return entry
+            try:
+                if not await self._call(self.redis.exists(lock_key)):
+                    # ロックが解放されたのに結果がない（計算結果が空・失敗）
+                    return None
+            except Exception:
+                return None
+        return None
+    
     async def set(self, key: str, data: Dict[str, Any], ttl: Optional[int] = None, 
                   entity_type: Optional[str] = None) -> None:
-        """データをキャッシュに保存"""
-        if not hasattr(self, 'redis_available') or not self.redis_available:
+        """データをキャッシュに保存（TTL経過後は古い値も返さない）"""
+        await self._set_entry(key, data, ttl, entity_type, cost=0.0, stale=False)
+    
+    async def _set_entry(self, key: str, data: Any, ttl: Optional[float], entity_type: Optional[str],
+                         cost: float, stale: bool, tombstone: bool = False,
+                         meeting_id: Optional[str] = None) -> None:
+        """メタデータ付きでデータをキャッシュに保存
+        
+        ソフト期限はTTL後、ハード期限（Redis上の有効期限）は stale=True の場合
+        さらに猶予期間を加えた時刻とする。tombstone=True の場合は墓標として保存する。
+        墓標以外のTTLはTTLポリシーで決め、決定内容は ttl_policy.explain(key) で確認できる。
+        """
+        if not self.allow_redis():
             return
             
         try:
             if entity_type and ttl is None:
                 ttl = self.default_ttl.get(entity_type, 60)
-                
-            self.redis.setex(key, ttl, json.dumps(data))
+            if not tombstone:
+                ttl = self.ttl_policy.decide(key, ttl, meeting_id).ttl
+            
+            hard_ttl = ttl + (ttl * self.stale_factor if stale else 0)
+            entry = CacheEntry(data, time.time() + ttl, cost, tombstone)
+            payload = self._encode_entry(entry)
+            # 値の保存と他ワーカーへのL1無効化通知を1往復で行う
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, payload, px=int(hard_ttl * 1000))
+            etag = None
+            if not tombstone and key_prefix(key) in self.etag_prefixes:
+                # ETagは値と同じ往復で保存し、ソフト期限で消す
+                etag = content_etag(data)
+                pipe.set(f"{self.etag_prefix}{key}", f"{entry.soft_expiry} {etag}", px=int(ttl * 1000))
+            pipe.publish(self.invalidation_channel, self._invalidation_message([key]))
+            started = time.perf_counter()
+            await self._call(pipe.execute())
+            self.metrics.observe_latency('set', key, time.perf_counter() - started)
+            self.metrics.observe_bytes('set', key, len(payload))
+            self.metrics.record('set', key, 'ok')
+            self.l1.set(key, entry, len(payload), hard_ttl)
+            if etag is not None:
+                self.l1.set(f"{self.etag_prefix}{key}", etag, len(etag), ttl)
         except Exception as e:
+            self.metrics.record('set', key, 'error')
             print(f"Cache set error: {e}")
     
     async def delete(self, key: str) -> None:
-        """キャッシュからデータを削除"""
-        if not hasattr(self, 'redis_available') or not self.redis_available:
+        """キャッシュからデータを削除（Redisが使えない間は復旧後に削除する）"""
+        self.l1.delete(key)
+        self.l1.delete(f"{self.etag_prefix}{key}")
+        if not self.allow_redis():
+            self._defer_invalidation(self._pending_deletes, key)
             return
             
         try:
-            self.redis.delete(key)
-            
-            # 依存関係も削除
-            self.redis.delete(f"{self.dependency_prefix}{key}")
+            # キー本体と依存関係・ETagの削除、他ワーカーへのL1無効化通知を1往復で行う
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(key, f"{self.dependency_prefix}{key}", f"{self.etag_prefix}{key}")
+            pipe.publish(self.invalidation_channel, self._invalidation_message([key]))
+            started = time.perf_counter()
+            await self._call(pipe.execute())
+            self.metrics.observe_latency('delete', key, time.perf_counter() - started)
+            self.metrics.record('delete', key, 'ok')
         except Exception as e:
+            self.metrics.record('delete', key, 'error')
+            self._defer_invalidation(self._pending_deletes, key)
             print(f"Cache delete error: {e}")
     
+    async def delete_many(self, keys: List[str]) -> None:
+        """複数のキーをまとめて削除（作成されたエンティティの墓標の削除などに使う）"""
+        if not keys:
+            return
+        for key in keys:
+            self.l1.delete(key)
+        if not self.allow_redis():
+            for key in keys:
+                self._defer_invalidation(self._pending_deletes, key)
+            return
+        
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(*keys, *(f"{self.dependency_prefix}{key}" for key in keys))
+            pipe.publish(self.invalidation_channel, self._invalidation_message(keys))
+            started = time.perf_counter()
+            await self._call(pipe.execute())
+            elapsed = time.perf_counter() - started
+            for key in keys:
+                self.metrics.observe_latency('delete', key, elapsed)
+                self.metrics.record('delete', key, 'ok')
+        except Exception as e:
+            for key in keys:
+                self.metrics.record('delete', key, 'error')
+                self._defer_invalidation(self._pending_deletes, key)
+            print(f"Cache delete_many error: {e}")
+    
     async def add_dependency(self, parent_key: str, child_key: str) -> None:
-        """親キーと子キーの依存関係を追加"""
-        if not hasattr(self, 'redis_available') or not self.redis_available:
+        """親キーと子キーの依存関係を追加
+        
+        依存関係セットは親・子（またはその依存関係セット）のうち最も長く残るものと同時に期限切れになる。
+        """
+        if not self.allow_redis():
             return
             
+        deps_key = f"{self.dependency_prefix}{parent_key}"
+        started = time.perf_counter()
         try:
-            self.redis.sadd(f"{self.dependency_prefix}{parent_key}", child_key)
+            try:
+                if self._add_dependency_script is None:
+                    self._add_dependency_script = self.redis.register_script(ADD_DEPENDENCY_LUA)
+                await self._call(self._add_dependency_script(
+                    keys=[deps_key, parent_key, child_key, f"{self.dependency_prefix}{child_key}"],
+                    args=[child_key, int(self.dependency_ttl * 1000)],
+                ))
+            except redis.ResponseError:
+                # スクリプトが使えない場合は固定の有効期限を設定する
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.sadd(deps_key, child_key)
+                pipe.expire(deps_key, int(self.dependency_ttl))
+                await self._call(pipe.execute())
+            self.metrics.observe_latency('add_dependency', deps_key, time.perf_counter() - started)
+            self.metrics.record('add_dependency', deps_key, 'ok')
         except Exception as e:
+            self.metrics.record('add_dependency', deps_key, 'error')
             print(f"Cache add_dependency error: {e}")
     
-    async def invalidate_with_dependencies(self, key: str) -> None:
-        """キーとその依存関係を無効化"""
-        if not hasattr(self, 'redis_available') or not self.redis_available:
-            return
-            
+    async def invalidate_with_dependencies(self, key: str) -> Dict[str, Any]:
+        """キーとその依存関係を無効化
+        
+        依存関係の探索と削除はLuaスクリプトでRedis側で一括実行する（1往復・アトミック）。
+        スクリプトが使えない環境では、幅優先の階層ごとにパイプラインで実行する。
+        循環参照は検出して打ち切り、削除件数と所要時間を返す。
+        """
+        report = {
+            "key": key,
+            "removed_keys": 0,
+            "removed_dependency_sets": 0,
+            "nodes": 0,
+            "cycles": 0,
+            "truncated": False,
+            "method": None,
+            "elapsed_ms": 0.0,
+        }
+        if not self.allow_redis():
+            return report
+        
+        started = time.perf_counter()
         try:
-            # まず依存関係を取得
-            deps_key = f"{self.dependency_prefix}{key}"
-            dependencies = self.redis.smembers(deps_key)
+            try:
+                visited = await self._invalidate_with_script(key, report)
+            except redis.ResponseError as e:
+                # スクリプト実行が禁止されている場合などはパイプライン方式にフォールバック
+                print(f"Cache invalidation script unavailable, falling back to pipeline: {e}")
+                visited = await self._invalidate_with_pipeline(key, report)
             
-            # 依存関係を再帰的に無効化
-            for dep in dependencies:
-                dep_str = dep.decode('utf-8')
-                await self.invalidate_with_dependencies(dep_str)
+            # 自ワーカーと他ワーカーのL1から削除
+            for visited_key in visited:
+                self.l1.delete(visited_key)
+            await self._call(self.redis.publish(
+                self.invalidation_channel, self._invalidation_message(visited)))
             
-            # 最後に自身を無効化
-            await self.delete(key)
+            if report["cycles"]:
+                print(f"Cache dependency cycle detected while invalidating {key}: {report['cycles']} edge(s) skipped")
+            self.metrics.observe_fanout(key, report["removed_keys"])
+            self.metrics.record('invalidate', key, 'ok')
         except Exception as e:
+            self.metrics.record('invalidate', key, 'error')
             print(f"Cache invalidate_with_dependencies error: {e}")
+        elapsed = time.perf_counter() - started
+        self.metrics.observe_latency('invalidate', key, elapsed)
+        report["elapsed_ms"] = elapsed * 1000
+        return report
+    
+    async def _invalidate_with_script(self, key: str, report: Dict[str, Any]) -> List[str]:
+        """Luaスクリプトで依存関係をたどって削除する"""
+        if self._invalidate_script is None:
+            self._invalidate_script = self.redis.register_script(INVALIDATE_DEPENDENCIES_LUA)
+        removed_keys, removed_sets, cycles, truncated, visited = await self._call(
+            self._invalidate_script(keys=[key], args=[self.dependency_prefix, self.invalidation_max_nodes])
+        )
+        visited = [k.decode('utf-8') if isinstance(k, bytes) else k for k in visited]
+        report.update({
+            "removed_keys": removed_keys,
+            "removed_dependency_sets": removed_sets,
+            "nodes": len(visited),
+            "cycles": cycles,
+            "truncated": bool(truncated),
+            "method": "lua",
+        })
+        return visited
+    
+    async def _invalidate_with_pipeline(self, key: str, report: Dict[str, Any]) -> List[str]:
+        """幅優先で階層ごとにSMEMBERSとDELをパイプライン実行する"""
+        # 各ノードの祖先集合を保持し、祖先への辺を循環として検出する
+        ancestors: Dict[str, Set[str]] = {key: set()}
+        visited = [key]
+        frontier = [key]
+        while frontier:
+            pipe = self.redis.pipeline(transaction=False)
+            for node in frontier:
+                pipe.smembers(f"{self.dependency_prefix}{node}")
+            for node in frontier:
+                pipe.delete(node)
+                pipe.delete(f"{self.dependency_prefix}{node}")
+            results = await self._call(pipe.execute())
+            
+            members_list = results[:len(frontier)]
+            deleted = results[len(frontier):]
+            report["removed_keys"] += sum(deleted[0::2])
+            report["removed_dependency_sets"] += sum(deleted[1::2])
+            
+            next_frontier = []
+            for node, members in zip(frontier, members_list):
+                for member in members:
+                    child = member.decode('utf-8') if isinstance(member, bytes) else member
+                    if child == node or child in ancestors[node]:
+                        report["cycles"] += 1
+                    elif child not in ancestors:
+                        if len(visited) >= self.invalidation_max_nodes:
+                            report["truncated"] = True
+                            continue
+                        ancestors[child] = ancestors[node] | {node}
+                        visited.append(child)
+                        next_frontier.append(child)
+            frontier = next_frontier
+        
+        report["nodes"] = len(visited)
+        report["method"] = "pipeline"
+        return visited
+    
+    async def _run_dependency_sweeper(self) -> None:
+        """一定間隔で依存関係セットを掃除する"""
+        lock_key = f"{self.lock_prefix}deps-sweep"
+        while True:
+            # 起動直後に全ワーカーが同時に走らないよう間隔をずらす
+            await asyncio.sleep(self.dependency_sweep_interval * random.uniform(0.5, 1.0))
+            token = uuid.uuid4().hex
+            try:
+                # 掃除はいずれか1つのワーカーだけが行う
+                if not await self._acquire_lock(lock_key, token):
+                    continue
+                try:
+                    await self.sweep_dependencies()
+                finally:
+                    await self._release_lock(lock_key, token)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache dependency sweeper error: {e}")
+    
+    async def sweep_dependencies(self) -> Dict[str, Any]:
+        """参照先が存在しない依存関係のメンバーを削除し、回収したメモリ量を返す
+        
+        SCANで deps:* を少しずつたどり、バッチごとにLuaスクリプトで削除する。
+        回収量は MEMORY USAGE の削除前後の差で測り、使えない場合はメンバーのバイト数で見積もる。
+        """
+        report = {
+            "sets_scanned": 0,
+            "members_scanned": 0,
+            "members_removed": 0,
+            "sets_removed": 0,
+            "ttl_assigned": 0,
+            "bytes_reclaimed": 0,
+            "bytes_estimated": False,
+            "elapsed_ms": 0.0,
+        }
+        if not self.allow_redis():
+            return report
+        
+        started = time.perf_counter()
+        if self._sweep_script is None:
+            self._sweep_script = self.redis.register_script(SWEEP_DEPENDENCIES_LUA)
+        measure_memory = True
+        cursor = 0
+        while True:
+            cursor, keys = await self._call(self.redis.scan(
+                cursor=cursor, match=f"{self.dependency_prefix}*", count=self.dependency_sweep_batch))
+            keys = [k.decode('utf-8') if isinstance(k, bytes) else k for k in keys]
+            if keys:
+                before = await self._memory_usage(keys) if measure_memory else None
+                scanned, removed, removed_bytes, removed_sets, ttl_assigned = await self._call(
+                    self._sweep_script(keys=keys, args=[self.dependency_prefix, int(self.dependency_ttl * 1000)])
+                )
+                report["sets_scanned"] += len(keys)
+                report["members_scanned"] += scanned
+                report["members_removed"] += removed
+                report["sets_removed"] += removed_sets
+                report["ttl_assigned"] += ttl_assigned
+                after = await self._memory_usage(keys) if before is not None and removed else before
+                if before is None or after is None:
+                    measure_memory = False
+                    report["bytes_estimated"] = True
+                    report["bytes_reclaimed"] += removed_bytes
+                else:
+                    report["bytes_reclaimed"] += max(0, before - after)
+            if cursor == 0:
+                break
+        
+        report["elapsed_ms"] = (time.perf_counter() - started) * 1000
+        self.last_sweep = {**report, "finished_at": time.time()}
+        self.sweep_totals["runs"] += 1
+        self.sweep_totals["members_removed"] += report["members_removed"]
+        self.sweep_totals["sets_removed"] += report["sets_removed"]
+        self.sweep_totals["bytes_reclaimed"] += report["bytes_reclaimed"]
+        print(f"Cache dependency sweep: removed {report['members_removed']} member(s) "
+              f"from {report['sets_scanned']} set(s), reclaimed "
+              f"{'~' if report['bytes_estimated'] else ''}{report['bytes_reclaimed']} bytes")
+        return report
+    
+    async def _memory_usage(self, keys: List[str]) -> Optional[int]:
+        """キーのメモリ使用量の合計（MEMORY USAGE が使えない場合は None）"""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.memory_usage(key)
+            return sum(usage or 0 for usage in await self._call(pipe.execute()))
+        except redis.ResponseError:
+            return None
+    
+    def generation_key(self, meeting_id: str) -> str:
+        """会議の世代カウンターのキー"""
+        return f"{self.generation_prefix}{meeting_id}"
+    
+    async def get_generation(self, meeting_id: str) -> int:
+        """会議の現在の世代を取得（L1 → Redis の順に参照、カウンターがなければ0）"""
+        if not self.allow_redis():
+            return 0
+        
+        key = self.generation_key(meeting_id)
+        generation = self.l1.get(key)
+        if generation is not _MISS:
+            self.metrics.record('generation', key, 'hit_l1')
+            return generation
+        try:
+            data = await self._call(self.redis.get(key))
+            generation = int(data) if data else 0
+            self.l1.set(key, generation, len(key))
+            self.metrics.record('generation', key, 'hit_l2')
+            return generation
+        except Exception as e:
+            self.metrics.record('generation', key, 'error')
+            print(f"Cache get_generation error: {e}")
+            return 0
+    
+    async def bump_generation(self, meeting_id: str) -> int:
+        """会議の世代を1つ進め、その会議から派生した全てのキャッシュを無効化する
+        
+        カウンターの更新と他ワーカーへのL1無効化通知を1往復で行う。
+        データソースへの書き込みが終わった後に呼び出すこと。
+        Redisが使えない間は記録しておき、復旧後に世代を進める。
+        """
+        self.ttl_policy.observe_write(meeting_id)
+        if not self.allow_redis():
+            self._defer_invalidation(self._pending_generations, meeting_id)
+            return 0
+        
+        key = self.generation_key(meeting_id)
+        self.l1.delete(key)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, self.generation_ttl)
+            pipe.publish(self.invalidation_channel, self._invalidation_message([key]))
+            generation, _, _ = await self._call(pipe.execute())
+            self.l1.set(key, generation, len(key))
+            self.metrics.record('generation', key, 'bump')
+            return generation
+        except Exception as e:
+            self.metrics.record('generation', key, 'error')
+            self._defer_invalidation(self._pending_generations, meeting_id)
+            print(f"Cache bump_generation error: {e}")
+            return 0
+    
+    async def invalidate_meeting(self, meeting_id: str, keys: List[str]) -> None:
+        """会議の世代を進め、世代番号を含まないキー（セクション・項目など）も削除する
+
+        世代の更新・キーと依存関係の削除・他ワーカーへのL1無効化通知を1往復で行う
+        （カスケード削除の後に呼び出す）。Redisが使えない間は記録しておき、復旧後に反映する。
+        """
+        self.ttl_policy.observe_write(meeting_id)
+        key = self.generation_key(meeting_id)
+        self.l1.delete(key)
+        for deleted_key in keys:
+            self.l1.delete(deleted_key)
+        if not self.allow_redis():
+            self._defer_invalidation(self._pending_generations, meeting_id)
+            for deleted_key in keys:
+                self._defer_invalidation(self._pending_deletes, deleted_key)
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, self.generation_ttl)
+            if keys:
+                pipe.delete(*keys, *(f"{self.dependency_prefix}{deleted_key}" for deleted_key in keys))
+            pipe.publish(self.invalidation_channel, self._invalidation_message([key, *keys]))
+            started = time.perf_counter()
+            generation = (await self._call(pipe.execute()))[0]
+            elapsed = time.perf_counter() - started
+            self.l1.set(key, generation, len(key))
+            self.metrics.record('generation', key, 'bump')
+            for deleted_key in keys:
+                self.metrics.observe_latency('delete', deleted_key, elapsed)
+                self.metrics.record('delete', deleted_key, 'ok')
+        except Exception as e:
+            self.metrics.record('generation', key, 'error')
+            self._defer_invalidation(self._pending_generations, meeting_id)
+            for deleted_key in keys:
+                self.metrics.record('delete', deleted_key, 'error')
+                self._defer_invalidation(self._pending_deletes, deleted_key)
+            print(f"Cache invalidate_meeting error: {e}")
+
+    async def meeting_key(self, meeting_id: str, base_key: str) -> str:
+        """会議から派生するキャッシュのキーに現在の世代番号を付ける
+        
+        例: meeting_full:m1 → meeting_full:m1:g3
+        """
+        return f"{base_key}:g{await self.get_generation(meeting_id)}"
+    
+    async def get_meeting_parts(self, meeting_id: str, with_items: bool = True) -> tuple:
+        """会議・セクション一覧・セクションごとの項目一覧をキャッシュから取得
+        
+        セクション数に関わらず最大2往復（会議とセクション一覧、全セクションの項目一覧）で取得する。
+        with_items=False の場合は項目一覧を取得しない（1往復）。
+        返り値: (会議, セクション一覧, {section_id: 項目一覧})。キャッシュにないものは None / 含まれない。
+        """
+        generation = await self.get_generation(meeting_id)
+        meeting_key = f"meeting:{meeting_id}:g{generation}"
+        sections_key = f"sections:{meeting_id}:g{generation}"
+        
+        # 1往復目: 会議データとセクション一覧
+        found = await self.get_many([meeting_key, sections_key])
+        meeting = found.get(meeting_key)
+        sections = found.get(sections_key)
+        
+        # 2往復目: 全セクションの項目一覧
+        items_by_section: Dict[str, Any] = {}
+        if sections and with_items:
+            items_keys = {f"items:{section['id']}:g{generation}": section['id'] for section in sections}
+            found_items = await self.get_many(list(items_keys))
+            for items_key, items in found_items.items():
+                items_by_section[items_keys[items_key]] = items
+        
+        return meeting, sections, items_by_section
     
     async def get_meeting_with_related(self, meeting_id: str) -> Dict[str, Any]:
         """会議データと関連するセクション、項目を取得（キャッシュ優先）"""
-        meeting_key = f"meeting:{meeting_id}"
-        
-        # 会議データをキャッシュから取得
-        meeting = await self.get(meeting_key)
+        meeting, sections, items_by_section = await self.get_meeting_parts(meeting_id)
         
         # キャッシュになければ、ここでFirestoreから取得する処理を実装
         # （この例では省略）
         
-        # セクションデータを取得
-        sections_key = f"sections:{meeting_id}"
-        sections = await self.get(sections_key)
-        
-        # セクションごとに項目を取得
+        # セクションごとに項目を追加
+        # キャッシュ上の値はL1と共有されているため、書き換えずにコピーを組み立てる
         if sections:
-            for section in sections:
-                section_id = section['id']
-                items_key = f"items:{section_id}"
-                items = await self.get(items_key)
-                if items:
-                    section['items'] = items
+            sections = [
+                {**section, 'items': items_by_section[section['id']]}
+                if items_by_section.get(section['id']) else section
+                for section in sections
+            ]
         
         # 会議データにセクションを追加
         if meeting and sections:
-            meeting['sections'] = sections
+            meeting = {**meeting, 'sections': sections}
             
         return meeting
     
     async def update_meeting(self, meeting_id: str, data: Dict[str, Any]) -> None:
         """会議データを更新し、関連キャッシュを無効化"""
-        meeting_key = f"meeting:{meeting_id}"
-        
-        # 会議データを更新（Firestoreへの更新は別途実装）
-        await self.set(meeting_key, data, entity_type='meeting')
-        
-        # 関連するキャッシュを無効化
-        await self.invalidate_with_dependencies(meeting_key)
+        # 世代を進めて派生キャッシュを無効化し、新しい世代に会議データを保存
+        # （Firestoreへの更新は別途実装）
+        await self.bump_generation(meeting_id)
+        await self.set(await self.meeting_key(meeting_id, f"meeting:{meeting_id}"), data, entity_type='meeting')
     
     async def update_section(self, meeting_id: str, section_id: str, data: Dict[str, Any]) -> None:
         """セクションデータを更新し、関連キャッシュを無効化"""
-        section_key = f"section:{section_id}"
-        
         # セクションデータを更新
-        await self.set(section_key, data, entity_type='section')
-        
-        # セクションリストのキャッシュを無効化
-        await self.delete(f"sections:{meeting_id}")
+        await self.set(f"section:{section_id}", data, entity_type='section')
         
-        # 会議データの依存関係を更新
-        meeting_key = f"meeting:{meeting_id}"
-        await self.add_dependency(meeting_key, section_key)
+        # セクション一覧・会議データ全体などのキャッシュを無効化
+        await self.bump_generation(meeting_id)
     
     async def update_item(self, section_id: str, item_id: str, data: Dict[str, Any], meeting_id: str) -> None:
         """項目データを更新し、関連キャッシュを無効化"""
-        item_key = f"item:{item_id}"
-        
         # 項目データを更新
-        await self.set(item_key, data, entity_type='item')
+        await self.set(f"item:{item_id}", data, entity_type='item')
         
-        # 項目リストのキャッシュを無効化
-        await self.delete(f"items:{section_id}")
-        
-        # セクションの依存関係を更新
-        section_key = f"section:{section_id}"
-        await self.add_dependency(section_key, item_key)
-        
-        # 会議データの依存関係も更新
-        meeting_key = f"meeting:{meeting_id}"
-        await self.add_dependency(meeting_key, section_key)
+        # 項目一覧・会議データ全体などのキャッシュを無効化
+        await self.bump_generation(meeting_id)
     
     # キャッシュデコレータ
     def cached(self, entity_type: str, key_prefix: str, key_func=None):
@@ -193,19 +1462,10 @@ class CacheManager:
                 else:
                     cache_key = f"{key_prefix}:{args[0]}" if args else key_prefix
                 
-                # キャッシュを確認
-                cached_data = await self.get(cache_key)
-                if cached_data:
-                    return cached_data
-                
-                # 関数を実行
-                result = await func(*args, **kwargs)
-                
-                # 結果をキャッシュ
-                if result:
-                    await self.set(cache_key, result, entity_type=entity_type)
-                
-                return result
+                # キャッシュを確認し、なければ関数を実行して結果をキャッシュ
+                # 同じキーへの同時呼び出しは1回の実行に集約される
+                return await self.get_or_compute(
+                    cache_key, lambda: func(*args, **kwargs), entity_type=entity_type)
             return wrapper
         return decorator
 
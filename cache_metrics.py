@@ -0,0 +1,179 @@
+import bisect
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# 集計対象のキープレフィックス（それ以外は "other" にまとめる）
+KNOWN_PREFIXES = (
+    'meeting',
+    'meeting_full',
+    'sections',
+    'section',
+    'items',
+    'item',
+    'section_assist',
+    'section_statuses',
+    'deps',
+    'lock',
+    'gen',
+    'prefetch',
+)
+
+# レイテンシのバケット上限（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# 無効化の波及件数のバケット上限（キー数）
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def key_prefix(key: str) -> str:
+    """キャッシュキーから集計用のプレフィックスを取り出す"""
+    prefix = key.split(':', 1)[0]
+    return prefix if prefix in KNOWN_PREFIXES else 'other'
+
+
+class Histogram:
+    """固定バケットのヒストグラム"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # 最後の要素は +Inf バケット
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """バケットの上限値から分位点を概算する"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for upper, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return upper
+        return float('inf')
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+    def render(self, name: str, labels: str = '') -> List[str]:
+        """Prometheus のテキスト形式の行（labels は 'op="get"' のようなラベル。空の場合はラベルなし）"""
+        prefix = f"{labels}," if labels else ""
+        suffix = f"{{{labels}}}" if labels else ""
+        lines = []
+        cumulative = 0
+        for upper, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{upper}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{suffix} {self.total}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class CacheMetrics:
+    """キャッシュ操作の計測値をキープレフィックスごとに集計するクラス
+
+    値はワーカープロセスごとに集計される。
+    """
+
+    def __init__(self):
+        # (操作, プレフィックス, 結果) -> 件数
+        self.requests: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        # (操作, プレフィックス) -> レイテンシ（Redis往復・再計算）
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        # (操作, プレフィックス) -> シリアライズ後のバイト数
+        self.bytes: Dict[Tuple[str, str], int] = defaultdict(int)
+        # プレフィックス -> 無効化で削除されたキー数
+        self.fanout: Dict[str, Histogram] = {}
+
+    def record(self, op: str, key: str, result: str) -> None:
+        """操作の結果（hit_l1 / hit_l2 / negative / miss / stale / ok / error など）を記録
+
+        stale はソフト期限を過ぎた値が見つかったことを表す（ヒット率ではミスとして扱う）。
+        negative は墓標（存在しないことが確認済み）が見つかったことを表す（ヒット率ではヒットとして扱う）。
+        """
+        self.requests[(op, key_prefix(key), result)] += 1
+
+    def observe_latency(self, op: str, key: str, seconds: float) -> None:
+        """操作のレイテンシを記録"""
+        label = (op, key_prefix(key))
+        histogram = self.latency.get(label)
+        if histogram is None:
+            histogram = self.latency[label] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def observe_bytes(self, op: str, key: str, size: int) -> None:
+        """読み書きしたシリアライズ後のバイト数を記録"""
+        self.bytes[(op, key_prefix(key))] += size
+
+    def observe_fanout(self, key: str, count: int) -> None:
+        """無効化で削除されたキー数を記録"""
+        prefix = key_prefix(key)
+        histogram = self.fanout.get(prefix)
+        if histogram is None:
+            histogram = self.fanout[prefix] = Histogram(FANOUT_BUCKETS)
+        histogram.observe(count)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """プレフィックスごとの集計値を取得"""
+        prefixes: Dict[str, Dict[str, Any]] = {}
+
+        def entry(prefix: str) -> Dict[str, Any]:
+            return prefixes.setdefault(prefix, {"requests": {}, "latency": {}, "bytes": {}})
+
+        for (op, prefix, result), count in self.requests.items():
+            entry(prefix)["requests"].setdefault(op, {})[result] = count
+        for (op, prefix), histogram in self.latency.items():
+            entry(prefix)["latency"][op] = histogram.snapshot()
+        for (op, prefix), size in self.bytes.items():
+            entry(prefix)["bytes"][op] = size
+        for prefix, histogram in self.fanout.items():
+            entry(prefix)["invalidation_fanout"] = histogram.snapshot()
+
+        # ヒット率（L1・L2・墓標の合計）
+        for prefix, values in prefixes.items():
+            get_results = values["requests"].get("get", {})
+            hits = get_results.get("hit_l1", 0) + get_results.get("hit_l2", 0) + get_results.get("negative", 0)
+            lookups = hits + get_results.get("miss", 0) + get_results.get("stale", 0)
+            values["hit_ratio"] = hits / lookups if lookups else None
+        return prefixes
+
+    def render_prometheus(self, namespace: str = 'cache') -> str:
+        """Prometheusのテキスト形式で出力"""
+        lines: List[str] = []
+
+        lines.append(f"# HELP {namespace}_requests_total Cache operations by key prefix and result")
+        lines.append(f"# TYPE {namespace}_requests_total counter")
+        for (op, prefix, result), count in sorted(self.requests.items()):
+            lines.append(f'{namespace}_requests_total{{op="{op}",prefix="{prefix}",result="{result}"}} {count}')
+
+        lines.append(f"# HELP {namespace}_bytes_total Serialized bytes read and written by key prefix")
+        lines.append(f"# TYPE {namespace}_bytes_total counter")
+        for (op, prefix), size in sorted(self.bytes.items()):
+            lines.append(f'{namespace}_bytes_total{{op="{op}",prefix="{prefix}"}} {size}')
+
+        lines.append(f"# HELP {namespace}_latency_seconds Cache operation latency by key prefix (Redis round trips and recomputation)")
+        lines.append(f"# TYPE {namespace}_latency_seconds histogram")
+        for (op, prefix), histogram in sorted(self.latency.items()):
+            labels = f'op="{op}",prefix="{prefix}"'
+            lines.extend(histogram.render(f"{namespace}_latency_seconds", labels))
+
+        lines.append(f"# HELP {namespace}_invalidation_fanout_keys Keys removed per invalidation")
+        lines.append(f"# TYPE {namespace}_invalidation_fanout_keys histogram")
+        for prefix, histogram in sorted(self.fanout.items()):
+            labels = f'prefix="{prefix}"'
+            lines.extend(histogram.render(f"{namespace}_invalidation_fanout_keys", labels))
+
+        return "\n".join(lines) + "\n"
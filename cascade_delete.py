@@ -0,0 +1,229 @@
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from datastore_ops import OP_DELETE
+
+# ジョブの状態
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+# 削除する親ドキュメント: (コレクション, ドキュメントID)
+Root = Tuple[str, str]
+# 子孫を探すクエリ: (コレクション, フィールド, 値)
+Children = Tuple[str, str, Any]
+
+
+class DeleteJob:
+    """カスケード削除1回分の進捗"""
+
+    def __init__(self, job_id: str, kind: str, target: str):
+        self.id = job_id
+        self.kind = kind
+        self.target = target
+        self.status = RUNNING
+        self.background = False
+        # コレクション -> 削除対象のドキュメントID
+        self.documents: Dict[str, List[str]] = {}
+        self.total = 0
+        self.deleted = 0
+        self.batches_total = 0
+        self.batches_done = 0
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def ids(self, collection: str) -> List[str]:
+        return self.documents.get(collection, [])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "status": self.status,
+            "background": self.background,
+            "counts": {collection: len(ids) for collection, ids in self.documents.items()},
+            "total": self.total,
+            "deleted": self.deleted,
+            "progress": self.deleted / self.total if self.total else 1.0,
+            "batches_total": self.batches_total,
+            "batches_done": self.batches_done,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class CascadeDeleter:
+    """親ドキュメントとその子孫をFirestoreからまとめて削除するクラス
+
+    1. 子孫はコレクションごとに1回のクエリ（IDのみ）で並行に列挙する
+    2. 親ドキュメントを最初のバッチで削除し、invalidate() でキャッシュを1回で無効化する
+       （親が消えた時点で削除中のデータは見えなくなる）
+    3. 子孫は batch_size 件ずつのバッチに分け、parallelism 件まで並行に削除する
+
+    子孫が background_threshold 件を超える場合、3 はバックグラウンドのジョブで行い、
+    終了時にもう一度 invalidate() を呼ぶ（削除中に読み込まれたキャッシュを捨てる）。
+    子孫の削除に失敗した場合はジョブが failed になる。親は削除済みのため、残った子孫は
+    同じ親に対して再度実行すると削除される。
+    ジョブの進捗はワーカーごとに保持する（直近 max_jobs 件）。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.batch_size = max(1, min(int(os.environ.get('CASCADE_DELETE_BATCH_SIZE', 500)), 500))
+        self.parallelism = max(1, int(os.environ.get('CASCADE_DELETE_PARALLELISM', 4)))
+        self.background_threshold = int(os.environ.get('CASCADE_DELETE_BACKGROUND_THRESHOLD', 2000))
+        self.max_jobs = 100
+        self.jobs: "OrderedDict[str, DeleteJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._ids = itertools.count(1)
+
+        self.job_counts: Dict[str, int] = defaultdict(int)
+        self.documents_deleted = 0
+        self.batch_errors = 0
+
+    async def list_documents(self, roots: List[Root], children: List[Children]) -> Dict[str, List[str]]:
+        """削除対象をコレクションごとに列挙する（子孫はコレクションごとに1回のクエリ）"""
+        documents: Dict[str, List[str]] = defaultdict(list)
+        for collection, doc_id in roots:
+            documents[collection].append(doc_id)
+        found = await asyncio.gather(*(
+            self.store.query_ids(collection, field, value) for collection, field, value in children))
+        for (collection, _, _), ids in zip(children, found):
+            seen = set(documents[collection])
+            documents[collection].extend(doc_id for doc_id in ids if doc_id not in seen)
+        return dict(documents)
+
+    async def delete(self, kind: str, target: str, roots: List[Root], children: List[Children],
+                     invalidate: Optional[Callable[[DeleteJob], Awaitable[None]]] = None) -> DeleteJob:
+        """親 roots と、children のクエリに一致する子孫を削除し、ジョブを返す
+
+        返った時点で親は削除済み。job.background が True の場合、子孫の削除は
+        バックグラウンドで続いている（進捗は get_job で確認する）。
+        """
+        job = DeleteJob(f"del-{next(self._ids)}-{int(time.time() * 1000)}", kind, target)
+        self._remember(job)
+        try:
+            job.documents = await self.list_documents(roots, children)
+            root_keys = set(roots)
+            root_ops = [(OP_DELETE, collection, doc_id, None) for collection, doc_id in roots]
+            child_ops = [
+                (OP_DELETE, collection, doc_id, None)
+                for collection, ids in job.documents.items()
+                for doc_id in ids
+                if (collection, doc_id) not in root_keys
+            ]
+            chunks = [child_ops[i:i + self.batch_size] for i in range(0, len(child_ops), self.batch_size)]
+            job.total = len(root_ops) + len(child_ops)
+            job.batches_total = 1 + len(chunks)
+
+            await self._delete_batch(job, root_ops)
+            if invalidate is not None:
+                await invalidate(job)
+        except Exception as e:
+            self._finish(job, e)
+            raise
+
+        if len(child_ops) > self.background_threshold:
+            job.background = True
+            task = asyncio.create_task(self._run(job, chunks, invalidate))
+            self._tasks[job.id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        else:
+            await self._run(job, chunks, None)
+            if job.status == FAILED:
+                raise RuntimeError(job.error)
+        return job
+
+    async def _run(self, job: DeleteJob, chunks: List[List[tuple]],
+                   invalidate: Optional[Callable[[DeleteJob], Awaitable[None]]]) -> None:
+        semaphore = asyncio.Semaphore(self.parallelism)
+
+        async def bounded(chunk: List[tuple]) -> None:
+            async with semaphore:
+                await self._delete_batch(job, chunk)
+
+        results = await asyncio.gather(*(bounded(chunk) for chunk in chunks), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        for error in errors:
+            if isinstance(error, asyncio.CancelledError):
+                raise error
+        self.batch_errors += len(errors)
+        if invalidate is not None:
+            try:
+                await invalidate(job)
+            except Exception as e:
+                print(f"Cascade delete invalidation error for {job.kind} {job.target}: {e}")
+        self._finish(job, errors[0] if errors else None)
+
+    async def _delete_batch(self, job: DeleteJob, ops: List[tuple]) -> None:
+        if ops:
+            await self.store.commit_batch(ops)
+        job.deleted += len(ops)
+        job.batches_done += 1
+        self.documents_deleted += len(ops)
+
+    def _finish(self, job: DeleteJob, error: Optional[BaseException]) -> None:
+        job.finished_at = time.time()
+        if error is None:
+            job.status = COMPLETED
+        else:
+            job.status = FAILED
+            job.error = f"{type(error).__name__}: {error}"
+            print(f"Cascade delete failed for {job.kind} {job.target}: {job.error}")
+        self.job_counts[job.status] += 1
+
+    def _remember(self, job: DeleteJob) -> None:
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.max_jobs:
+            self.jobs.popitem(last=False)
+
+    def get_job(self, job_id: str) -> Optional[DeleteJob]:
+        return self.jobs.get(job_id)
+
+    async def stop(self) -> None:
+        """実行中のバックグラウンドのジョブを止める（アプリ終了時に呼び出す）"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # ----- 統計 -----
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "batch_size": self.batch_size,
+            "parallelism": self.parallelism,
+            "background_threshold": self.background_threshold,
+            "running": sum(1 for job in self.jobs.values() if job.status == RUNNING),
+            "jobs": dict(self.job_counts),
+            "documents_deleted": self.documents_deleted,
+            "batch_errors": self.batch_errors,
+        }
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP cascade_delete_jobs_total Cascade deletes finished by status",
+            "# TYPE cascade_delete_jobs_total counter",
+        ]
+        for job_status in (COMPLETED, FAILED):
+            lines.append(f'cascade_delete_jobs_total{{status="{job_status}"}} {self.job_counts.get(job_status, 0)}')
+        lines.extend([
+            "# HELP cascade_delete_running Cascade deletes in progress",
+            "# TYPE cascade_delete_running gauge",
+            f"cascade_delete_running {self.get_stats()['running']}",
+            "# HELP cascade_delete_documents_total Documents deleted by cascade deletes",
+            "# TYPE cascade_delete_documents_total counter",
+            f"cascade_delete_documents_total {self.documents_deleted}",
+            "# HELP cascade_delete_batch_errors_total Cascade delete batches that failed",
+            "# TYPE cascade_delete_batch_errors_total counter",
+            f"cascade_delete_batch_errors_total {self.batch_errors}",
+        ])
+        return "\n".join(lines) + "\n"
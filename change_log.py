@@ -0,0 +1,226 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# 変更の対象: (種類, 操作, ID, データ)
+# 種類は meeting / section / item / task / recording_status、操作は datastore_ops の OP_SET / OP_UPDATE / OP_DELETE
+Change = Tuple[str, str, str, Optional[Dict[str, Any]]]
+
+# 変更を追記し、古い記録を切り詰めるLuaスクリプト
+# バージョンのカウンターがない場合（初回・期限切れ）は現在時刻（ミリ秒）×1000 から始め、
+# カウンターが消えても以前のバージョンより大きい値になるようにする。
+# ログに欠けがある（欠けの印がある・ARGV[4] が "1"）場合はログを捨て、カウンターを2以上進める。
+# 欠けた変更の分だけバージョンが飛ぶため、欠ける前の since はどれも差分では返せなくなる。
+# 記録のメンバーは "バージョン 変更(JSON)"、スコアはバージョン。
+# KEYS: {変更ログ（ソート済みセット）, バージョンのカウンター, 欠けの印}
+# ARGV: {保持する最大件数, 有効期限（秒）, 初期バージョン, ログを捨てるか（"1"）, 変更(JSON)...}
+APPEND_LUA = """
+if ARGV[4] == '1' or redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('DEL', KEYS[1], KEYS[3])
+    local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+    if tonumber(ARGV[3]) > current + 2 then
+        redis.call('SET', KEYS[2], ARGV[3])
+    else
+        redis.call('INCRBY', KEYS[2], 2)
+    end
+end
+redis.call('SET', KEYS[2], ARGV[3], 'NX')
+local version = 0
+for i = 5, #ARGV do
+    version = redis.call('INCR', KEYS[2])
+    redis.call('ZADD', KEYS[1], version, string.format('%d', version) .. ' ' .. ARGV[i])
+end
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[1]) + 1))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return version
+"""
+
+
+class ChangeSet(NamedTuple):
+    """since 以降の変更（complete=False の場合は変更ログから復元できず、スナップショットが必要）"""
+    version: Optional[int]
+    changes: List[Dict[str, Any]]
+    complete: bool
+
+
+def _initial_version() -> str:
+    return str(int(time.time() * 1000) * 1000)
+
+
+class ChangeLog:
+    """会議ごとの変更ログ（差分同期用）
+
+    - 書き込みを行うエンドポイントは、変更したエンティティを (種類, 操作, ID, データ) として追記する。
+      追記ごとに会議のバージョンが1つ進む（単調増加）。
+    - 変更ログは会議ごとに max_entries 件まで保持し、それより古い記録は切り詰める（圧縮）。
+      since が切り詰めた範囲にかかる場合は変更を返せないため、呼び出し側がスナップショットを返す。
+    - 追記できなかった会議にはRedisに欠けの印（changes:{会議ID}:gap）を付け、どのプロセスからの
+      読み込みもスナップショットを返す。次の追記でログを捨て、バージョンを飛ばして作り直す
+      （欠けた変更を差分として返さないようにする）。
+    - Redisに接続できず印を付けられなかった会議だけはプロセス内に覚えておき、次にRedisを使うときに付ける。
+    """
+
+    def __init__(self, cache_manager):
+        self.cache = cache_manager
+        self.prefix = 'changes:'
+        self.max_entries = int(os.environ.get('CHANGE_LOG_MAX_ENTRIES', 1000))
+        self.ttl = int(os.environ.get('CHANGE_LOG_TTL', 24 * 3600))
+        self._append_script = None
+        # 追記できなかったが、Redisに欠けの印をまだ付けられていない会議
+        self._unmarked_gaps: Set[str] = set()
+
+        self.changes_appended = 0
+        self.append_errors = 0
+        self.read_errors = 0
+        self.discard_errors = 0
+        self.delta_responses = 0
+        self.snapshot_responses = 0
+
+    # ----- キー -----
+    def _log_key(self, meeting_id: str) -> str:
+        return f"{self.prefix}{meeting_id}"
+
+    def _version_key(self, meeting_id: str) -> str:
+        return f"{self.prefix}{meeting_id}:version"
+
+    def _gap_key(self, meeting_id: str) -> str:
+        return f"{self.prefix}{meeting_id}:gap"
+
+    async def _mark_gap(self, meeting_id: str) -> None:
+        """ログに欠けがあることをRedisに記録する（付けられなければ次にRedisを使うときに付ける）"""
+        self._unmarked_gaps.add(meeting_id)
+        if not self.cache.allow_redis():
+            return
+        try:
+            await self.cache._call(self.cache.redis.set(self._gap_key(meeting_id), 1, ex=self.ttl))
+        except Exception:
+            return
+        self._unmarked_gaps.discard(meeting_id)
+
+    # ----- 追記 -----
+    async def append(self, meeting_id: str, *changes: Change) -> Optional[int]:
+        """変更を追記し、追記後のバージョンを返す（追記できなかった場合は None）"""
+        if not changes:
+            return None
+        if not self.cache.allow_redis():
+            self._unmarked_gaps.add(meeting_id)
+            self.append_errors += 1
+            return None
+        now = time.time()
+        entries = [
+            json.dumps({"type": kind, "op": op, "id": entity_id, "data": data, "at": now},
+                       ensure_ascii=False, separators=(',', ':'), default=str)
+            for kind, op, entity_id, data in changes
+        ]
+        reset = meeting_id in self._unmarked_gaps
+        try:
+            if self._append_script is None:
+                self._append_script = self.cache.redis.register_script(APPEND_LUA)
+            version = await self.cache._call(self._append_script(
+                keys=[self._log_key(meeting_id), self._version_key(meeting_id), self._gap_key(meeting_id)],
+                args=[self.max_entries, self.ttl, _initial_version(), '1' if reset else '0', *entries],
+            ))
+        except Exception:
+            self.append_errors += 1
+            await self._mark_gap(meeting_id)
+            return None
+        self._unmarked_gaps.discard(meeting_id)
+        self.changes_appended += len(entries)
+        return int(version)
+
+    # ----- 読み込み -----
+    async def since(self, meeting_id: str, since: Optional[int]) -> ChangeSet:
+        """since より後の変更を取得する
+
+        since が None・現在のバージョンより新しい（ログが作り直された）・切り詰めた範囲にかかる場合と、
+        ログに欠けの印がある場合は complete=False を返す。version は現在のバージョン（スナップショットはこの時点以降の状態）。
+        """
+        if not self.cache.allow_redis():
+            return ChangeSet(None, [], False)
+        log_key = self._log_key(meeting_id)
+        version_key = self._version_key(meeting_id)
+        gap_key = self._gap_key(meeting_id)
+        unmarked = meeting_id in self._unmarked_gaps
+        try:
+            pipe = self.cache.redis.pipeline(transaction=True)
+            if unmarked:
+                pipe.set(gap_key, 1, ex=self.ttl)
+            # 変更がまだない会議にもスナップショットの基準となるバージョンを作る
+            pipe.set(version_key, _initial_version(), nx=True, ex=self.ttl)
+            pipe.get(version_key)
+            pipe.exists(gap_key)
+            pipe.zrange(log_key, 0, 0, withscores=True)
+            pipe.zrangebyscore(log_key, f"({since if since is not None else '-inf'}", '+inf')
+            results = await self.cache._call(pipe.execute())
+        except Exception:
+            self.read_errors += 1
+            return ChangeSet(None, [], False)
+        if unmarked:
+            self._unmarked_gaps.discard(meeting_id)
+            results = results[1:]
+        _, version, has_gap, oldest, members = results
+
+        version = int(version)
+        if since is None or since > version or has_gap:
+            return ChangeSet(version, [], False)
+        if since == version:
+            return ChangeSet(version, [], True)
+        # since の直後のバージョンから残っていなければ、差分では復元できない
+        if not oldest or int(oldest[0][1]) > since + 1:
+            return ChangeSet(version, [], False)
+
+        changes = []
+        for member in members:
+            member = member.decode('utf-8') if isinstance(member, bytes) else member
+            entry_version, payload = member.split(' ', 1)
+            changes.append({"version": int(entry_version), **json.loads(payload)})
+        # 読み込みの間に追記された変更も含める
+        if changes:
+            version = max(version, changes[-1]["version"])
+        return ChangeSet(version, changes, True)
+
+    async def discard(self, meeting_id: str) -> None:
+        """会議の変更ログを削除する（会議の削除時に呼び出す）"""
+        self._unmarked_gaps.discard(meeting_id)
+        if not self.cache.allow_redis():
+            return
+        try:
+            await self.cache._call(self.cache.redis.delete(
+                self._log_key(meeting_id), self._version_key(meeting_id), self._gap_key(meeting_id)))
+        except Exception:
+            self.discard_errors += 1
+
+    # ----- 統計 -----
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "changes_appended": self.changes_appended,
+            "append_errors": self.append_errors,
+            "read_errors": self.read_errors,
+            "discard_errors": self.discard_errors,
+            "delta_responses": self.delta_responses,
+            "snapshot_responses": self.snapshot_responses,
+            "unmarked_gaps": len(self._unmarked_gaps),
+        }
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP change_log_changes_appended_total Entity changes appended to per-meeting change logs",
+            "# TYPE change_log_changes_appended_total counter",
+            f"change_log_changes_appended_total {self.changes_appended}",
+            "# HELP change_log_append_errors_total Changes that could not be appended (the log is reset)",
+            "# TYPE change_log_append_errors_total counter",
+            f"change_log_append_errors_total {self.append_errors}",
+            "# HELP change_log_errors_total Change log reads and deletes that failed",
+            "# TYPE change_log_errors_total counter",
+            f'change_log_errors_total{{op="read"}} {self.read_errors}',
+            f'change_log_errors_total{{op="discard"}} {self.discard_errors}',
+            "# HELP change_log_responses_total Change requests answered with deltas or a full snapshot",
+            "# TYPE change_log_responses_total counter",
+            f'change_log_responses_total{{kind="delta"}} {self.delta_responses}',
+            f'change_log_responses_total{{kind="snapshot"}} {self.snapshot_responses}',
+        ]
+        return "\n".join(lines) + "\n"
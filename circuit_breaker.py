@@ -0,0 +1,127 @@
+import random
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 状態（メトリクスでは数値で出力する）
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """外部サービスへの呼び出しを遮断するサーキットブレーカー
+
+    - closed: 通常どおり呼び出す。連続して failure_threshold 回失敗すると open に移る
+    - open: 呼び出さずに即座に失敗させる。reset_timeout 経過後に half_open に移る
+    - half_open: 疎通確認（プローブ）の結果で closed か open に移る
+
+    open が続くたびに reset_timeout を max_reset_timeout まで倍にしていく。
+    状態の判定は時刻の比較のみで、I/Oは行わない。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 1.0,
+                 max_reset_timeout: float = 30.0, initial_state: str = CLOSED,
+                 on_transition: Optional[Callable[[str, str], None]] = None):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.on_transition = on_transition
+
+        self.state = initial_state
+        self.consecutive_failures = 0
+        # 連続して open になった回数（バックオフの計算に使う）
+        self.open_streak = 0
+        self.retry_at = 0.0
+        self.changed_at = time.time()
+
+        # (遷移前, 遷移後) -> 回数
+        self.transitions: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.rejected = 0
+        self.failures = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.state == CLOSED
+
+    def allow(self) -> bool:
+        """呼び出してよいか（open・half_open の間は拒否した回数を数える）"""
+        if self.state == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_delay(self) -> float:
+        """次のプローブまでの秒数"""
+        return max(0.0, self.retry_at - time.monotonic())
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """呼び出しの失敗を記録し、しきい値に達したら open にする"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self) -> None:
+        """open に移り、次のプローブ時刻を決める（±20%のゆらぎを加える）"""
+        timeout = min(self.reset_timeout * (2 ** self.open_streak), self.max_reset_timeout)
+        self.open_streak += 1
+        self.retry_at = time.monotonic() + timeout * random.uniform(0.8, 1.2)
+        self._transition(OPEN)
+
+    def begin_probe(self) -> None:
+        self._transition(HALF_OPEN)
+
+    def reset(self) -> None:
+        """疎通が確認できたので closed に戻す"""
+        self.consecutive_failures = 0
+        self.open_streak = 0
+        self._transition(CLOSED)
+
+    def _transition(self, state: str) -> None:
+        previous = self.state
+        if previous == state:
+            return
+        self.state = state
+        self.changed_at = time.time()
+        self.transitions[(previous, state)] += 1
+        if self.on_transition is not None:
+            self.on_transition(previous, state)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "since": self.changed_at,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "next_probe_in": self.retry_delay() if self.state == OPEN else None,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "transitions": {f"{a}->{b}": n for (a, b), n in self.transitions.items()},
+        }
+
+    def render_prometheus(self, namespace: str = 'cache') -> List[str]:
+        """Prometheusのテキスト形式の行を返す"""
+        lines = [
+            f"# HELP {namespace}_circuit_state Circuit breaker state (0=closed, 1=half_open, 2=open)",
+            f"# TYPE {namespace}_circuit_state gauge",
+            f'{namespace}_circuit_state{{circuit="{self.name}"}} {STATE_VALUES[self.state]}',
+            f"# HELP {namespace}_circuit_transitions_total Circuit breaker state transitions",
+            f"# TYPE {namespace}_circuit_transitions_total counter",
+        ]
+        for (previous, state), count in sorted(self.transitions.items()):
+            lines.append(f'{namespace}_circuit_transitions_total{{circuit="{self.name}",from="{previous}",to="{state}"}} {count}')
+        lines.extend([
+            f"# HELP {namespace}_circuit_rejected_total Calls rejected without contacting the backend",
+            f"# TYPE {namespace}_circuit_rejected_total counter",
+            f'{namespace}_circuit_rejected_total{{circuit="{self.name}"}} {self.rejected}',
+            f"# HELP {namespace}_circuit_failures_total Backend calls that failed with a connection error or timeout",
+            f"# TYPE {namespace}_circuit_failures_total counter",
+            f'{namespace}_circuit_failures_total{{circuit="{self.name}"}} {self.failures}',
+        ])
+        return lines
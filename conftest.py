@@ -0,0 +1,58 @@
+import os
+
+import fakeredis
+import pytest
+
+from cache_manager import CacheManager
+from circuit_breaker import CLOSED
+
+# サーバーを起動して実行する手動のテストスクリプト（python test_api.py などで実行する）
+collect_ignore = ['test_api.py', 'test_websocket.py']
+
+# main はインポート時に設定を読むため、テストのモジュールより先に設定する
+# （ローカルのFirestore代替を遅延なしで使い、定期反映はテストから明示的に行う）
+os.environ.setdefault('FIRESTORE_BACKEND', 'local')
+os.environ.setdefault('FIRESTORE_LOCAL_LATENCY_MS', '0')
+os.environ.setdefault('WRITE_BEHIND_FLUSH_INTERVAL', '0')
+
+
+@pytest.fixture
+def cache():
+    """fakeredis に接続した CacheManager（Luaスクリプトは lupa で実行される）"""
+    manager = CacheManager()
+    manager.redis = fakeredis.aioredis.FakeRedis()
+    # connect() を呼ばずに closed にする（起動時のタスクはイベントループの外では作れない）
+    manager.breaker.state = CLOSED
+    return manager
+
+
+@pytest.fixture(scope='session')
+def app():
+    """fakeredis とローカルのFirestore代替（遅延なし・定期反映なし）で起動したアプリのモジュール
+
+    アプリの状態（モックデータ・Firestore代替）はテスト間で共有するため、テストごとに別のIDを使う。
+    """
+    import cache_manager as cache_module
+    cache_module.cache_manager.redis = fakeredis.aioredis.FakeRedis()
+    import main
+    return main
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    from fastapi.testclient import TestClient
+    with TestClient(app.app) as test_client:
+        test_client.headers['Authorization'] = 'Bearer test'
+        yield test_client
+
+
+@pytest.fixture
+def meeting(app, client, request):
+    """テンプレートから作った会議（IDはテストの名前から作る）と、そのセクションの一覧"""
+    meeting_id = request.node.name.replace('[', '_').replace(']', '')
+    template_id = client.get('/templates').json()[0]['id']
+    response = client.post('/meetings', json={
+        "id": meeting_id, "title": "test", "datetime": "2025-01-01T00:00:00", "template_id": template_id})
+    assert response.status_code == 200, response.text
+    sections = client.get(f'/meetings/{meeting_id}/sections').json()
+    return meeting_id, sections
@@ -0,0 +1,6 @@
+# データストアへの書き込み操作
+# 書き込みは (操作, コレクション, ドキュメントID, データ) で表し、バッファ（write_behind）・
+# Firestoreへのコミット（firestore_store）・カスケード削除（cascade_delete）・変更ログ（change_log）で共通に使う
+OP_SET = 'set'
+OP_UPDATE = 'update'
+OP_DELETE = 'delete'
@@ -0,0 +1,170 @@
+import copy
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class LocalFirestoreClient:
+    """Firestoreの同期クライアントのローカル代替（開発・負荷確認用）
+
+    main.py が使う範囲（collection().document() の get/set/update/delete、
+    where(field, "==", value).stream()、batch()、transaction()）だけを実装し、
+    データはプロセス内の辞書に保持する。
+
+    RPCにあたる呼び出しごとに latency 秒（+ 0〜jitter 秒）スレッドを止めて、
+    ネットワーク越しのSDKと同じようにブロックする。timeout を指定した呼び出しで
+    遅延が期限を超える場合は、期限まで待って TimeoutError を送出する。
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # コレクション -> ドキュメントID -> データ
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.rpc_count = 0
+
+    def _rpc(self, timeout: Optional[float] = None) -> None:
+        """1往復分の遅延を入れる"""
+        with self._lock:
+            self.rpc_count += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Local Firestore call exceeded timeout ({timeout}s)")
+        if delay > 0:
+            time.sleep(delay)
+
+    def collection(self, name: str) -> "LocalCollection":
+        return LocalCollection(self, name)
+
+    def batch(self) -> "LocalWriteBatch":
+        return LocalWriteBatch(self)
+
+    def transaction(self) -> "LocalWriteBatch":
+        # 書き込みをまとめてコミットする点はバッチと同じ（読み込みの競合検出は行わない）
+        return LocalWriteBatch(self)
+
+    def transactional(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """トランザクション関数を実行し、成功したらコミットする（SDKの transactional の代わり）"""
+        def run(transaction: "LocalWriteBatch", *args: Any, **kwargs: Any) -> Any:
+            result = func(transaction, *args, **kwargs)
+            transaction.commit()
+            return result
+        return run
+
+    # ----- 辞書の操作（ロックを取って呼ぶ） -----
+    def _write(self, op: str, collection: str, doc_id: str, data: Optional[Dict[str, Any]], merge: bool) -> None:
+        docs = self._collections.setdefault(collection, {})
+        if op == 'delete':
+            docs.pop(doc_id, None)
+        elif op == 'update':
+            if doc_id not in docs:
+                raise KeyError(f"No document to update: {collection}/{doc_id}")
+            docs[doc_id].update(copy.deepcopy(data))
+        elif merge and doc_id in docs:
+            docs[doc_id].update(copy.deepcopy(data))
+        else:
+            docs[doc_id] = copy.deepcopy(data)
+
+    def _apply(self, writes: List[Tuple[str, str, str, Optional[Dict[str, Any]], bool]]) -> None:
+        with self._lock:
+            for write in writes:
+                self._write(*write)
+
+
+class LocalSnapshot:
+    def __init__(self, reference: "LocalDocument", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+
+class LocalDocument:
+    def __init__(self, client: LocalFirestoreClient, collection: str, doc_id: str):
+        self._client = client
+        self.collection = collection
+        self.id = doc_id
+
+    def get(self, timeout: Optional[float] = None, **kwargs: Any) -> LocalSnapshot:
+        self._client._rpc(timeout)
+        with self._client._lock:
+            data = self._client._collections.get(self.collection, {}).get(self.id)
+            return LocalSnapshot(self, copy.deepcopy(data))
+
+    def set(self, data: Dict[str, Any], merge: bool = False, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        self._client._rpc(timeout)
+        self._client._apply([('set', self.collection, self.id, data, merge)])
+
+    def update(self, data: Dict[str, Any], timeout: Optional[float] = None, **kwargs: Any) -> None:
+        self._client._rpc(timeout)
+        self._client._apply([('update', self.collection, self.id, data, False)])
+
+    def delete(self, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        self._client._rpc(timeout)
+        self._client._apply([('delete', self.collection, self.id, None, False)])
+
+
+class LocalCollection:
+    def __init__(self, client: LocalFirestoreClient, name: str):
+        self._client = client
+        self.name = name
+
+    def document(self, doc_id: str) -> LocalDocument:
+        return LocalDocument(self._client, self.name, doc_id)
+
+    def where(self, field: str, op: str, value: Any) -> "LocalQuery":
+        if op != "==":
+            raise ValueError(f"Unsupported operator in local Firestore: {op}")
+        return LocalQuery(self._client, self.name, field, value)
+
+    def stream(self, timeout: Optional[float] = None, **kwargs: Any) -> Iterator[LocalSnapshot]:
+        return LocalQuery(self._client, self.name, None, None).stream(timeout)
+
+
+class LocalQuery:
+    def __init__(self, client: LocalFirestoreClient, collection: str, field: Optional[str], value: Any):
+        self._client = client
+        self.collection = collection
+        self.field = field
+        self.value = value
+
+    def select(self, field_paths: List[str]) -> "LocalQuery":
+        # 返すフィールドは絞らない（転送量の違いは再現しない）
+        return self
+
+    def stream(self, timeout: Optional[float] = None, **kwargs: Any) -> Iterator[LocalSnapshot]:
+        self._client._rpc(timeout)
+        with self._client._lock:
+            docs = list(self._client._collections.get(self.collection, {}).items())
+        for doc_id, data in docs:
+            if self.field is None or data.get(self.field) == self.value:
+                yield LocalSnapshot(LocalDocument(self._client, self.collection, doc_id), copy.deepcopy(data))
+
+
+class LocalWriteBatch:
+    """書き込みを溜めて、commit() で1往復としてまとめて反映する"""
+
+    def __init__(self, client: LocalFirestoreClient):
+        self._client = client
+        self._writes: List[Tuple[str, str, str, Optional[Dict[str, Any]], bool]] = []
+
+    def set(self, reference: LocalDocument, data: Dict[str, Any], merge: bool = False) -> None:
+        self._writes.append(('set', reference.collection, reference.id, data, merge))
+
+    def update(self, reference: LocalDocument, data: Dict[str, Any]) -> None:
+        self._writes.append(('update', reference.collection, reference.id, data, False))
+
+    def delete(self, reference: LocalDocument) -> None:
+        self._writes.append(('delete', reference.collection, reference.id, None, False))
+
+    def commit(self, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        self._client._rpc(timeout)
+        writes, self._writes = self._writes, []
+        self._client._apply(writes)
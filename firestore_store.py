@@ -0,0 +1,223 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache_metrics import Histogram
+from datastore_ops import OP_DELETE, OP_SET
+
+try:
+    from google.cloud.firestore_v1 import transactional as firestore_transactional
+except ImportError:
+    firestore_transactional = None
+
+# Firestoreのバッチ書き込みの上限
+MAX_BATCH_WRITES = 500
+
+# Firestore呼び出しのレイテンシ（秒）のバケット上限
+FIRESTORE_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class FirestoreStore:
+    """同期のFirestoreクライアントをイベントループを止めずに呼び出すクラス
+
+    SDKの呼び出し（ドキュメントの読み書き、クエリの stream の読み切り、バッチのコミット、
+    トランザクション）はすべて専用のスレッドプールで実行する。
+    - 同時に実行する呼び出しは max_concurrency 件までで、それ以上は空きを待つ
+    - 呼び出しごとに期限（deadline 秒、空きを待つ時間を含む）を設け、超えると
+      asyncio.TimeoutError を送出する。SDKにも同じ期限を timeout として渡す
+    - 期限を過ぎてもスレッドで実行中の呼び出しは止められないため、終わるまで枠を返さない
+
+    client が None の場合は無効（enabled が False）。
+    """
+
+    def __init__(self, client: Any = None, max_concurrency: Optional[int] = None,
+                 deadline: Optional[float] = None, batch_deadline: Optional[float] = None,
+                 transactional: Optional[Callable] = None):
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency or int(os.environ.get('FIRESTORE_MAX_CONCURRENCY', 16)))
+        # 1回の読み書き・クエリの期限（秒）
+        self.deadline = deadline or float(os.environ.get('FIRESTORE_DEADLINE', 5.0))
+        # バッチのコミット・トランザクションの期限（秒）
+        self.batch_deadline = batch_deadline or float(os.environ.get('FIRESTORE_BATCH_DEADLINE', 30.0))
+        # トランザクション関数を包むデコレーター（ローカルの代替クライアントは自前のものを持つ）
+        self.transactional = transactional or getattr(client, 'transactional', None) or firestore_transactional
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='firestore')
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+        # (操作, 結果) -> 件数
+        self.calls: Dict[Tuple[str, str], int] = defaultdict(int)
+        # 操作 -> レイテンシ（空きを待つ時間を含む）
+        self.latency: Dict[str, Histogram] = defaultdict(lambda: Histogram(FIRESTORE_LATENCY_BUCKETS))
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    async def call(self, op: str, func: Callable[..., Any], *args: Any, deadline: Optional[float] = None) -> Any:
+        """同期関数をスレッドプールで実行し、結果を返す（op は集計用の操作名）"""
+        deadline = self.deadline if deadline is None else deadline
+        started = time.perf_counter()
+        result = 'error'
+        try:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), deadline)
+            finally:
+                self.waiting -= 1
+
+            loop = asyncio.get_running_loop()
+            self.in_flight += 1
+            try:
+                future = self._executor.submit(func, *args)
+            except BaseException:
+                # 実行を始められなかった（終了処理中など）場合は枠をすぐに返す
+                self._release()
+                raise
+            future.add_done_callback(lambda _: self._release_threadsafe(loop))
+            value = await asyncio.wait_for(
+                asyncio.wrap_future(future), max(0.0, deadline - (time.perf_counter() - started)))
+            result = 'ok'
+            return value
+        except asyncio.TimeoutError:
+            result = 'timeout'
+            print(f"Firestore {op} exceeded deadline ({deadline}s)")
+            raise
+        finally:
+            self.calls[(op, result)] += 1
+            self.latency[op].observe(time.perf_counter() - started)
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # イベントループが既に閉じている（終了処理中）
+            pass
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    def _ref(self, collection: str, doc_id: str) -> Any:
+        return self.client.collection(collection).document(doc_id)
+
+    # ----- ドキュメント -----
+    async def get(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """ドキュメントを取得（なければ None）"""
+        def get_sync():
+            doc = self._ref(collection, doc_id).get(timeout=self.deadline)
+            return doc.to_dict() if doc.exists else None
+        return await self.call('get', get_sync)
+
+    async def set(self, collection: str, doc_id: str, data: Dict[str, Any], merge: bool = False) -> None:
+        await self.call('set', lambda: self._ref(collection, doc_id).set(data, merge=merge, timeout=self.deadline))
+
+    async def update(self, collection: str, doc_id: str, data: Dict[str, Any]) -> None:
+        await self.call('update', lambda: self._ref(collection, doc_id).update(data, timeout=self.deadline))
+
+    async def delete(self, collection: str, doc_id: str) -> None:
+        await self.call('delete', lambda: self._ref(collection, doc_id).delete(timeout=self.deadline))
+
+    async def query(self, collection: str, field: str, value: Any) -> List[Dict[str, Any]]:
+        """field == value のドキュメントを取得（stream の読み切りまでスレッドで行う）"""
+        def query_sync():
+            docs = self.client.collection(collection).where(field, "==", value).stream(timeout=self.deadline)
+            return [doc.to_dict() for doc in docs]
+        return await self.call('query', query_sync)
+
+    async def query_ids(self, collection: str, field: str, value: Any) -> List[str]:
+        """field == value のドキュメントのIDのみを取得（フィールドは読み込まない）"""
+        def query_ids_sync():
+            query = self.client.collection(collection).where(field, "==", value).select([])
+            return [doc.id for doc in query.stream(timeout=self.deadline)]
+        return await self.call('query', query_ids_sync)
+
+    # ----- バッチ・トランザクション -----
+    async def commit_batch(self, ops: List[Tuple[str, str, str, Optional[Dict[str, Any]]]],
+                           concurrent: bool = False) -> None:
+        """書き込み（操作, コレクション, ドキュメントID, データ）をバッチでコミットする
+
+        バッチの上限（500件）を超える場合は分けてコミットする（分けたバッチの間は原子的でない）。
+        concurrent=True の場合は分けたバッチを並行にコミットする（同じドキュメントへの書き込みが
+        複数のバッチにまたがらない場合のみ指定すること。1つでも失敗すると例外を送出する）。
+        更新（update）はドキュメントが既に削除されていてもバッチ全体が失敗しないようマージで書き込む。
+        """
+        chunks = [ops[start:start + MAX_BATCH_WRITES] for start in range(0, len(ops), MAX_BATCH_WRITES)]
+        if concurrent:
+            await asyncio.gather(*(
+                self.call('commit', self._commit_sync, chunk, deadline=self.batch_deadline) for chunk in chunks))
+            return
+        for chunk in chunks:
+            await self.call('commit', self._commit_sync, chunk, deadline=self.batch_deadline)
+
+    def _commit_sync(self, ops: List[Tuple[str, str, str, Optional[Dict[str, Any]]]]) -> None:
+        batch = self.client.batch()
+        for op, collection, doc_id, data in ops:
+            ref = self._ref(collection, doc_id)
+            if op == OP_DELETE:
+                batch.delete(ref)
+            elif op == OP_SET:
+                batch.set(ref, data)
+            else:
+                batch.set(ref, data, merge=True)
+        batch.commit(timeout=self.batch_deadline)
+
+    async def run_transaction(self, func: Callable[..., Any], *args: Any) -> Any:
+        """func(transaction, *args) をトランザクションとしてスレッドで実行する
+
+        func は同期関数で、client を直接使ってよい（スレッド上で実行されるため）。
+        競合時の再試行はSDKの transactional に任せる。
+        """
+        if self.transactional is None:
+            raise RuntimeError("Firestore transactions require google-cloud-firestore")
+
+        def transaction_sync():
+            return self.transactional(func)(self.client.transaction(), *args)
+        return await self.call('transaction', transaction_sync, deadline=self.batch_deadline)
+
+    def close(self) -> None:
+        """スレッドプールを止める（待っている呼び出しは取り消す）"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ----- 統計 -----
+    def get_stats(self) -> Dict[str, Any]:
+        calls: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for (op, result), count in self.calls.items():
+            calls[op][result] = count
+        return {
+            "enabled": self.enabled,
+            "client": type(self.client).__name__ if self.client is not None else None,
+            "max_concurrency": self.max_concurrency,
+            "deadline": self.deadline,
+            "batch_deadline": self.batch_deadline,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": dict(calls),
+            "latency": {op: histogram.snapshot() for op, histogram in self.latency.items()},
+        }
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP firestore_calls_total Firestore calls by operation and result",
+            "# TYPE firestore_calls_total counter",
+        ]
+        for (op, result), count in sorted(self.calls.items()):
+            lines.append(f'firestore_calls_total{{op="{op}",result="{result}"}} {count}')
+        lines.extend([
+            "# HELP firestore_in_flight Firestore calls running on the executor",
+            "# TYPE firestore_in_flight gauge",
+            f"firestore_in_flight {self.in_flight}",
+            "# HELP firestore_waiting Firestore calls waiting for a free slot",
+            "# TYPE firestore_waiting gauge",
+            f"firestore_waiting {self.waiting}",
+            "# HELP firestore_call_duration_seconds Firestore call latency including time waiting for a slot",
+            "# TYPE firestore_call_duration_seconds histogram",
+        ])
+        for op, histogram in sorted(self.latency.items()):
+            lines.extend(histogram.render("firestore_call_duration_seconds", f'op="{op}"'))
+        return "\n".join(lines) + "\n"
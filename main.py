@@ -1,12 +1,23 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends, status, Body
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends, status, Body, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from pydantic import BaseModel
 import asyncio
-# import firebase_admin
-# from firebase_admin import credentials, firestore
-from typing import List, Dict, Any, Optional, Set
+import os
+from typing import List, Dict, Any, Optional, Set, Collection
 # from google.cloud.firestore_v1.transaction import Transaction
-from cache_manager import cache_manager
+from cache_manager import cache_manager, TaggedValue
+from write_behind import WriteBehindBuffer
+from datastore_ops import OP_SET, OP_UPDATE, OP_DELETE
+from prefetch import CachePrefetcher
+from repository import InMemoryRepository
+from firestore_store import FirestoreStore
+from cascade_delete import CascadeDeleter, DeleteJob
+from change_log import ChangeLog
+from ranking import rank_of, rank_from_order, insert_index, plan_move
+from projection import Projection, ProjectionError, FULL
+from pagination import (PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, NEXT_CURSOR_HEADER, CursorError,
+                        encode_cursor, decode_cursor, page_sorted)
 
 app = FastAPI(
     title="リアルタイム議事録モックAPI",
@@ -30,7 +41,24 @@ app = FastAPI(
 )
 # Allow CORS for frontend development
 tmp_cors = ["*"]
-app.add_middleware(CORSMiddleware, allow_origins=tmp_cors, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(CORSMiddleware, allow_origins=tmp_cors, allow_methods=["*"], allow_headers=["*"],
+                   expose_headers=[NEXT_CURSOR_HEADER, "ETag"])
+
+# ----- Lifecycle -----
+@app.on_event("startup")
+async def startup_cache():
+    """イベントループ上でRedis接続プールを初期化し、書き込みの定期反映を開始する"""
+    await cache_manager.connect()
+    write_behind.start()
+
+@app.on_event("shutdown")
+async def shutdown_cache():
+    """事前読み込み・カスケード削除を止め、溜まっている書き込みを反映し、Firestoreのスレッドプール・Redis接続プールを解放する"""
+    await prefetcher.stop()
+    await cascade_deleter.stop()
+    await write_behind.stop()
+    firestore_store.close()
+    await cache_manager.close()
 
 # ----- Schemas -----
 class LoginRequest(BaseModel):
@@ -96,6 +124,7 @@ class Section(BaseModel):
     title: str
     order: int
     status: str = "not_started"  # not_started | in_progress | completed
+    rank: str | None = None  # 並びのキー（省略時は order から作る。ranking.py を参照）
 
 class Item(BaseModel):
     """Content item within a section"""
@@ -103,6 +132,7 @@ class Item(BaseModel):
     section_id: str
     text: str
     order: int
+    rank: str | None = None  # 並びのキー（省略時は order から作る。ranking.py を参照）
 
 class Task(BaseModel):
     """Action item or task from a meeting"""
@@ -114,7 +144,11 @@ class Task(BaseModel):
 
 # ----- In-memory mock data -----
 mock_user = User(id="u1", name="Alice", email="alice@example.com")
-mock_templates = [
+
+# モックデータはIDのハッシュと二次索引（会議→セクション、セクション→項目、会議→タスク）で保持する
+repository = InMemoryRepository()
+repository.load(
+    templates=[
     Template(
         id="t1", 
         name="標準会議テンプレート",
@@ -143,25 +177,47 @@ mock_templates = [
             )
         ]
     )
-]
-mock_meetings = [Meeting(id="m1", title="Mock Meeting", datetime="2025-06-22T16:00:00", template_id="t1", status="in_progress")]
-# mock_sectionsを初期化
-mock_sections = {}
-mock_items = {
-    "s1": [Item(id="i1", section_id="s1", text="ダミー項目1", order=1)],
-    "s2": [Item(id="i2", section_id="s2", text="ダミー項目2", order=1)],
-}
-mock_tasks = {
-    "m1": [Task(id="task1", text="フォローアップメール送信", assignee="Bob", due_date="2025-06-23", status="open")]
-}
-mock_rec_status = {"m1": "stopped"}
+    ],
+    meetings=[Meeting(id="m1", title="Mock Meeting", datetime="2025-06-22T16:00:00", template_id="t1", status="in_progress")],
+    sections={
+        "m1": [
+            Section(id="s1", title="議題", order=1, status="completed"),
+            Section(id="s2", title="決定事項", order=2, status="in_progress"),
+        ]
+    },
+    items=[
+        Item(id="i1", section_id="s1", text="ダミー項目1", order=1),
+        Item(id="i2", section_id="s2", text="ダミー項目2", order=1),
+    ],
+    tasks={
+        "m1": [Task(id="task1", text="フォローアップメール送信", assignee="Bob", due_date="2025-06-23", status="open")]
+    },
+    recording_statuses={"m1": "stopped"},
+)
 
 # ----- Firestore Setup -----
+# FIRESTORE_BACKEND: none（モックデータのみ）/ local（遅延を入れるローカルの代替）/ firestore
 # Note: In production, use proper credentials management
-# Temporarily disabled for testing
-USE_FIRESTORE = False
-print("Firestore disabled for testing - using mock data only")
-db = None
+FIRESTORE_BACKEND = os.environ.get('FIRESTORE_BACKEND', 'none')
+if FIRESTORE_BACKEND == 'firestore':
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    firebase_admin.initialize_app(credentials.ApplicationDefault())
+    db = firestore.client()
+elif FIRESTORE_BACKEND == 'local':
+    from firestore_local import LocalFirestoreClient
+    db = LocalFirestoreClient(
+        latency=float(os.environ.get('FIRESTORE_LOCAL_LATENCY_MS', 50)) / 1000,
+        jitter=float(os.environ.get('FIRESTORE_LOCAL_JITTER_MS', 0)) / 1000,
+    )
+    print(f"Firestore: local stand-in (latency={db.latency * 1000:.0f}ms)")
+else:
+    print("Firestore disabled for testing - using mock data only")
+    db = None
+USE_FIRESTORE = db is not None
+
+# SDKの呼び出しは専用のスレッドプールで実行し、イベントループを止めない
+firestore_store = FirestoreStore(db)
 
 # ----- Firestore Helper Functions -----
 async def get_document(collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
@@ -169,143 +225,255 @@ async def get_document(collection: str, doc_id: str) -> Optional[Dict[str, Any]]
     if not USE_FIRESTORE:
         return None
         
-    doc_ref = db.collection(collection).document(doc_id)
-    doc = doc_ref.get()
-    if doc.exists:
-        return doc.to_dict()
-    return None
+    doc = await firestore_store.get(collection, doc_id)
+    # 進行中の会議で未反映の書き込みがあれば重ねる
+    return await write_behind.overlay_document(collection, doc_id, doc)
 
 async def set_document(collection: str, doc_id: str, data: Dict[str, Any]) -> None:
     """Set a document in Firestore"""
     if not USE_FIRESTORE:
         return
         
-    db.collection(collection).document(doc_id).set(data)
+    await firestore_store.set(collection, doc_id, data)
 
 async def update_document(collection: str, doc_id: str, data: Dict[str, Any]) -> None:
     """Update a document in Firestore"""
     if not USE_FIRESTORE:
         return
         
-    db.collection(collection).document(doc_id).update(data)
+    await firestore_store.update(collection, doc_id, data)
 
 async def delete_document(collection: str, doc_id: str) -> None:
     """Delete a document from Firestore"""
     if not USE_FIRESTORE:
         return
         
-    db.collection(collection).document(doc_id).delete()
+    await firestore_store.delete(collection, doc_id)
 
-async def query_collection(collection: str, field: str, value: Any) -> List[Dict[str, Any]]:
-    """Query documents from Firestore"""
+async def query_collection(collection: str, field: str, value: Any,
+                           meeting_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Query documents from Firestore (meeting_id は field が meeting_id 以外の場合に指定する)"""
     if not USE_FIRESTORE:
         return []
         
-    docs = db.collection(collection).where(field, "==", value).stream()
-    return [doc.to_dict() for doc in docs]
-
-# ----- Transaction Helpers for Data Consistency -----
-async def delete_meeting_with_related_data(meeting_id: str) -> None:
-    """Delete a meeting and all related data (sections, items, tasks) in a transaction"""
+    docs = await firestore_store.query(collection, field, value)
+    # 進行中の会議で未反映の書き込みがあれば重ねる
+    if meeting_id is None and field == 'meeting_id':
+        meeting_id = value
+    if meeting_id is None:
+        return docs
+    return await write_behind.overlay_query(meeting_id, collection, field, value, docs)
+
+# ----- Write-behind -----
+# 進行中の会議への書き込みはRedisに溜めて、定期的に・会議の完了時にまとめて反映する
+# 溜めた書き込み（操作, コレクション, ドキュメントID, データ）は1つのバッチでFirestoreに反映する
+write_behind = WriteBehindBuffer(cache_manager, writer=firestore_store.commit_batch, reader=firestore_store.get)
+
+# ----- Change Log -----
+# 書き込みを行うエンドポイントは変更したエンティティを会議の変更ログに追記する
+# 再接続したクライアントは GET /meetings/{meeting_id}/changes?since=N で差分だけを取得する
+change_log = ChangeLog(cache_manager)
+
+async def persist_document(meeting_id: str, op: str, collection: str, doc_id: str,
+                           data: Optional[Dict[str, Any]] = None) -> None:
+    """会議に属するドキュメントを保存する
+    
+    会議が進行中（in_progress）の間はRedisの書き込みバッファに溜め、それ以外は直接Firestoreに書き込む。
+    """
     if not USE_FIRESTORE:
-        # Fallback to mock data deletion
-        if meeting_id in mock_meetings:
-            mock_meetings.remove(next(m for m in mock_meetings if m.id == meeting_id))
-        if meeting_id in mock_sections:
-            del mock_sections[meeting_id]
-        if meeting_id in mock_tasks:
-            del mock_tasks[meeting_id]
-        if meeting_id in mock_rec_status:
-            del mock_rec_status[meeting_id]
-        # Delete items belonging to sections of this meeting
-        section_ids = [s.id for s in mock_sections.get(meeting_id, [])]
-        for section_id in section_ids:
-            if section_id in mock_items:
-                del mock_items[section_id]
         return
-
-    # Using Firestore transaction for atomic operations
-    transaction = db.transaction()
-    delete_meeting_transaction(transaction, meeting_id)
-    
-def delete_meeting_transaction(transaction: Any, meeting_id: str) -> None:
-    """Transaction function to delete a meeting and all related data"""
-    # Delete the meeting document
-    meeting_ref = db.collection('meetings').document(meeting_id)
-    transaction.delete(meeting_ref)
-    
-    # Delete all sections for this meeting
-    sections = db.collection('sections').where('meeting_id', '==', meeting_id).stream()
-    for section in sections:
-        section_id = section.id
-        transaction.delete(section.reference)
-        
-        # Delete all items for this section
-        items = db.collection('items').where('section_id', '==', section_id).stream()
-        for item in items:
-            transaction.delete(item.reference)
-    
-    # Delete all tasks for this meeting
-    tasks = db.collection('tasks').where('meeting_id', '==', meeting_id).stream()
-    for task in tasks:
-        transaction.delete(task.reference)
-    
-    # Delete recording status
-    rec_status_ref = db.collection('recording_status').document(meeting_id)
-    transaction.delete(rec_status_ref)
-
-async def delete_section_with_items(meeting_id: str, section_id: str) -> None:
-    """Delete a section and all its items in a transaction"""
-    if not USE_FIRESTORE:
-        # Fallback to mock data deletion
-        if meeting_id in mock_sections:
-            mock_sections[meeting_id] = [s for s in mock_sections[meeting_id] if s.id != section_id]
-        if section_id in mock_items:
-            del mock_items[section_id]
+    if await write_behind.write(meeting_id, op, collection, doc_id, data):
         return
+    if op == OP_SET:
+        await set_document(collection, doc_id, data)
+    elif op == OP_UPDATE:
+        await update_document(collection, doc_id, data)
+    else:
+        await delete_document(collection, doc_id)
+    # 溜まっている古い書き込みが、後の反映で直接書き込んだ内容を上書きしないようにする
+    await write_behind.superseded(meeting_id, collection, doc_id)
+
+# ----- Cache Prefetch -----
+async def warm_meeting_cache(meeting_id: str, run) -> None:
+    """会議の最初の画面表示で必要になるキャッシュを埋める（run は同時実行数を制限して並行に実行する）"""
+    meeting_data, sections_data = await run(cached_meeting(meeting_id), cached_sections(meeting_id))
+    if not meeting_data:
+        return
+    section_ids = [section['id'] for section in sections_data or []]
+    await run(
+        cached_section_statuses(meeting_id),
+        *(cached_items(meeting_id, section_id) for section_id in section_ids),
+        *(cached_section_assist(meeting_id, section_id) for section_id in section_ids),
+    )
+    # 会議データ全体は最後に組み立てる（上で読み込んだ会議・セクション・項目のキャッシュを使う）
+    await run(cached_meeting_full(meeting_id))
+
+# 会議の開始時・WebSocketの接続時に、参加者が最初に開く画面のキャッシュを事前に読み込む
+prefetcher = CachePrefetcher(cache_manager, warm=warm_meeting_cache)
+
+# ----- Template Instantiation -----
+# 一括作成（POST /templates/{template_id}/meetings）で一度に作成できる会議数
+BULK_INSTANTIATE_MAX_MEETINGS = int(os.environ.get('BULK_INSTANTIATE_MAX_MEETINGS', 100))
+
+def build_meeting_tree(m: Meeting, template: Template) -> tuple:
+    """テンプレートから会議のセクションと項目を組み立てる（返り値: (セクション一覧, 項目一覧)）"""
+    sections, items = [], []
+    for template_section in template.sections:
+        # Generate unique section ID
+        section_id = f"s_{m.id}_{template_section.order}"
+        sections.append(Section(
+            id=section_id,
+            title=template_section.title,
+            order=template_section.order,
+            status="not_started"  # 初期状態は「未開始」
+        ))
+        for template_item in template_section.items:
+            # Generate unique item ID
+            items.append(Item(
+                id=f"i_{section_id}_{template_item.order}",
+                section_id=section_id,
+                text=template_item.text,
+                order=template_item.order
+            ))
+    return sections, items
 
-    # Using Firestore transaction for atomic operations
-    transaction = db.transaction()
-    delete_section_transaction(transaction, meeting_id, section_id)
-
-def delete_section_transaction(transaction: Any, meeting_id: str, section_id: str) -> None:
-    """Transaction function to delete a section and all its items"""
-    # Delete the section document
-    section_ref = db.collection('sections').document(section_id)
-    transaction.delete(section_ref)
+async def instantiate_meetings(meetings: List[Meeting]) -> List[Meeting]:
+    """会議をテンプレートのセクション・項目とともにまとめて作成する
+    
+    全会議のツリーをメモリ上で組み立ててモックデータに登録し、Firestoreには
+    バッチ書き込み（500件ずつ、並行）でまとめて保存する。会議のドキュメントは
+    セクション・項目などの保存が終わってから書き込むため、作りかけの会議は見えない。
+    """
+    children_ops, meeting_ops = [], []
+    for m in meetings:
+        repository.put_meeting(m)
+        
+        # If template_id is provided, create sections and items from template
+        if m.template_id:
+            template = repository.get_template(m.template_id)
+            if template:
+                sections, items = build_meeting_tree(m, template)
+                for section in sections:
+                    repository.put_section(m.id, section)
+                    children_ops.append((OP_SET, 'sections', section.id, {**section.dict(), "meeting_id": m.id}))
+                for item in items:
+                    repository.put_item(item)
+                    # 検索効率化のため会議IDも保存
+                    children_ops.append((OP_SET, 'items', item.id, {**item.dict(), "meeting_id": m.id}))
+            
+            # Initialize recording status
+            repository.set_recording_status(m.id, "stopped")
+            children_ops.append((OP_SET, 'recording_status', m.id, {"status": "stopped"}))
+        
+        meeting_ops.append((OP_SET, 'meetings', m.id, {
+            "id": m.id,
+            "title": m.title,
+            "datetime": m.datetime,
+            "template_id": m.template_id
+        }))
     
-    # Delete all items for this section
-    items = db.collection('items').where('section_id', '==', section_id).stream()
-    for item in items:
-        transaction.delete(item.reference)
+    # Add to Firestore if enabled
+    if USE_FIRESTORE:
+        await firestore_store.commit_batch(children_ops, concurrent=True)
+        await firestore_store.commit_batch(meeting_ops, concurrent=True)
+    
+    # 作成前に問い合わせられた結果（墓標）がキャッシュに残らないよう無効化
+    # 会議の世代に含まれないセクションの会議アシストの墓標は個別に削除する
+    await asyncio.gather(*(invalidate_meeting_cache(m.id) for m in meetings))
+    await cache_manager.delete_many([
+        f"section_assist:{section.id}" for m in meetings for section in repository.list_sections(m.id)])
+    return meetings
+
+# ----- Cascade Delete -----
+# 子孫はコレクションごとに1回のクエリで列挙し、上限件数ずつのバッチで並行に削除する
+cascade_deleter = CascadeDeleter(firestore_store)
+
+def entity_cache_keys(section_ids: List[str], item_ids: List[str]) -> List[str]:
+    """会議の世代番号を含まないセクション・項目のキャッシュキー"""
+    return ([f"section:{section_id}" for section_id in section_ids]
+            + [f"section_assist:{section_id}" for section_id in section_ids]
+            + [f"item:{item_id}" for item_id in item_ids])
+
+async def delete_meeting_with_related_data(meeting_id: str) -> Optional[DeleteJob]:
+    """会議と関連データ（セクション・項目・タスク・録音状態）を削除し、キャッシュを無効化する
+
+    Firestoreを使う場合は削除のジョブを返す（子孫が多い場合は、返った後もバックグラウンドで削除が続く）。
+    """
+    section_ids = [section.id for section in repository.list_sections(meeting_id)]
+    item_ids = [item.id for section_id in section_ids for item in repository.list_items(section_id)]
+    repository.delete_meeting(meeting_id)
+    # 溜まっている書き込みが削除後に反映されないよう破棄する
+    await write_behind.discard(meeting_id)
+    await change_log.discard(meeting_id)
+
+    async def invalidate(job: Optional[DeleteJob] = None) -> None:
+        sections = set(section_ids) | set(job.ids('sections') if job else [])
+        items = set(item_ids) | set(job.ids('items') if job else [])
+        await cache_manager.invalidate_meeting(meeting_id, entity_cache_keys(sorted(sections), sorted(items)))
 
-async def update_section_order(meeting_id: str, section_id: str, new_order: int) -> None:
-    """Update section order and ensure order consistency"""
     if not USE_FIRESTORE:
-        # Fallback to mock data update
-        if meeting_id in mock_sections:
-            for s in mock_sections[meeting_id]:
-                if s.id == section_id:
-                    s.order = new_order
-                    break
-        return
-
-    # Get all sections for this meeting
-    sections = db.collection('sections').where('meeting_id', '==', meeting_id).stream()
-    sections_data = [(section.id, section.to_dict()) for section in sections]
-    
-    # Using transaction to ensure consistency
-    transaction = db.transaction()
-    update_section_order_transaction(transaction, sections_data, section_id, new_order)
+        await invalidate()
+        return None
+    return await cascade_deleter.delete(
+        'meeting', meeting_id,
+        roots=[('meetings', meeting_id), ('recording_status', meeting_id)],
+        children=[('sections', 'meeting_id', meeting_id), ('items', 'meeting_id', meeting_id),
+                  ('tasks', 'meeting_id', meeting_id)],
+        invalidate=invalidate)
+
+async def delete_section_with_items(meeting_id: str, section_id: str) -> Optional[DeleteJob]:
+    """セクションとその項目を削除し、キャッシュを無効化する（返り値は delete_meeting_with_related_data と同じ）"""
+    item_ids = [item.id for item in repository.list_items(section_id)]
+    if repository.get_section(section_id, meeting_id):
+        repository.delete_section(section_id)
+    # クライアントはセクションの削除でその項目も削除する
+    await change_log.append(meeting_id, ('section', OP_DELETE, section_id, None))
+
+    async def invalidate(job: Optional[DeleteJob] = None) -> None:
+        items = set(item_ids) | set(job.ids('items') if job else [])
+        await cache_manager.invalidate_meeting(meeting_id, entity_cache_keys([section_id], sorted(items)))
 
-def update_section_order_transaction(transaction: Any, sections_data: List[tuple], section_id: str, new_order: int) -> None:
-    """Transaction function to update section order with consistency"""
-    # Update the target section
-    section_ref = db.collection('sections').document(section_id)
-    transaction.update(section_ref, {'order': new_order})
-    
-    # Optional: Adjust other sections if needed to maintain consistent ordering
-    # This is application-specific logic that depends on your requirements
+    if not USE_FIRESTORE:
+        await invalidate()
+        return None
+    # 溜まっている書き込みを先に反映し（移動した項目の所属をFirestoreに合わせる）、
+    # その間に溜まったセクション・項目の書き込みは削除後に反映されないよう破棄する
+    # （反映に失敗しても削除は続ける。反映されなかった書き込みは下で破棄される）
+    try:
+        await write_behind.flush(meeting_id)
+    except Exception as e:
+        print(f"Write-behind flush error before deleting section {section_id}: {e}")
+    await write_behind.discard_documents(
+        meeting_id, [('sections', section_id)] + [('items', item_id) for item_id in item_ids])
+    return await cascade_deleter.delete(
+        'section', section_id,
+        roots=[('sections', section_id)],
+        children=[('items', 'section_id', section_id)],
+        invalidate=invalidate)
+
+# ----- Ordering -----
+# セクション・項目は rank（並びのキー）で並べる。並べ替え・移動は通常、移動するドキュメント1件の書き込みで済む
+async def update_section_order(meeting_id: str, section_id: str, new_order: int) -> None:
+    """セクションの order を変更する（並びのキーも order から作り直す。他のセクションは書き換えない）"""
+    fields = {'order': new_order, 'rank': rank_from_order(new_order)}
+    # Mock data update
+    if repository.get_section(section_id, meeting_id):
+        repository.update_section(section_id, **fields)
+    await persist_document(meeting_id, OP_UPDATE, 'sections', section_id, fields)
+
+async def apply_moves(meeting_id: str, collection: str, moves: Dict[str, Dict[str, Any]]) -> None:
+    """plan_move の書き込みをモックデータとFirestoreに反映する（振り直しの場合のみ複数件）"""
+    for doc_id, fields in moves.items():
+        if collection == 'sections':
+            repository.update_section(doc_id, **fields)
+        else:
+            repository.update_item(doc_id, **fields)
+    if len(moves) > 1:
+        print(f"Rebalanced {len(moves)} {collection} ranks in meeting {meeting_id}")
+    await asyncio.gather(*(
+        persist_document(meeting_id, OP_UPDATE, collection, doc_id, fields) for doc_id, fields in moves.items()))
+    kind = 'section' if collection == 'sections' else 'item'
+    await change_log.append(meeting_id, *((kind, OP_UPDATE, doc_id, fields) for doc_id, fields in moves.items()))
 
 # ----- WebSocket Manager -----
 class WebSocketManager:
@@ -347,11 +515,8 @@ class WebSocketManager:
     async def send_section_assist(self, meeting_id: str, section_id: str, status: str):
         """セクションのステータス変更時に会議アシスト情報を送信"""
         # セクション情報を取得
-        section_title = ""
-        for s in mock_sections.get(meeting_id, []):
-            if s.id == section_id:
-                section_title = s.title
-                break
+        section = repository.get_section(section_id, meeting_id)
+        section_title = section.title if section else ""
         
         # 会議アシスト情報を生成
         assist_info = await generate_meeting_assist(meeting_id, section_id, section_title)
@@ -372,7 +537,7 @@ class WebSocketManager:
         current_section_id = None
         current_section_title = "会議"
         
-        for section in mock_sections.get(meeting_id, []):
+        for section in repository.list_sections(meeting_id):
             if section.status == "in_progress":
                 current_section_id = section.id
                 current_section_title = section.title
@@ -399,11 +564,9 @@ class WebSocketManager:
         """会議アシスト機能のリマインダーを送信"""
         # セクション情報を取得
         section_title = "会議"
-        if section_id:
-            for s in mock_sections.get(meeting_id, []):
-                if s.id == section_id:
-                    section_title = s.title
-                    break
+        section = repository.get_section(section_id, meeting_id) if section_id else None
+        if section:
+            section_title = section.title
         
         # 会議アシスト情報を生成
         assist_info = await generate_meeting_assist(meeting_id, section_id or "general", section_title)
@@ -460,24 +623,6 @@ async def generate_meeting_assist(meeting_id: str, section_id: str, section_titl
 
 # ----- Helper Functions -----
 
-# mock_sectionsを初期化
-mock_sections = {
-    "m1": [
-        Section(
-            id="s1", 
-            title="議題", 
-            order=1, 
-            status="completed"
-        ),
-        Section(
-            id="s2", 
-            title="決定事項", 
-            order=2, 
-            status="in_progress"
-        ),
-    ]
-}
-
 # ----- Dependency -----
 def get_current_user():
     return mock_user
@@ -502,7 +647,7 @@ def update_user(user_update: User, user: User = Depends(get_current_user)):
 # ----- Template Endpoints -----
 @app.get("/templates", response_model=list[Template], tags=["テンプレート"], summary="テンプレート一覧", description="利用可能な全ての会議テンプレートを取得する")
 def list_templates(user: User = Depends(get_current_user)):
-    return mock_templates
+    return repository.list_templates()
 
 @app.post("/templates", response_model=Template, tags=["テンプレート"], summary="テンプレート作成", description="新しい会議テンプレートを作成する（セクションと項目を含む）")
 async def create_template(t: Template, user: User = Depends(get_current_user)):
@@ -524,7 +669,7 @@ async def create_template(t: Template, user: User = Depends(get_current_user)):
             )
     
     # モックデータに追加
-    mock_templates.append(t)
+    repository.put_template(t)
     
     # Firestoreに保存
     if USE_FIRESTORE:
@@ -535,9 +680,9 @@ async def create_template(t: Template, user: User = Depends(get_current_user)):
 
 @app.get("/templates/{template_id}", response_model=Template, tags=["テンプレート"], summary="テンプレート取得", description="IDで特定のテンプレートを取得する")
 def get_template(template_id: str, user: User = Depends(get_current_user)):
-    for tpl in mock_templates:
-        if tpl.id == template_id:
-            return tpl
+    tpl = repository.get_template(template_id)
+    if tpl:
+        return tpl
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
 @app.patch("/templates/{template_id}", response_model=Template, tags=["テンプレート"], summary="テンプレート更新", description="既存のテンプレートを更新する（セクションと項目を含む）")
@@ -560,12 +705,10 @@ async def update_template(template_id: str, t: Template, user: User = Depends(ge
             )
     
     # テンプレートの存在確認と更新
-    template_found = False
-    for idx, tpl in enumerate(mock_templates):
-        if tpl.id == template_id:
-            template_found = True
-            mock_templates[idx] = t
-            break
+    template_found = repository.get_template(template_id) is not None
+    if template_found:
+        repository.delete_template(template_id)
+        repository.put_template(t)
     
     # Firestoreの更新
     if template_found and USE_FIRESTORE:
@@ -580,12 +723,7 @@ async def update_template(template_id: str, t: Template, user: User = Depends(ge
 @app.delete("/templates/{template_id}", tags=["テンプレート"], summary="テンプレート削除", description="IDでテンプレートを削除する")
 async def delete_template(template_id: str, user: User = Depends(get_current_user)):
     # テンプレートの存在確認と削除
-    template_found = False
-    for tpl in mock_templates:
-        if tpl.id == template_id:
-            template_found = True
-            mock_templates.remove(tpl)
-            break
+    template_found = repository.delete_template(template_id)
     
     # Firestoreからも削除
     if template_found and USE_FIRESTORE:
@@ -666,14 +804,8 @@ async def add_template_examples(user: User = Depends(get_current_user)):
     # 既存のテンプレートと重複しないように確認
     added_templates = []
     for example in examples:
-        exists = False
-        for tpl in mock_templates:
-            if tpl.id == example.id:
-                exists = True
-                break
-        
-        if not exists:
-            mock_templates.append(example)
+        if repository.get_template(example.id) is None:
+            repository.put_template(example)
             added_templates.append(example)
             
             # Firestoreに保存
@@ -687,288 +819,296 @@ async def add_template_examples(user: User = Depends(get_current_user)):
     }
 
 # ----- Meeting Endpoints -----
-@app.get("/meetings", response_model=list[Meeting], tags=["会議"], summary="会議一覧", description="利用可能な全ての会議を取得する")
-def list_meetings(user: User = Depends(get_current_user)):
-    return mock_meetings
+# ----- Pagination -----
+def decode_page_cursor(cursor: Optional[str], scope: str, filters: Dict[str, Any]) -> Optional[tuple]:
+    """カーソルを前のページの最後のキーに戻す（不正な場合は 400）"""
+    try:
+        return decode_cursor(cursor, scope, filters)
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def set_next_cursor(response: Response, scope: str, filters: Dict[str, Any], next_key: Optional[tuple]) -> None:
+    """続きがある場合は次のページのカーソルをレスポンスヘッダーに付ける"""
+    if next_key is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(scope, filters, next_key)
+
+@app.get("/meetings", response_model=list[Meeting], tags=["会議"], summary="会議一覧", description="会議を日時順にページ単位で取得する（条件で絞り込み可能）")
+def list_meetings(
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX, description="1ページの件数"),
+    cursor: Optional[str] = Query(None, description="前のページのレスポンスヘッダー X-Next-Cursor の値"),
+    status_filter: Optional[str] = Query(None, alias="status", description="会議ステータスで絞り込む"),
+    template_id: Optional[str] = Query(None, description="テンプレートIDで絞り込む"),
+    datetime_from: Optional[str] = Query(None, description="この日時以降の会議（ISO 8601）"),
+    datetime_to: Optional[str] = Query(None, description="この日時より前の会議（ISO 8601）"),
+    user: User = Depends(get_current_user)
+):
+    """
+    会議を (datetime, id) の順に最大 `limit` 件返します。続きがある場合はレスポンスヘッダー
+    `X-Next-Cursor` のカーソルを `cursor` に指定して次のページを取得します（絞り込み条件は同じにすること）。
+    """
+    filters = {"status": status_filter, "template_id": template_id,
+               "datetime_from": datetime_from, "datetime_to": datetime_to}
+    after = decode_page_cursor(cursor, "meetings", filters)
+    meetings, next_key = repository.page_meetings(limit, after, **filters)
+    set_next_cursor(response, "meetings", filters, next_key)
+    return meetings
 
 @app.post("/meetings", response_model=Meeting, tags=["会議"], summary="会議作成", description="新しい会議を作成する（テンプレートが指定されている場合は関連セクションも作成）")
 async def create_meeting(m: Meeting, user: User = Depends(get_current_user)):
-    # Add to mock data
-    mock_meetings.append(m)
-    
-    # If template_id is provided, create sections and items from template
-    if m.template_id:
-        template = None
-        
-        # Find template in mock data
-        for t in mock_templates:
-            if t.id == m.template_id:
-                template = t
-                break
-                
-        # If template found, create sections and items
-        if template:
-            # Create sections based on template sections
-            if m.id not in mock_sections:
-                mock_sections[m.id] = []
-                
-            for template_section in template.sections:
-                # Generate unique section ID
-                section_id = f"s_{m.id}_{template_section.order}"
-                
-                # Create section
-                section = Section(
-                    id=section_id, 
-                    title=template_section.title, 
-                    order=template_section.order,
-                    status="not_started"  # 初期状態は「未開始」
-                )
-                mock_sections[m.id].append(section)
-                
-                # Add to Firestore if enabled
-                if USE_FIRESTORE:
-                    section_data = {
-                        "id": section_id,
-                        "meeting_id": m.id,
-                        "title": template_section.title,
-                        "order": template_section.order,
-                        "status": "not_started"
-                    }
-                    await set_document('sections', section_id, section_data)
-                
-                # Create items for this section
-                if template_section.items:
-                    if section_id not in mock_items:
-                        mock_items[section_id] = []
-                        
-                    for template_item in template_section.items:
-                        # Generate unique item ID
-                        item_id = f"i_{section_id}_{template_item.order}"
-                        
-                        # Create item
-                        item = Item(
-                            id=item_id,
-                            section_id=section_id,
-                            text=template_item.text,
-                            order=template_item.order
-                        )
-                        mock_items[section_id].append(item)
-                        
-                        # Add to Firestore if enabled
-                        if USE_FIRESTORE:
-                            item_data = {
-                                "id": item_id,
-                                "section_id": section_id,
-                                "meeting_id": m.id,  # 検索効率化のため会議IDも保存
-                                "text": template_item.text,
-                                "order": template_item.order
-                            }
-                            await set_document('items', item_id, item_data)
-        
-        # Initialize recording status
-        mock_rec_status[m.id] = "stopped"
-        if USE_FIRESTORE:
-            await set_document('recording_status', m.id, {"status": "stopped"})
-    
-    # Add to Firestore if enabled
-    if USE_FIRESTORE:
-        meeting_data = {
-            "id": m.id,
-            "title": m.title,
-            "datetime": m.datetime,
-            "template_id": m.template_id
-        }
-        await set_document('meetings', m.id, meeting_data)
-        
+    # テンプレートのセクション・項目とともに作成（Firestoreにはバッチでまとめて保存）
+    await instantiate_meetings([m])
     return m
 
+@app.post("/templates/{template_id}/meetings", response_model=list[Meeting], tags=["会議"], summary="テンプレートから会議を一括作成",
+          description="1つのテンプレートから複数の会議を、セクション・項目とともに一度に作成する")
+async def bulk_create_meetings(template_id: str, meetings: list[Meeting], user: User = Depends(get_current_user)):
+    """
+    テンプレートから複数の会議を一度に作成します。
+    - 各会議の template_id はパスのテンプレートIDで上書きされます
+    - Firestoreには全会議のセクション・項目をまとめてバッチ書き込みします
+    """
+    if not repository.get_template(template_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="指定されたテンプレートが見つかりません")
+    if len(meetings) > BULK_INSTANTIATE_MAX_MEETINGS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"一度に作成できる会議は{BULK_INSTANTIATE_MAX_MEETINGS}件までです")
+    if len({m.id for m in meetings}) != len(meetings):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="会議IDが重複しています")
+    
+    meetings = [m.copy(update={"template_id": template_id}) for m in meetings]
+    return await instantiate_meetings(meetings)
+
 @app.get("/meetings/{meeting_id}", response_model=Meeting, tags=["会議"], summary="会議取得", description="IDで特定の会議を取得する")
 async def get_meeting(meeting_id: str, user: User = Depends(get_current_user)):
-    # キャッシュからデータを取得
-    cache_key = f"meeting:{meeting_id}"
-    cached_meeting = await cache_manager.get(cache_key)
+    # キャッシュから取得し、なければモックデータまたはFirestoreから取得してキャッシュ
+    # 同時のキャッシュミスは1回の取得に集約される
+    # 存在しない会議は墓標をキャッシュし、繰り返しの404をデータソースに問い合わせずに返す
+    meeting_data = await cached_meeting(meeting_id)
     
-    if cached_meeting:
-        return Meeting(**cached_meeting)
+    if not meeting_data:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     
-    # キャッシュになければモックデータまたはFirestoreから取得
-    meeting_data = None
+    # キャッシュのTTLポリシーに会議のステータスを伝える
+    cache_manager.ttl_policy.observe_status(meeting_id, meeting_data.get('status'))
     
+    return Meeting(**meeting_data)
+
+async def cached_meeting(meeting_id: str) -> Optional[Dict[str, Any]]:
+    """会議データをキャッシュから取得し、なければ取得してキャッシュする"""
+    cache_key = await cache_manager.meeting_key(meeting_id, f"meeting:{meeting_id}")
+    return await cache_manager.get_or_compute(
+        cache_key, lambda: load_meeting_data(meeting_id), entity_type='meeting', cache_misses=True,
+        meeting_id=meeting_id)
+
+async def load_meeting_data(meeting_id: str) -> Optional[Dict[str, Any]]:
+    """会議データをモックデータまたはFirestoreから取得する（見つからなければ None）"""
     # モックデータから検索
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_data = meet.dict()
-            break
+    meet = repository.get_meeting(meeting_id)
+    if meet:
+        cache_manager.ttl_policy.observe_status(meeting_id, meet.status)
+        return meet.dict()
     
     # Firestoreから検索（モックデータになければ）
-    if not meeting_data and USE_FIRESTORE:
+    if USE_FIRESTORE:
         meeting_doc = await get_document('meetings', meeting_id)
         if meeting_doc:
-            meeting_data = meeting_doc
-    
-    if not meeting_data:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    
-    # キャッシュに保存
-    await cache_manager.set(cache_key, meeting_data, entity_type='meeting')
+            cache_manager.ttl_policy.observe_status(meeting_id, meeting_doc.get('status'))
+            return meeting_doc
     
-    return Meeting(**meeting_data)
+    return None
 
 # 会議データ全体（セクション、項目を含む）を一度に取得するエンドポイント
 @app.get("/meetings/{meeting_id}/full", tags=["会議"], summary="会議データ全体取得", 
          description="会議データとそれに関連するセクション、項目を一度に取得する")
-async def get_meeting_full(meeting_id: str, user: User = Depends(get_current_user)):
+async def get_meeting_full(
+    meeting_id: str,
+    include: Optional[str] = Query(None, description="含める部分（sections, items, tasks, recording_status のカンマ区切り。省略時は全て）"),
+    fields_meeting: Optional[str] = Query(None, alias="fields[meeting]", description="会議データで返すフィールド（カンマ区切り）"),
+    fields_sections: Optional[str] = Query(None, alias="fields[sections]", description="セクションで返すフィールド（カンマ区切り）"),
+    fields_items: Optional[str] = Query(None, alias="fields[items]", description="項目で返すフィールド（カンマ区切り）"),
+    fields_tasks: Optional[str] = Query(None, alias="fields[tasks]", description="タスクで返すフィールド（カンマ区切り）"),
+    if_none_match: Optional[str] = Header(None, description="前回のレスポンスの ETag（変更がなければ 304 を返す）"),
+    user: User = Depends(get_current_user),
+):
     """
     会議データとそれに関連するセクション、項目を一度に取得します。
     これにより、複数のAPIコールを減らし、フロントエンドの実装を簡素化できます。
     また、キャッシュを効率的に活用します。
-    """
-    # キャッシュからデータを取得
-    cache_key = f"meeting_full:{meeting_id}"
-    cached_data = await cache_manager.get(cache_key)
     
-    if cached_data:
-        return cached_data
-    
-    # 会議データを取得
-    meeting_data = None
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_data = meet.dict()
-            break
-    
-    if not meeting_data and USE_FIRESTORE:
-        meeting_doc = await get_document('meetings', meeting_id)
-        if meeting_doc:
-            meeting_data = meeting_doc
+    include と fields[リソース] を指定すると、含めない部分は読み込まず、
+    指定されたフィールドだけを返します（id は常に返します）。
     
-    if not meeting_data:
+    レスポンスには内容の ETag を付けます。If-None-Match が一致する場合は、
+    会議データを組み立て直さずに 304 Not Modified を返します。
+    """
+    try:
+        projection = Projection.parse(include, {
+            'meeting': fields_meeting,
+            'sections': fields_sections,
+            'items': fields_items,
+            'tasks': fields_tasks,
+        }, allowed=PROJECTION_FIELDS)
+    except ProjectionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # キャッシュから取得し、なければ会議データ全体を組み立ててキャッシュ（TTLは会議のステータスに応じて決まる）
+    # セクション・項目はキャッシュにあればそれを利用する
+    # 同時のキャッシュミスは1回の組み立てに集約される
+    # 存在しない会議は墓標をキャッシュする（会議の作成で世代が更新されると消える）
+    # 部分・フィールドを指定した場合は、その組み合わせごとに別のキーでキャッシュする
+    tagged = await tagged_meeting_full(meeting_id, projection, if_none_match)
+    if tagged.not_modified:
+        return not_modified_response(tagged.etag)
+    
+    full_data = tagged.value
+    if full_data is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     
-    # セクションデータを取得
-    sections_data = []
-    if meeting_id in mock_sections:
-        sections_data = [section.dict() for section in mock_sections[meeting_id]]
-    elif USE_FIRESTORE:
-        sections = await query_collection('sections', 'meeting_id', meeting_id)
-        if sections:
-            sections_data = sections
-            sections_data.sort(key=lambda x: x.get('order', 0))
-    
-    # 各セクションの項目を取得
-    for section in sections_data:
-        section_id = section['id']
-        items_data = []
-        
-        if section_id in mock_items:
-            items_data = [item.dict() for item in mock_items[section_id]]
-        elif USE_FIRESTORE:
-            items = await query_collection('items', 'section_id', section_id)
-            if items:
-                items_data = items
-                items_data.sort(key=lambda x: x.get('order', 0))
-        
-        section['items'] = items_data
-    
-    # タスクデータを取得
-    tasks_data = []
-    if meeting_id in mock_tasks:
-        tasks_data = [task.dict() for task in mock_tasks[meeting_id]]
-    elif USE_FIRESTORE:
-        tasks = await query_collection('tasks', 'meeting_id', meeting_id)
-        if tasks:
-            tasks_data = tasks
-    
-    # 録音状態を取得
-    recording_status = "stopped"
-    if meeting_id in mock_rec_status:
-        recording_status = mock_rec_status[meeting_id]
-    elif USE_FIRESTORE:
-        rec_status = await get_document('recording_status', meeting_id)
-        if rec_status:
-            recording_status = rec_status.get('status', 'stopped')
+    cache_manager.ttl_policy.observe_status(meeting_id, full_data["meeting"].get('status'))
     
-    # 結果を組み立て
-    result = {
-        "meeting": meeting_data,
-        "sections": sections_data,
-        "tasks": tasks_data,
-        "recording_status": recording_status
-    }
-    
-    # キャッシュに保存（短めのTTL）
-    await cache_manager.set(cache_key, result, ttl=30)  # 30秒間キャッシュ
-    
-    return result
+    return tagged_response(tagged)
+
+@app.get("/meetings/{meeting_id}/changes", tags=["会議"], summary="会議の変更差分取得",
+         description="指定したバージョンより後の変更だけを取得する（取得できない場合は会議データ全体を返す）")
+async def get_meeting_changes(
+    meeting_id: str,
+    since: Optional[int] = Query(None, ge=0, description="前回受け取った version（省略時は会議データ全体を返す）"),
+    user: User = Depends(get_current_user),
+):
+    """
+    再接続したクライアントが、前回受け取った version より後の変更だけを取得します。
+    変更ログが切り詰められて since からの変更を復元できない場合は、`snapshot` に会議データ全体を返します。
+    応答の `version` を次回の `since` に指定します。
+    """
+    change_set = await change_log.since(meeting_id, since)
+    if change_set.complete:
+        change_log.delta_responses += 1
+        return {"version": change_set.version, "changes": change_set.changes, "snapshot": None}
+    
+    # スナップショットは version を読んだ後に組み立てる（以降の変更は次回の差分で重ねて適用しても同じ結果になる）
+    # 他ワーカーのキャッシュの無効化を待たずに済むよう、キャッシュを使わずに組み立てる
+    snapshot = await load_meeting_full_data(meeting_id, use_cache=False)
+    if snapshot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    change_log.snapshot_responses += 1
+    return {"version": change_set.version, "changes": [], "snapshot": snapshot}
+
+# fields[リソース] で指定できるフィールド
+PROJECTION_FIELDS = {
+    'meeting': Meeting.model_fields,
+    'sections': Section.model_fields,
+    'items': Item.model_fields,
+    'tasks': Task.model_fields,
+}
+
+async def cached_meeting_full(meeting_id: str, projection: Projection = FULL) -> Optional[Dict[str, Any]]:
+    """会議データ全体をキャッシュから取得し、なければ組み立ててキャッシュする"""
+    return (await tagged_meeting_full(meeting_id, projection)).value
+
+async def tagged_meeting_full(meeting_id: str, projection: Projection = FULL,
+                              if_none_match: Optional[str] = None) -> TaggedValue:
+    """会議データ全体とそのETagを取得する（If-None-Match が一致すれば値は読み込まない）
+
+    projection を指定した場合は、キーに部分・フィールドの指定を含める
+    （例: meeting_full:m1:sections;sections=id,status:g3）。世代番号が同じため無効化は共通。
+    """
+    base_key = f"meeting_full:{meeting_id}" if projection.is_full else f"meeting_full:{meeting_id}:{projection.key()}"
+    cache_key = await cache_manager.meeting_key(meeting_id, base_key)
+    return await cache_manager.get_or_compute_tagged(
+        cache_key, lambda: load_meeting_full_data(meeting_id, projection), if_none_match=if_none_match,
+        ttl=30, cache_misses=True, meeting_id=meeting_id)  # 基準は30秒
+
+def not_modified_response(etag: str) -> Response:
+    """条件付きGETで内容が変わっていない場合のレスポンス（本文なし）"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+def tagged_response(tagged: TaggedValue) -> Response:
+    """ETagを付けたJSONレスポンス"""
+    return JSONResponse(content=tagged.value, headers={"ETag": tagged.etag})
+
+async def load_meeting_full_data(meeting_id: str, projection: Projection = FULL,
+                                 use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """会議データ全体（projection で指定された部分・フィールド）を組み立てる（会議が見つからなければ None）"""
+    try:
+        full_data = await get_meeting_full_data(meeting_id, use_cache=use_cache, parts=projection.parts)
+        return full_data if projection.is_full else projection.apply(full_data)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_404_NOT_FOUND:
+            return None
+        raise
 
 @app.patch("/meetings/{meeting_id}", response_model=Meeting, tags=["会議"], summary="会議更新", description="既存の会議を更新する")
-def update_meeting(meeting_id: str, m: Meeting, user: User = Depends(get_current_user)):
-    for idx, meet in enumerate(mock_meetings):
-        if meet.id == meeting_id:
-            mock_meetings[idx] = m
-            return m
+async def update_meeting(meeting_id: str, m: Meeting, user: User = Depends(get_current_user)):
+    # 会議IDは変更できない（セクション・項目・タスクが会議IDで紐づいているため）
+    if m.id != meeting_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="会議IDはパスのIDと一致させてください")
+    if repository.get_meeting(meeting_id):
+        repository.put_meeting(m)
+        cache_manager.ttl_policy.observe_status(meeting_id, m.status)
+        await invalidate_meeting_cache(meeting_id)
+        await change_log.append(meeting_id, ('meeting', OP_SET, meeting_id, m.dict()))
+        return m
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
 # 会議データ全体を取得するヘルパー関数
-async def get_meeting_full_data(meeting_id: str) -> Dict[str, Any]:
-    """会議データとそれに関連するセクション、項目、タスクを取得する"""
-    # 会議データを取得
-    meeting_data = None
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_data = meet.dict()
-            break
+async def get_meeting_full_data(meeting_id: str, use_cache: bool = True,
+                                parts: Collection[str] = FULL.parts) -> Dict[str, Any]:
+    """
+    会議データとそれに関連するセクション、項目、タスクを取得する
     
-    if not meeting_data and USE_FIRESTORE:
-        meeting_doc = await get_document('meetings', meeting_id)
-        if meeting_doc:
-            meeting_data = meeting_doc
+    互いに依存しない読み込み（会議・セクション一覧・会議の全項目・タスク・録音状態）は並行に行い、
+    所要時間が最も遅い読み込み1回分で済むようにする。項目はセクションごとではなく
+    会議IDで1回だけ問い合わせる。
+    
+    use_cache=True の場合、会議・セクション一覧・項目一覧はキャッシュから
+    最大2往復でまとめて取得し、キャッシュにないものだけをデータソースから取得する。
+    永続化など最新のデータが必要な場合は use_cache=False を指定する。
+    
+    parts（projection.PARTS の部分集合）に含まれない部分は読み込まず、結果にも含めない。
+    """
+    with_sections = 'sections' in parts or 'items' in parts
+    with_items = 'items' in parts
+    # キャッシュに置かないタスク・録音状態は、キャッシュの確認を待たずに読み込みを始める
+    tasks_load = asyncio.ensure_future(_cached_or_load(
+        None if 'tasks' in parts else [], lambda: load_tasks_data(meeting_id)))
+    recording_load = asyncio.ensure_future(_cached_or_load(
+        None if 'recording_status' in parts else "stopped", lambda: load_recording_status(meeting_id)))
+    try:
+        cached_meeting_data, cached_sections_data, cached_items_by_section = None, None, {}
+        if use_cache:
+            cached_meeting_data, cached_sections_data, cached_items_by_section = \
+                await cache_manager.get_meeting_parts(meeting_id, with_items=with_items)
+        
+        # キャッシュにないものだけをデータソースから並行に読み込む
+        # 項目はセクション一覧とすべてのセクションの項目がキャッシュにある場合のみ読み込まない
+        items_cached = bool(cached_sections_data) and all(
+            section['id'] in cached_items_by_section for section in cached_sections_data)
+        meeting_data, sections_data, items_by_section, tasks_data, recording_status = await asyncio.gather(
+            _cached_or_load(cached_meeting_data, lambda: load_meeting_data(meeting_id)),
+            _cached_or_load(cached_sections_data if with_sections else [], lambda: load_sections_data(meeting_id)),
+            _cached_or_load({} if items_cached or not with_items else None, lambda: load_meeting_items_data(meeting_id)),
+            tasks_load,
+            recording_load,
+        )
+    except BaseException:
+        tasks_load.cancel()
+        recording_load.cancel()
+        raise
     
     if not meeting_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    meeting_data = dict(meeting_data)
+    cache_manager.ttl_policy.observe_status(meeting_id, meeting_data.get('status'))
     
-    # セクションデータを取得
-    sections_data = []
-    if meeting_id in mock_sections:
-        sections_data = [section.dict() for section in mock_sections[meeting_id]]
-    elif USE_FIRESTORE:
-        sections = await query_collection('sections', 'meeting_id', meeting_id)
-        if sections:
-            sections_data = sections
-            sections_data.sort(key=lambda x: x.get('order', 0))
-    
-    # 各セクションの項目を取得
-    for section in sections_data:
+    # セクションごとに項目を付ける（キャッシュの値は共有されているためコピーして使う）
+    sections_data = [dict(section) for section in sections_data or []]
+    for section in sections_data if with_items else []:
         section_id = section['id']
-        items_data = []
-        
-        if section_id in mock_items:
-            items_data = [item.dict() for item in mock_items[section_id]]
-        elif USE_FIRESTORE:
-            items = await query_collection('items', 'section_id', section_id)
-            if items:
-                items_data = items
-                items_data.sort(key=lambda x: x.get('order', 0))
-        
-        section['items'] = items_data
-    
-    # タスクデータを取得
-    tasks_data = []
-    if meeting_id in mock_tasks:
-        tasks_data = [task.dict() for task in mock_tasks[meeting_id]]
-    elif USE_FIRESTORE:
-        tasks = await query_collection('tasks', 'meeting_id', meeting_id)
-        if tasks:
-            tasks_data = tasks
-    
-    # 録音状態を取得
-    recording_status = "stopped"
-    if meeting_id in mock_rec_status:
-        recording_status = mock_rec_status[meeting_id]
-    elif USE_FIRESTORE:
-        rec_status = await get_document('recording_status', meeting_id)
-        if rec_status:
-            recording_status = rec_status.get('status', 'stopped')
+        if section_id in cached_items_by_section:
+            section['items'] = [dict(item) for item in cached_items_by_section[section_id]]
+        else:
+            section['items'] = items_by_section.get(section_id, [])
     
     # 結果を組み立て
     result = {
@@ -978,7 +1118,51 @@ async def get_meeting_full_data(meeting_id: str) -> Dict[str, Any]:
         "recording_status": recording_status
     }
     
-    return result
+    # 読み込まなかった部分は含めない
+    return {key: value for key, value in result.items() if key == "meeting" or key in parts or (
+        key == "sections" and with_sections)}
+
+async def _cached_or_load(cached: Any, load) -> Any:
+    """キャッシュの値があればそれを、なければ load() の結果を返す"""
+    if cached is not None:
+        return cached
+    return await load()
+
+async def load_meeting_items_data(meeting_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    """会議の全セクションの項目をセクションIDごとに取得する（Firestoreへの問い合わせは会議IDで1回）"""
+    # モックデータから検索（rank 順に索引されている）
+    if repository.has_sections(meeting_id):
+        return {
+            section.id: [item.dict() for item in repository.list_items(section.id)]
+            for section in repository.list_sections(meeting_id)
+        }
+    
+    # Firestoreから検索（項目には会議IDも保存している）
+    items_by_section: Dict[str, List[Dict[str, Any]]] = {}
+    if USE_FIRESTORE:
+        for item in await query_collection('items', 'meeting_id', meeting_id):
+            items_by_section.setdefault(item.get('section_id'), []).append(item)
+        for items_data in items_by_section.values():
+            items_data.sort(key=rank_of)
+    return items_by_section
+
+async def load_tasks_data(meeting_id: str) -> List[Dict[str, Any]]:
+    """タスク一覧をモックデータまたはFirestoreから取得する"""
+    if repository.has_tasks(meeting_id):
+        return [task.dict() for task in repository.list_tasks(meeting_id)]
+    if USE_FIRESTORE:
+        return await query_collection('tasks', 'meeting_id', meeting_id)
+    return []
+
+async def load_recording_status(meeting_id: str) -> str:
+    """録音状態をモックデータまたはFirestoreから取得する（記録がなければ stopped）"""
+    if repository.has_recording_status(meeting_id):
+        return repository.get_recording_status(meeting_id)
+    if USE_FIRESTORE:
+        rec_status = await get_document('recording_status', meeting_id)
+        if rec_status:
+            return rec_status.get('status', 'stopped')
+    return "stopped"
 
 # Firestoreに会議データを一括保存するヘルパー関数
 async def save_meeting_data_to_firestore(meeting_id: str, meeting_data: Dict[str, Any]) -> None:
@@ -987,40 +1171,36 @@ async def save_meeting_data_to_firestore(meeting_id: str, meeting_data: Dict[str
         return
     
     try:
-        # バッチ処理の開始
-        batch = db.batch()
+        # 書き込みバッファに溜まっている変更（削除を含む）を先に反映
+        await write_behind.flush(meeting_id)
+        
+        # バッチに書き込む内容（操作, コレクション, ドキュメントID, データ）
+        ops = []
         
         # 会議データの保存
-        meeting_ref = db.collection('meetings').document(meeting_id)
-        batch.set(meeting_ref, meeting_data['meeting'])
+        ops.append((OP_SET, 'meetings', meeting_id, meeting_data['meeting']))
         
         # セクションデータの保存
         for section in meeting_data['sections']:
             section_id = section['id']
-            section_ref = db.collection('sections').document(section_id)
             
-            # セクションから項目を取り出して別に保存
+            # セクションから項目を取り出して別に保存（会議IDで検索できるよう会議IDも保存）
             items = section.pop('items', [])
-            batch.set(section_ref, section)
+            ops.append((OP_SET, 'sections', section_id, {**section, 'meeting_id': meeting_id}))
             
             # 項目データの保存
             for item in items:
-                item_id = item['id']
-                item_ref = db.collection('items').document(item_id)
-                batch.set(item_ref, item)
+                ops.append((OP_SET, 'items', item['id'], {**item, 'section_id': section_id, 'meeting_id': meeting_id}))
         
         # タスクデータの保存
         for task in meeting_data['tasks']:
-            task_id = task['id']
-            task_ref = db.collection('tasks').document(task_id)
-            batch.set(task_ref, task)
+            ops.append((OP_SET, 'tasks', task['id'], {**task, 'meeting_id': meeting_id}))
         
         # 録音状態の保存
-        rec_status_ref = db.collection('recording_status').document(meeting_id)
-        batch.set(rec_status_ref, {"status": meeting_data['recording_status']})
+        ops.append((OP_SET, 'recording_status', meeting_id, {"status": meeting_data['recording_status']}))
         
-        # バッチ処理の実行
-        batch.commit()
+        # バッチ処理の実行（500件を超える場合は分けてコミットする）
+        await firestore_store.commit_batch(ops)
         print(f"Meeting data saved to Firestore: {meeting_id}")
         
     except Exception as e:
@@ -1032,13 +1212,11 @@ async def save_meeting_data_to_firestore(meeting_id: str, meeting_data: Dict[str
 async def start_meeting(meeting_id: str, user: User = Depends(get_current_user)):
     """会議を開始状態に設定し、ステータスを 'in_progress' に変更します"""
     # モックデータの更新
-    meeting_found = False
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_found = True
-            meet.status = "in_progress"
-            meeting_data = meet.dict()
-            break
+    meet = repository.get_meeting(meeting_id)
+    meeting_found = meet is not None
+    if meet:
+        repository.update_meeting(meeting_id, status="in_progress")
+        meeting_data = meet.dict()
     
     # Firestoreの更新
     if not meeting_found and USE_FIRESTORE:
@@ -1051,9 +1229,16 @@ async def start_meeting(meeting_id: str, user: User = Depends(get_current_user))
     if not meeting_found:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     
-    # キャッシュの更新
-    await cache_manager.delete(f"meeting:{meeting_id}")
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
+    # 会議中のセクション・項目の書き込みはバッファに溜める
+    await write_behind.mark_live(meeting_id)
+    
+    # キャッシュの更新（会議中のキャッシュは短いTTLではなく世代による無効化に任せる）
+    cache_manager.ttl_policy.observe_status(meeting_id, "in_progress")
+    await invalidate_meeting_cache(meeting_id)
+    await change_log.append(meeting_id, ('meeting', OP_UPDATE, meeting_id, {"status": "in_progress"}))
+    
+    # 参加者が開く画面のキャッシュを事前に読み込む
+    prefetcher.schedule(meeting_id)
     
     # WebSocketで会議開始の会議アシスト情報を送信
     await websocket_manager.send_meeting_assist(
@@ -1072,14 +1257,12 @@ async def complete_meeting(meeting_id: str, user: User = Depends(get_current_use
     Firestoreに確実に保存するために使用します。
     """
     # モックデータの更新
-    meeting_found = False
     meeting_data = None
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_found = True
-            meet.status = "completed"
-            meeting_data = meet.dict()
-            break
+    meet = repository.get_meeting(meeting_id)
+    meeting_found = meet is not None
+    if meet:
+        repository.update_meeting(meeting_id, status="completed")
+        meeting_data = meet.dict()
     
     if not meeting_found:
         if USE_FIRESTORE:
@@ -1093,16 +1276,21 @@ async def complete_meeting(meeting_id: str, user: User = Depends(get_current_use
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     
     # 会議の完全なデータを取得（セクション、項目を含む）
-    full_data = await get_meeting_full_data(meeting_id)
+    # 永続化するためキャッシュは使わず最新のデータから組み立てる
+    full_data = await get_meeting_full_data(meeting_id, use_cache=False)
     
     # Firestoreに保存
     if USE_FIRESTORE:
         # トランザクションまたはバッチ処理で一括保存
         await save_meeting_data_to_firestore(meeting_id, full_data)
     
-    # キャッシュを更新
-    await cache_manager.delete(f"meeting:{meeting_id}")
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
+    # 以降の書き込みは直接Firestoreに反映する
+    await write_behind.unmark_live(meeting_id)
+    
+    # キャッシュを更新（完了した会議はほぼ変更されないため長いTTLでキャッシュされる）
+    cache_manager.ttl_policy.observe_status(meeting_id, "completed")
+    await invalidate_meeting_cache(meeting_id)
+    await change_log.append(meeting_id, ('meeting', OP_UPDATE, meeting_id, {"status": "completed"}))
     
     # WebSocketで会議完了の会議アシスト情報を送信
     await websocket_manager.send_meeting_assist(
@@ -1118,35 +1306,58 @@ async def complete_meeting(meeting_id: str, user: User = Depends(get_current_use
     }
 
 @app.delete("/meetings/{meeting_id}", tags=["会議"], summary="会議削除", description="IDで会議を削除する（関連するセクション、項目、タスクも削除）")
-async def delete_meeting(meeting_id: str, user: User = Depends(get_current_user)):
+async def delete_meeting(meeting_id: str, response: Response, user: User = Depends(get_current_user)):
+    """
+    会議を削除した時点で応答します。関連データが多い場合（`CASCADE_DELETE_BACKGROUND_THRESHOLD` 件超）は
+    バックグラウンドで削除を続け、202 とジョブを返します。進捗は `GET /delete-jobs/{job_id}` で確認できます。
+    """
     # Check if meeting exists
-    meeting_exists = False
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_exists = True
-            break
+    meeting_exists = repository.get_meeting(meeting_id) is not None
             
     if not meeting_exists and not USE_FIRESTORE:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
         
-    # Delete meeting and all related data in a transaction
-    await delete_meeting_with_related_data(meeting_id)
-    return {"detail": "deleted"}
+    # 会議と関連データを削除（キャッシュの無効化を含む）
+    job = await delete_meeting_with_related_data(meeting_id)
+    cache_manager.ttl_policy.forget(meeting_id)
+    return delete_response(job, response)
+
+def delete_response(job: Optional[DeleteJob], response: Response) -> Dict[str, Any]:
+    """カスケード削除の応答（バックグラウンドで続く場合は 202）"""
+    if job is not None and job.background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"detail": "deleting", "job": job.to_dict()}
+    return {"detail": "deleted", "job": job.to_dict() if job else None}
+
+@app.get("/delete-jobs/{job_id}", tags=["会議"], summary="削除ジョブ取得", description="カスケード削除の進捗を取得する")
+def get_delete_job(job_id: str, user: User = Depends(get_current_user)):
+    """
+    会議・セクションの削除のジョブの状態（running / completed / failed）と削除済みの件数を返します。
+    ジョブはワーカープロセスごとに直近のもののみ保持されます。
+    """
+    job = cascade_deleter.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="このワーカーにジョブがありません")
+    return job.to_dict()
 
 # ----- Recording Endpoints -----
 @app.post("/meetings/{meeting_id}/recording/start", tags=["録音"], summary="録音開始", description="特定の会議の録音を開始し、会議ステータスを更新する")
 async def start_recording(meeting_id: str, user: User = Depends(get_current_user)):
     # 録音状態を更新
-    mock_rec_status[meeting_id] = "recording"
+    repository.set_recording_status(meeting_id, "recording")
     
     # 会議ステータスも 'in_progress' に更新
-    meeting_found = False
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_found = True
-            if meet.status == "scheduled":
-                meet.status = "in_progress"
-            break
+    meet = repository.get_meeting(meeting_id)
+    meeting_found = meet is not None
+    meeting_started = False
+    # 書き込みバッファは、存在して終了していない会議にだけ使う
+    meeting_live = False
+    if meet:
+        if meet.status == "scheduled":
+            repository.update_meeting(meeting_id, status="in_progress")
+            meeting_started = True
+        cache_manager.ttl_policy.observe_status(meeting_id, meet.status)
+        meeting_live = meet.status != "completed"
     
     # Firestoreの更新
     if USE_FIRESTORE:
@@ -1159,10 +1370,22 @@ async def start_recording(meeting_id: str, user: User = Depends(get_current_user
             if meeting_data and meeting_data.get('status') == "scheduled":
                 meeting_data['status'] = "in_progress"
                 await update_document('meetings', meeting_id, meeting_data)
+                meeting_started = True
+            if meeting_data:
+                cache_manager.ttl_policy.observe_status(meeting_id, meeting_data.get('status'))
+                meeting_live = meeting_data.get('status') != "completed"
     
-    # キャッシュを更新
-    await cache_manager.delete(f"meeting:{meeting_id}")
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
+    # 会議中のセクション・項目の書き込みはバッファに溜める
+    if meeting_live:
+        await write_behind.mark_live(meeting_id)
+    
+    # キャッシュを更新し、参加者が開く画面のキャッシュを事前に読み込む
+    await invalidate_meeting_cache(meeting_id)
+    changes = [('recording_status', OP_SET, meeting_id, {"status": "recording"})]
+    if meeting_started:
+        changes.append(('meeting', OP_UPDATE, meeting_id, {"status": "in_progress"}))
+    await change_log.append(meeting_id, *changes)
+    prefetcher.schedule(meeting_id)
     
     # WebSocketで録音開始の会議アシスト情報を送信
     await websocket_manager.send_meeting_assist(
@@ -1176,15 +1399,15 @@ async def start_recording(meeting_id: str, user: User = Depends(get_current_user
 @app.post("/meetings/{meeting_id}/recording/stop", tags=["録音"], summary="録音停止", description="特定の会議の録音を停止する")
 async def stop_recording(meeting_id: str, user: User = Depends(get_current_user)):
     # 録音状態を更新
-    mock_rec_status[meeting_id] = "stopped"
+    repository.set_recording_status(meeting_id, "stopped")
     
     # Firestoreの更新
     if USE_FIRESTORE:
         await set_document('recording_status', meeting_id, {"status": "stopped"})
     
     # キャッシュを更新
-    await cache_manager.delete(f"meeting:{meeting_id}")
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
+    await invalidate_meeting_cache(meeting_id)
+    await change_log.append(meeting_id, ('recording_status', OP_SET, meeting_id, {"status": "stopped"}))
     
     return {
         "status": "stopped", 
@@ -1193,24 +1416,30 @@ async def stop_recording(meeting_id: str, user: User = Depends(get_current_user)
 
 @app.get("/meetings/{meeting_id}/recording/status", response_model=RecordingStatus, tags=["録音"], summary="録音状態取得", description="特定の会議の現在の録音状態を取得する")
 def recording_status(meeting_id: str, user: User = Depends(get_current_user)):
-    return RecordingStatus(status=mock_rec_status.get(meeting_id, "stopped"))
+    return RecordingStatus(status=repository.get_recording_status(meeting_id, "stopped"))
 
 # ----- Sections & Items Endpoints -----
 @app.get("/meetings/{meeting_id}/sections", response_model=list[Section], tags=["セクション"], summary="セクション一覧", description="特定の会議の全てのセクションを取得する")
 async def list_sections(meeting_id: str, user: User = Depends(get_current_user)):
-    # キャッシュからデータを取得
-    cache_key = f"sections:{meeting_id}"
-    cached_sections = await cache_manager.get(cache_key)
-    
-    if cached_sections:
-        return [Section(**section) for section in cached_sections]
+    # キャッシュから取得し、なければモックデータまたはFirestoreから取得してキャッシュ
+    # セクションがない場合は墓標をキャッシュする（会議の作成で世代が更新されると消える）
+    sections_data = await cached_sections(meeting_id)
     
-    # キャッシュになければモックデータまたはFirestoreから取得
+    return [Section(**section) for section in sections_data or []]
+
+async def cached_sections(meeting_id: str) -> Optional[List[Dict[str, Any]]]:
+    """セクション一覧をキャッシュから取得し、なければ取得してキャッシュする"""
+    cache_key = await cache_manager.meeting_key(meeting_id, f"sections:{meeting_id}")
+    return await cache_manager.get_or_compute(
+        cache_key, lambda: load_sections_data(meeting_id), entity_type='section', cache_misses=True,
+        meeting_id=meeting_id)
+
+async def load_sections_data(meeting_id: str) -> List[Dict[str, Any]]:
+    """セクション一覧をモックデータまたはFirestoreから取得する"""
     sections_data = []
     
-    # モックデータから検索
-    if meeting_id in mock_sections:
-        sections_data = [section.dict() for section in mock_sections[meeting_id]]
+    # モックデータから検索（rank 順に索引されている）
+    sections_data = [section.dict() for section in repository.list_sections(meeting_id)]
     
     # Firestoreから検索（モックデータになければ）
     if not sections_data and USE_FIRESTORE:
@@ -1218,40 +1447,28 @@ async def list_sections(meeting_id: str, user: User = Depends(get_current_user))
         if sections:
             sections_data = sections
             # セクションを順序でソート
-            sections_data.sort(key=lambda x: x.get('order', 0))
-    
-    # キャッシュに保存
-    if sections_data:
-        await cache_manager.set(cache_key, sections_data, entity_type='section')
-        
-        # 会議データとの依存関係を設定
-        meeting_key = f"meeting:{meeting_id}"
-        for section in sections_data:
-            section_key = f"section:{section['id']}"
-            await cache_manager.add_dependency(meeting_key, section_key)
+            sections_data.sort(key=rank_of)
     
-    return [Section(**section) for section in sections_data]
+    return sections_data
 
 @app.patch("/meetings/{meeting_id}/sections/{section_id}", response_model=Section, tags=["セクション"], summary="セクション更新", description="会議内の特定のセクションを更新する（順序の一貫性を保持）")
 async def update_section(meeting_id: str, section_id: str, sec: Section, user: User = Depends(get_current_user)):
     # Check if section exists in mock data
     section_exists = False
-    for s in mock_sections.get(meeting_id, []):
-        if s.id == section_id:
-            section_exists = True
-            old_order = s.order
-            
-            # Update section data
-            s.title = sec.title
-            s.status = sec.status  # ステータスも更新
-            
-            # If order has changed, ensure consistency
-            if s.order != sec.order:
-                await update_section_order(meeting_id, section_id, sec.order)
-            else:
-                s.order = sec.order
-                
-            return s
+    s = repository.get_section(section_id, meeting_id)
+    if s:
+        section_exists = True
+        
+        # Update section data
+        repository.update_section(section_id, title=sec.title, status=sec.status)  # ステータスも更新
+        
+        # If order has changed, ensure consistency
+        if s.order != sec.order:
+            await update_section_order(meeting_id, section_id, sec.order)
+        
+        await invalidate_meeting_cache(meeting_id)
+        await change_log.append(meeting_id, ('section', OP_SET, section_id, s.dict()))
+        return s
             
     # If we're using Firestore and section wasn't found in mock data
     if USE_FIRESTORE:
@@ -1262,23 +1479,76 @@ async def update_section(meeting_id: str, section_id: str, sec: Section, user: U
             section_data['title'] = sec.title
             section_data['status'] = sec.status  # ステータスも更新
             
-            # If order has changed, ensure consistency
+            # order が変わった場合は並びのキーも作り直す（他のセクションは書き換えない）
             if section_data.get('order') != sec.order:
-                await update_section_order(meeting_id, section_id, sec.order)
-            else:
                 section_data['order'] = sec.order
-                await update_document('sections', section_id, section_data)
+                section_data['rank'] = rank_from_order(sec.order)
+            await persist_document(meeting_id, OP_UPDATE, 'sections', section_id, section_data)
+            
+            await invalidate_meeting_cache(meeting_id)
                 
             # Return updated section
-            return Section(
+            updated_section = Section(
                 id=section_id, 
                 title=sec.title, 
                 order=sec.order, 
-                status=sec.status
+                status=sec.status,
+                rank=section_data.get('rank')
             )
-    
+            await change_log.append(meeting_id, ('section', OP_SET, section_id, updated_section.dict()))
+            return updated_section
+
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
+@app.post("/meetings/{meeting_id}/sections/{section_id}/move", response_model=Section, tags=["セクション"], summary="セクション並べ替え", description="セクションを指定したセクションの前後に移動する")
+async def move_section(
+    meeting_id: str,
+    section_id: str,
+    after_id: Optional[str] = Query(None, description="このセクションの直後に移動する"),
+    before_id: Optional[str] = Query(None, description="このセクションの直前に移動する（after_id を指定しない場合）"),
+    user: User = Depends(get_current_user)
+):
+    """
+    セクションを並べ替えます。どちらも指定しない場合は末尾に移動します。
+    書き換えるのは移動するセクションの `rank` のみで、`order` は変わりません（キーの間が詰まった場合のみ全体を振り直します）。
+    """
+    sections_data = await load_sections_data(meeting_id)
+    section = next((section for section in sections_data if section['id'] == section_id), None)
+    if section is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    siblings = [sibling for sibling in sections_data if sibling['id'] != section_id]
+    try:
+        index = insert_index(siblings, after_id, before_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anchor section not found")
+
+    moves = plan_move(siblings, section_id, index)
+    await apply_moves(meeting_id, 'sections', moves)
+    await invalidate_meeting_cache(meeting_id)
+    return Section(**{**section, **moves[section_id]})
+
+@app.delete("/meetings/{meeting_id}/sections/{section_id}", tags=["セクション"], summary="セクション削除", description="会議からセクションを削除する（セクション内の項目も削除）")
+async def delete_section(meeting_id: str, section_id: str, response: Response, user: User = Depends(get_current_user)):
+    """
+    応答は会議削除と同じです（項目が多い場合は 202 とジョブを返し、バックグラウンドで削除を続けます）。
+    項目の削除が失敗した場合は、同じリクエストを再度送ると残った項目を削除します。
+    """
+    section_exists = repository.get_section(section_id, meeting_id) is not None
+    if not section_exists and USE_FIRESTORE:
+        section_data = await get_document('sections', section_id)
+        section_exists = bool(section_data) and section_data.get('meeting_id') == meeting_id
+    if not section_exists and USE_FIRESTORE:
+        # 前回の削除が途中で失敗した場合（セクションは削除済みで項目が残っている）は、もう一度削除する
+        item_ids = await firestore_store.query_ids('items', 'section_id', section_id)
+        item_data = await get_document('items', item_ids[0]) if item_ids else None
+        section_exists = bool(item_data) and item_data.get('meeting_id') == meeting_id
+    if not section_exists:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    # セクションと項目を削除（キャッシュの無効化を含む）
+    job = await delete_section_with_items(meeting_id, section_id)
+    return delete_response(job, response)
+
 # セクションの会議アシスト情報を取得するエンドポイント
 @app.get("/meetings/{meeting_id}/sections/{section_id}/assist", tags=["会議アシスト"], summary="セクション会議アシスト取得", description="会議内の特定のセクションの会議アシスト情報を取得する")
 async def get_section_assist(meeting_id: str, section_id: str, user: User = Depends(get_current_user)):
@@ -1290,23 +1560,34 @@ async def get_section_assist(meeting_id: str, section_id: str, user: User = Depe
     WebSocketを使用している場合は、セクションのステータス変更イベントとともに会議アシスト情報も送信されるため、
     通常はこのエンドポイントを明示的に呼び出す必要はありません。
     """
-    # キャッシュからデータを取得
-    cache_key = f"section_assist:{section_id}"
-    cached_assist = await cache_manager.get(cache_key)
+    # キャッシュから取得し、なければ生成してキャッシュ（5分間）
+    # 同時のキャッシュミスは1回の生成に集約される
+    # 生成コストが高いため会議の世代には含めず、会議中の編集のたびに再生成しない
+    # 存在しないセクションは墓標をキャッシュする（会議の作成時に削除する）
+    assist_data = await cached_section_assist(meeting_id, section_id)
     
-    if cached_assist:
-        return MeetingAssist(**cached_assist)
+    if assist_data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="指定されたセクションが見つかりません")
     
+    return MeetingAssist(**assist_data)
+
+async def cached_section_assist(meeting_id: str, section_id: str) -> Optional[Dict[str, Any]]:
+    """セクションの会議アシスト情報をキャッシュから取得し、なければ生成してキャッシュする"""
+    return await cache_manager.get_or_compute(
+        f"section_assist:{section_id}", lambda: build_section_assist(meeting_id, section_id),
+        ttl=300, cache_misses=True)
+
+async def build_section_assist(meeting_id: str, section_id: str) -> Optional[Dict[str, Any]]:
+    """セクションの会議アシスト情報を生成する（セクションがなければ None）"""
     # セクションデータを取得
     section_found = False
     section_title = ""
     
     # モックデータから検索
-    for s in mock_sections.get(meeting_id, []):
-        if s.id == section_id:
-            section_found = True
-            section_title = s.title
-            break
+    s = repository.get_section(section_id, meeting_id)
+    if s:
+        section_found = True
+        section_title = s.title
     
     # Firestoreから検索（モックデータになければ）
     if not section_found and USE_FIRESTORE:
@@ -1316,15 +1597,12 @@ async def get_section_assist(meeting_id: str, section_id: str, user: User = Depe
             section_title = section_data.get('title', '')
     
     if not section_found:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="指定されたセクションが見つかりません")
+        return None
     
     # 会議アシスト情報を生成
     assist_info = await generate_meeting_assist(meeting_id, section_id, section_title)
     
-    # キャッシュに保存
-    await cache_manager.set(cache_key, assist_info.dict(), ttl=300)  # 5分間キャッシュ
-    
-    return assist_info
+    return assist_info.dict()
 
 @app.patch("/meetings/{meeting_id}/sections/{section_id}/status", tags=["セクション"], summary="セクションステータス更新", description="会議内の特定のセクションのステータスを更新する")
 async def update_section_status(
@@ -1351,15 +1629,10 @@ async def update_section_status(
         )
     
     # モックデータの更新
-    section_found = False
-    updated_section = None
-    
-    for s in mock_sections.get(meeting_id, []):
-        if s.id == section_id:
-            section_found = True
-            s.status = status
-            updated_section = s
-            break
+    updated_section = repository.get_section(section_id, meeting_id)
+    section_found = updated_section is not None
+    if updated_section:
+        repository.update_section(section_id, status=status)
     
     # Firestoreの更新
     if not section_found and USE_FIRESTORE:
@@ -1367,23 +1640,23 @@ async def update_section_status(
         if section_data and section_data.get('meeting_id') == meeting_id:
             section_found = True
             section_data['status'] = status
-            await update_document('sections', section_id, section_data)
+            await persist_document(meeting_id, OP_UPDATE, 'sections', section_id, section_data)
             
             # 更新されたセクションを返すためのオブジェクトを作成
             updated_section = Section(
                 id=section_id,
                 title=section_data.get('title', ''),
                 order=section_data.get('order', 0),
-                status=status
+                status=status,
+                rank=section_data.get('rank')
             )
     
     if not section_found:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="指定されたセクションが見つかりません")
     
-    # キャッシュを更新
-    await cache_manager.delete(f"section:{section_id}")
-    await cache_manager.delete(f"sections:{meeting_id}")
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
+    # キャッシュを更新（セクション一覧・ステータス一覧・会議データ全体をまとめて無効化）
+    await invalidate_meeting_cache(meeting_id)
+    await change_log.append(meeting_id, ('section', OP_UPDATE, section_id, {"status": status}))
     
     # WebSocketでステータス変更と会議アシスト情報を通知
     await websocket_manager.send_section_assist(meeting_id, section_id, status)
@@ -1391,24 +1664,43 @@ async def update_section_status(
     return updated_section
 
 @app.get("/meetings/{meeting_id}/sections/status", tags=["セクション"], summary="セクションステータス一覧", description="特定の会議の全てのセクションのステータスを取得する")
-async def list_section_statuses(meeting_id: str, user: User = Depends(get_current_user)):
+async def list_section_statuses(
+    meeting_id: str,
+    if_none_match: Optional[str] = Header(None, description="前回のレスポンスの ETag（変更がなければ 304 を返す）"),
+    user: User = Depends(get_current_user),
+):
     """
     特定の会議の全てのセクションのステータスを取得します。
     軽量な応答を返すため、セクションのIDとステータスのみを含みます。
+    If-None-Match が ETag と一致する場合は 304 Not Modified を返します。
     """
-    # キャッシュからデータを取得
-    cache_key = f"section_statuses:{meeting_id}"
-    cached_statuses = await cache_manager.get(cache_key)
-    
-    if cached_statuses:
-        return cached_statuses
-    
+    # キャッシュから取得し、なければ集計してキャッシュ
+    tagged = await tagged_section_statuses(meeting_id, if_none_match)
+    if tagged.not_modified:
+        return not_modified_response(tagged.etag)
+    if tagged.value is None:
+        return []
+    return tagged_response(tagged)
+
+async def cached_section_statuses(meeting_id: str) -> Optional[List[Dict[str, Any]]]:
+    """セクションのステータス一覧をキャッシュから取得し、なければ集計してキャッシュする"""
+    return (await tagged_section_statuses(meeting_id)).value
+
+async def tagged_section_statuses(meeting_id: str, if_none_match: Optional[str] = None) -> TaggedValue:
+    """セクションのステータス一覧とそのETagを取得する（If-None-Match が一致すれば値は読み込まない）"""
+    cache_key = await cache_manager.meeting_key(meeting_id, f"section_statuses:{meeting_id}")
+    return await cache_manager.get_or_compute_tagged(
+        cache_key, lambda: load_section_statuses(meeting_id), if_none_match=if_none_match,
+        ttl=15, meeting_id=meeting_id)  # 基準は15秒
+
+async def load_section_statuses(meeting_id: str) -> List[Dict[str, Any]]:
+    """セクションのID・タイトル・順序・ステータスをモックデータまたはFirestoreから取得する"""
     # セクションデータを取得
     section_statuses = []
     
     # モックデータから検索
-    if meeting_id in mock_sections:
-        for section in mock_sections[meeting_id]:
+    if repository.has_sections(meeting_id):
+        for section in repository.list_sections(meeting_id):
             section_statuses.append({
                 "id": section.id,
                 "title": section.title,
@@ -1420,106 +1712,110 @@ async def list_section_statuses(meeting_id: str, user: User = Depends(get_curren
     elif USE_FIRESTORE:
         sections = await query_collection('sections', 'meeting_id', meeting_id)
         if sections:
-            for section in sections:
+            # セクションを順序でソート
+            for section in sorted(sections, key=rank_of):
                 section_statuses.append({
                     "id": section.get('id'),
                     "title": section.get('title'),
                     "order": section.get('order', 0),
                     "status": section.get('status', 'not_started')
                 })
-            
-            # セクションを順序でソート
-            section_statuses.sort(key=lambda x: x.get('order', 0))
-    
-    # キャッシュに保存（短めのTTL）
-    if section_statuses:
-        await cache_manager.set(cache_key, section_statuses, ttl=15)  # 15秒間キャッシュ
     
     return section_statuses
 
-@app.get("/meetings/{meeting_id}/sections/{section_id}/items", response_model=list[Item], tags=["項目"], summary="項目一覧", description="特定のセクションの全ての項目を取得する")
-async def list_items(meeting_id: str, section_id: str, user: User = Depends(get_current_user)):
-    # キャッシュからデータを取得
-    cache_key = f"items:{section_id}"
-    cached_items = await cache_manager.get(cache_key)
-    
-    if cached_items:
-        return [Item(**item) for item in cached_items]
-    
-    # キャッシュになければモックデータまたはFirestoreから取得
+@app.get("/meetings/{meeting_id}/sections/{section_id}/items", response_model=list[Item], tags=["項目"], summary="項目一覧", description="特定のセクションの項目を並び順にページ単位で取得する")
+async def list_items(
+    meeting_id: str,
+    section_id: str,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX, description="1ページの件数"),
+    cursor: Optional[str] = Query(None, description="前のページのレスポンスヘッダー X-Next-Cursor の値"),
+    user: User = Depends(get_current_user)
+):
+    scope = f"items:{section_id}"
+    after = decode_page_cursor(cursor, scope, {})
+    # キャッシュから取得し、なければモックデータまたはFirestoreから取得してキャッシュ
+    # 項目がない（セクションが存在しない）場合は墓標をキャッシュする（add_item で世代が更新されると消える）
+    items_data = await cached_items(meeting_id, section_id)
+    
+    # キャッシュは (rank, id) の順に並んでいるため、カーソルの位置を二分探索して1ページ分を返す
+    items_data, next_key = page_sorted(items_data or [], item_page_key, limit, after)
+    set_next_cursor(response, scope, {}, next_key)
+    return [Item(**item) for item in items_data]
+
+def item_page_key(item: Dict[str, Any]) -> tuple:
+    return (rank_of(item), item['id'])
+
+async def cached_items(meeting_id: str, section_id: str) -> Optional[List[Dict[str, Any]]]:
+    """項目一覧をキャッシュから取得し、なければ取得してキャッシュする"""
+    cache_key = await cache_manager.meeting_key(meeting_id, f"items:{section_id}")
+    return await cache_manager.get_or_compute(
+        cache_key, lambda: load_items_data(meeting_id, section_id), entity_type='item', cache_misses=True,
+        meeting_id=meeting_id)
+
+async def load_items_data(meeting_id: str, section_id: str) -> List[Dict[str, Any]]:
+    """項目一覧をモックデータまたはFirestoreから (rank, id) の順に取得する（ページングのキーの順）"""
     items_data = []
     
-    # モックデータから検索
-    if section_id in mock_items:
-        items_data = [item.dict() for item in mock_items[section_id]]
+    # モックデータから検索（rank 順に索引されている）
+    items_data = [item.dict() for item in repository.list_items(section_id)]
     
     # Firestoreから検索（モックデータになければ）
     if not items_data and USE_FIRESTORE:
-        items = await query_collection('items', 'section_id', section_id)
+        items = await query_collection('items', 'section_id', section_id, meeting_id)
         if items:
             items_data = items
-            # 項目を順序でソート
-            items_data.sort(key=lambda x: x.get('order', 0))
     
-    # キャッシュに保存
-    if items_data:
-        await cache_manager.set(cache_key, items_data, entity_type='item')
-        
-        # セクションデータとの依存関係を設定
-        section_key = f"section:{section_id}"
-        for item in items_data:
-            item_key = f"item:{item['id']}"
-            await cache_manager.add_dependency(section_key, item_key)
-    
-    return [Item(**item) for item in items_data]
+    # rank が同じ項目はIDの順（モックデータは rank 順に並んでいるため、ほぼ整列済み）
+    items_data.sort(key=item_page_key)
+    return items_data
 
 @app.post("/meetings/{meeting_id}/sections/{section_id}/items", response_model=Item, tags=["項目"], summary="項目追加", description="セクションに新しい項目を追加する")
 async def add_item(meeting_id: str, section_id: str, it: Item, user: User = Depends(get_current_user)):
-    # モックデータに追加
-    mock_items.setdefault(section_id, []).append(it)
+    # モックデータに追加（パスのセクションに属する項目として索引する）
+    it.section_id = section_id
+    repository.put_item(it)
     
     # Firestoreに追加
     if USE_FIRESTORE:
         item_data = it.dict()
         item_data['meeting_id'] = meeting_id  # 検索効率化のため会議IDも保存
-        await set_document('items', it.id, item_data)
+        await persist_document(meeting_id, OP_SET, 'items', it.id, item_data)
     
     # キャッシュを無効化
-    await cache_manager.delete(f"items:{section_id}")
-    
-    # 依存関係を更新
-    item_key = f"item:{it.id}"
-    section_key = f"section:{section_id}"
-    await cache_manager.add_dependency(section_key, item_key)
+    await invalidate_meeting_cache(meeting_id)
+    await change_log.append(meeting_id, ('item', OP_SET, it.id, it.dict()))
     
     return it
 
 @app.patch("/meetings/{meeting_id}/sections/{section_id}/items/{item_id}", response_model=Item, tags=["項目"], summary="項目更新", description="セクション内の既存の項目を更新する")
 async def update_item(meeting_id: str, section_id: str, item_id: str, it: Item, user: User = Depends(get_current_user)):
     # モックデータを更新
-    item_found = False
-    items = mock_items.get(section_id, [])
-    for existing in items:
-        if existing.id == item_id:
-            item_found = True
-            existing.order = it.order
-            existing.text = it.text
-            updated_item = existing
-            break
+    updated_item = repository.get_item(item_id, section_id)
+    item_found = updated_item is not None
+    if updated_item:
+        if updated_item.order != it.order:
+            # order が変わった場合は並びのキーも作り直す（他の項目は書き換えない）
+            repository.update_item(item_id, order=it.order, rank=rank_from_order(it.order), text=it.text)
+        else:
+            repository.update_item(item_id, text=it.text)
     
     # Firestoreを更新
     if not item_found and USE_FIRESTORE:
         item_data = await get_document('items', item_id)
         if item_data and item_data.get('section_id') == section_id:
             item_found = True
-            item_data['order'] = it.order
+            if item_data.get('order') != it.order:
+                item_data['order'] = it.order
+                item_data['rank'] = rank_from_order(it.order)
             item_data['text'] = it.text
-            await update_document('items', item_id, item_data)
+            await persist_document(meeting_id, OP_UPDATE, 'items', item_id, item_data)
             updated_item = Item(
                 id=item_id,
                 section_id=section_id,
                 text=it.text,
-                order=it.order
+                order=it.order,
+                rank=item_data.get('rank')
             )
     
     if not item_found:
@@ -1531,51 +1827,56 @@ async def update_item(meeting_id: str, section_id: str, item_id: str, it: Item,
     await cache_manager.set(item_key, item_data, entity_type='item')
     
     # 関連キャッシュを無効化
-    await cache_manager.delete(f"items:{section_id}")
+    await invalidate_meeting_cache(meeting_id)
+    await change_log.append(meeting_id, ('item', OP_SET, item_id, item_data))
     
     return updated_item
 
 @app.delete("/meetings/{meeting_id}/sections/{section_id}/items/{item_id}", tags=["項目"], summary="項目削除", description="セクションから項目を削除する")
 async def delete_item(meeting_id: str, section_id: str, item_id: str, user: User = Depends(get_current_user)):
     # Check if item exists in mock data
-    item_exists = False
-    item_data = None
-    
-    items = mock_items.get(section_id, [])
-    for existing in items:
-        if existing.id == item_id:
-            item_exists = True
-            item_data = existing
-            items.remove(existing)
-            return {"detail": "deleted"}
+    if repository.get_item(item_id, section_id):
+        repository.delete_item(item_id)
+        await invalidate_meeting_cache(meeting_id)
+        await change_log.append(meeting_id, ('item', OP_DELETE, item_id, {"section_id": section_id}))
+        return {"detail": "deleted"}
             
     # If we're using Firestore and item wasn't found in mock data
     if USE_FIRESTORE:
         # Delete item from Firestore
         item_data = await get_document('items', item_id)
         if item_data and item_data.get('section_id') == section_id:
-            await delete_document('items', item_id)
+            await persist_document(meeting_id, OP_DELETE, 'items', item_id)
+            await invalidate_meeting_cache(meeting_id)
+            await change_log.append(meeting_id, ('item', OP_DELETE, item_id, {"section_id": section_id}))
             return {"detail": "deleted"}
     
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-@app.post("/meetings/{meeting_id}/sections/{section_id}/items/{item_id}/move", response_model=Item, tags=["項目"], summary="項目移動", description="項目を別のセクションに移動する")
-async def move_item(meeting_id: str, section_id: str, item_id: str, target_section_id: str, user: User = Depends(get_current_user)):
+@app.post("/meetings/{meeting_id}/sections/{section_id}/items/{item_id}/move", response_model=Item, tags=["項目"], summary="項目移動", description="項目を別のセクション（または同じセクション内の別の位置）に移動する")
+async def move_item(
+    meeting_id: str,
+    section_id: str,
+    item_id: str,
+    target_section_id: str,
+    after_id: Optional[str] = Query(None, description="移動先のセクションでこの項目の直後に置く"),
+    before_id: Optional[str] = Query(None, description="移動先のセクションでこの項目の直前に置く（after_id を指定しない場合）"),
+    user: User = Depends(get_current_user)
+):
     """
     項目を別のセクションに移動します。
     - section_id: 現在の項目が属するセクションID
     - item_id: 移動する項目のID
-    - target_section_id: 移動先のセクションID (クエリパラメータ)
+    - target_section_id: 移動先のセクションID (クエリパラメータ)。同じセクションを指定すると並べ替えになる
+    - after_id / before_id: 移動先での位置（どちらも指定しない場合は末尾）
+
+    書き換えるのは移動する項目の `section_id`・`rank` のみで、`order` は変わりません（キーの間が詰まった場合のみ移動先の全体を振り直します）。
     """
     # Validate target section exists
     target_section_exists = False
     
     # Check in mock data
-    if meeting_id in mock_sections:
-        for s in mock_sections[meeting_id]:
-            if s.id == target_section_id:
-                target_section_exists = True
-                break
+    target_section_exists = repository.get_section(target_section_id, meeting_id) is not None
                 
     # Check in Firestore if using it
     if not target_section_exists and USE_FIRESTORE:
@@ -1586,75 +1887,72 @@ async def move_item(meeting_id: str, section_id: str, item_id: str, target_secti
     if not target_section_exists:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target section not found")
     
-    # Find the item to move
-    item_found = False
-    item_data = None
-    
-    # Check in mock data
-    if section_id in mock_items:
-        for item in mock_items[section_id]:
-            if item.id == item_id:
-                item_found = True
-                item_data = item
-                # Remove from current section
-                mock_items[section_id].remove(item)
-                # Add to target section with same properties
-                if target_section_id not in mock_items:
-                    mock_items[target_section_id] = []
-                # Update section_id
-                new_item = Item(
-                    id=item.id,
-                    section_id=target_section_id,
-                    text=item.text,
-                    order=item.order
-                )
-                mock_items[target_section_id].append(new_item)
-                return new_item
+    # Find the item to move (mock data first, then Firestore)
+    item = repository.get_item(item_id, section_id)
+    item_data = item.dict() if item else None
+    if item_data is None and USE_FIRESTORE:
+        item_data = await get_document('items', item_id)
+    if not item_data or item_data.get('section_id') != section_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
     
-    # Check in Firestore if using it
-    if not item_found and USE_FIRESTORE:
-        item = await get_document('items', item_id)
-        if item and item.get('section_id') == section_id:
-            item_found = True
-            # Update section_id in Firestore
-            item['section_id'] = target_section_id
-            await update_document('items', item_id, item)
-            return Item(
-                id=item_id,
-                section_id=target_section_id,
-                text=item['text'],
-                order=item['order']
-            )
+    # 移動先の並び（移動する項目を除く）の中の位置を決める
+    siblings = [sibling for sibling in await load_items_data(meeting_id, target_section_id) if sibling['id'] != item_id]
+    try:
+        index = insert_index(siblings, after_id, before_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Anchor item not found")
     
-    if not item_found:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    moves = plan_move(siblings, item_id, index)
+    moves[item_id]['section_id'] = target_section_id
+    await apply_moves(meeting_id, 'items', moves)
+    await invalidate_meeting_cache(meeting_id)
+    return Item(**{**item_data, **moves[item_id]})
 
 # ----- Task Endpoints -----
-@app.get("/meetings/{meeting_id}/tasks", response_model=list[Task], tags=["タスク"], summary="タスク一覧", description="特定の会議の全てのタスクを取得する")
-def list_tasks(meeting_id: str, user: User = Depends(get_current_user)):
-    return mock_tasks.get(meeting_id, [])
+@app.get("/meetings/{meeting_id}/tasks", response_model=list[Task], tags=["タスク"], summary="タスク一覧", description="特定の会議のタスクを追加順にページ単位で取得する（条件で絞り込み可能）")
+def list_tasks(
+    meeting_id: str,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX, description="1ページの件数"),
+    cursor: Optional[str] = Query(None, description="前のページのレスポンスヘッダー X-Next-Cursor の値"),
+    status_filter: Optional[str] = Query(None, alias="status", description="タスクステータスで絞り込む"),
+    assignee: Optional[str] = Query(None, description="担当者で絞り込む"),
+    user: User = Depends(get_current_user)
+):
+    filters = {"status": status_filter, "assignee": assignee}
+    scope = f"tasks:{meeting_id}"
+    after = decode_page_cursor(cursor, scope, filters)
+    tasks, next_key = repository.page_tasks(meeting_id, limit, after, **filters)
+    set_next_cursor(response, scope, filters, next_key)
+    return tasks
 
 @app.post("/meetings/{meeting_id}/tasks", response_model=Task, tags=["タスク"], summary="タスク追加", description="会議に新しいタスクを追加する")
-def add_task(meeting_id: str, t: Task, user: User = Depends(get_current_user)):
-    mock_tasks.setdefault(meeting_id, []).append(t)
+async def add_task(meeting_id: str, t: Task, user: User = Depends(get_current_user)):
+    repository.put_task(meeting_id, t)
+    await invalidate_meeting_cache(meeting_id)
+    await change_log.append(meeting_id, ('task', OP_SET, t.id, t.dict()))
     return t
 
 @app.patch("/meetings/{meeting_id}/tasks/{task_id}", response_model=Task, tags=["タスク"], summary="タスク更新", description="会議内の既存のタスクを更新する")
-def update_task(meeting_id: str, task_id: str, t: Task, user: User = Depends(get_current_user)):
-    tasks = mock_tasks.get(meeting_id, [])
-    for idx, existing in enumerate(tasks):
-        if existing.id == task_id:
-            tasks[idx] = t
-            return t
+async def update_task(meeting_id: str, task_id: str, t: Task, user: User = Depends(get_current_user)):
+    if repository.get_task(task_id, meeting_id):
+        changes = [('task', OP_SET, t.id, t.dict())]
+        if t.id != task_id:
+            repository.delete_task(task_id)
+            changes.insert(0, ('task', OP_DELETE, task_id, None))
+        repository.put_task(meeting_id, t)
+        await invalidate_meeting_cache(meeting_id)
+        await change_log.append(meeting_id, *changes)
+        return t
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
 @app.delete("/meetings/{meeting_id}/tasks/{task_id}", tags=["タスク"], summary="タスク削除", description="会議からタスクを削除する")
-def delete_task(meeting_id: str, task_id: str, user: User = Depends(get_current_user)):
-    tasks = mock_tasks.get(meeting_id, [])
-    for existing in tasks:
-        if existing.id == task_id:
-            tasks.remove(existing)
-            return {"detail": "deleted"}
+async def delete_task(meeting_id: str, task_id: str, user: User = Depends(get_current_user)):
+    if repository.get_task(task_id, meeting_id):
+        repository.delete_task(task_id)
+        await invalidate_meeting_cache(meeting_id)
+        await change_log.append(meeting_id, ('task', OP_DELETE, task_id, None))
+        return {"detail": "deleted"}
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
 # ----- Meeting Assist Endpoints -----
@@ -1672,13 +1970,7 @@ async def send_meeting_assist(
     LLMによって生成された会議アシスト情報をバックエンドからフロントエンドに送信します。
     """
     # 会議の存在確認
-    meeting_exists = False
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_exists = True
-            break
-    
-    if not meeting_exists:
+    if repository.get_meeting(meeting_id) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="指定された会議が見つかりません")
     
     # アシストタイプの検証
@@ -1713,13 +2005,7 @@ async def send_section_assist_info(
     バックエンドからフロントエンドに送信します。
     """
     # セクションの存在確認
-    section_exists = False
-    for s in mock_sections.get(meeting_id, []):
-        if s.id == section_id:
-            section_exists = True
-            break
-    
-    if not section_exists:
+    if repository.get_section(section_id, meeting_id) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="指定されたセクションが見つかりません")
     
     # ステータスの検証
@@ -1752,13 +2038,7 @@ async def send_assist_reminder_endpoint(
     バックエンドからフロントエンドに送信します。
     """
     # 会議の存在確認
-    meeting_exists = False
-    for meet in mock_meetings:
-        if meet.id == meeting_id:
-            meeting_exists = True
-            break
-    
-    if not meeting_exists:
+    if repository.get_meeting(meeting_id) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="指定された会議が見つかりません")
     
     # WebSocketで会議アシストリマインダーを送信
@@ -1770,6 +2050,60 @@ async def send_assist_reminder_endpoint(
         "section_id": section_id
     }
 
+# ----- Cache Endpoints -----
+@app.get("/cache/stats", tags=["キャッシュ"], summary="キャッシュ統計取得", description="L1（プロセス内）とL2（Redis）の階層ごとのヒット率などを取得する")
+def get_cache_stats(user: User = Depends(get_current_user)):
+    """
+    キャッシュの階層ごとの統計情報と、キープレフィックスごとの計測値を取得します。
+    値はこのワーカープロセスで計測したものです。L1のサイズやTTLの調整に使用してください。
+    """
+    return {
+        **cache_manager.get_stats(),
+        "write_behind": write_behind.get_stats(),
+        "prefetch": prefetcher.get_stats(),
+        "firestore": firestore_store.get_stats(),
+        "cascade_delete": cascade_deleter.get_stats(),
+        "change_log": change_log.get_stats(),
+    }
+
+@app.post("/cache/dependencies/sweep", tags=["キャッシュ"], summary="依存関係の掃除", description="参照先が存在しない依存関係を削除し、回収したメモリ量を返す")
+async def sweep_cache_dependencies(user: User = Depends(get_current_user)):
+    """
+    キャッシュ本体も依存関係セットも存在しない依存先を `deps:*` から削除します。
+    通常はバックグラウンドで定期的に実行されます（`CACHE_DEPENDENCY_SWEEP_INTERVAL`）。
+    """
+    return await cache_manager.sweep_dependencies()
+
+@app.get("/cache/ttl", tags=["キャッシュ"], summary="TTLの決定内容取得", description="TTLポリシーがキーごとに決めたTTLとその理由を取得する")
+def get_cache_ttl_decisions(
+    key: Optional[str] = Query(None, description="決定内容を確認するキャッシュキー（省略時は直近の決定の一覧）"),
+    prefix: Optional[str] = Query(None, description="一覧をキーの先頭で絞り込む（例: meeting_full:m1）"),
+    limit: int = Query(100, ge=1, le=1000, description="一覧の最大件数"),
+    user: User = Depends(get_current_user)
+):
+    """
+    会議のステータス・書き込み頻度・参照頻度からTTLポリシーが決めたTTLと、その根拠を返します。
+    決定内容はワーカープロセスごとに直近のもののみ保持されます。
+    """
+    if key is not None:
+        decision = cache_manager.ttl_policy.explain(key)
+        if decision is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="このワーカーではキーのTTLを決定していません")
+        return {"key": key, **decision.to_dict()}
+    return {
+        "policy": cache_manager.ttl_policy.snapshot(),
+        "decisions": cache_manager.ttl_policy.recent(limit, prefix),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["キャッシュ"], summary="メトリクス取得", description="キャッシュのメトリクスをPrometheusのテキスト形式で取得する")
+def get_metrics():
+    """
+    キープレフィックスごとのヒット・ミス・エラー数、レイテンシのヒストグラム、
+    読み書きしたバイト数、無効化の波及件数をPrometheusのテキスト形式で返します。
+    """
+    return (cache_manager.render_metrics() + write_behind.render_metrics() + prefetcher.render_metrics()
+            + firestore_store.render_metrics() + cascade_deleter.render_metrics() + change_log.render_metrics())
+
 # ----- Live WebSocket -----
 @app.websocket("/meetings/{meeting_id}/live")
 async def websocket_live(websocket: WebSocket, meeting_id: str):
@@ -1790,6 +2124,9 @@ async def websocket_live(websocket: WebSocket, meeting_id: str):
     # WebSocketマネージャーに接続を登録
     await websocket_manager.connect(websocket, meeting_id)
     
+    # 画面表示に必要なキャッシュを事前に読み込む（同じ会議の参加者間で1回にまとめられる）
+    prefetcher.schedule(meeting_id)
+    
     try:
         # 接続確立の通知
         await websocket.send_json({
@@ -1830,11 +2167,10 @@ async def websocket_live(websocket: WebSocket, meeting_id: str):
                 }
                 
                 # 実際のデータも更新
-                if meeting_id in mock_sections:
-                    for s in mock_sections[meeting_id]:
-                        if s.id == "s1":
-                            s.status = "in_progress"
-                            break
+                section = repository.get_section("s1", meeting_id)
+                if section is not None:
+                    section.status = "in_progress"
+                    await invalidate_meeting_cache(meeting_id)
                 
             elif seq == 3:
                 # 次のセクションへの移行時の会議アシスト
@@ -1849,12 +2185,13 @@ async def websocket_live(websocket: WebSocket, meeting_id: str):
                 }
                 
                 # セクションステータスを更新
-                if meeting_id in mock_sections:
-                    for s in mock_sections[meeting_id]:
+                if repository.has_sections(meeting_id):
+                    for s in repository.list_sections(meeting_id):
                         if s.id == "s1":
                             s.status = "completed"
                         elif s.id == "s2":
                             s.status = "in_progress"
+                    await invalidate_meeting_cache(meeting_id)
                 
             elif seq == 4:
                 # 新しい項目追加時の会議アシスト
@@ -1909,29 +2246,11 @@ async def websocket_live(websocket: WebSocket, meeting_id: str):
 
 # キャッシュ無効化ヘルパー関数
 async def invalidate_meeting_cache(meeting_id: str):
-    """会議関連の全てのキャッシュを無効化"""
-    # 個別のキャッシュを無効化
-    await cache_manager.delete(f"meeting:{meeting_id}")
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
-    
-    # 依存関係も無効化
-    await cache_manager.invalidate_with_dependencies(f"meeting:{meeting_id}")
-
-async def invalidate_section_cache(meeting_id: str, section_id: str):
-    """セクション関連のキャッシュを無効化"""
-    await cache_manager.delete(f"section:{section_id}")
-    await cache_manager.delete(f"sections:{meeting_id}")
-    await cache_manager.delete(f"section_statuses:{meeting_id}")  # セクションステータスのキャッシュも無効化
-    
-    # セクションリストのキャッシュも無効化
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
-
-async def invalidate_item_cache(section_id: str, item_id: str, meeting_id: str):
-    """項目関連のキャッシュを無効化"""
-    await cache_manager.delete(f"item:{item_id}")
-    await cache_manager.delete(f"items:{section_id}")
-    
-    # 親のキャッシュも無効化
-    await cache_manager.delete(f"section:{section_id}")
-    await cache_manager.delete(f"sections:{meeting_id}")
-    await cache_manager.delete(f"meeting_full:{meeting_id}")
+    """会議関連の全てのキャッシュを無効化
+    
+    会議・セクション・項目・タスク・録音状態への書き込み後に呼び出す。
+    会議から派生するキャッシュのキーは全て会議の世代番号を含むため、
+    世代を1つ進めるだけで会議データ・会議データ全体・セクション一覧・ステータス一覧・
+    項目一覧がまとめて無効化される。
+    """
+    await cache_manager.bump_generation(meeting_id)
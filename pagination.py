@@ -0,0 +1,59 @@
+import base64
+import bisect
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 1ページの件数（limit を省略した場合）と上限
+PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 100))
+PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 500))
+
+# 次のページのカーソルを返すレスポンスヘッダー
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class CursorError(ValueError):
+    """カーソルが不正、または発行したときと一覧・絞り込み条件が異なる"""
+
+
+def _fingerprint(scope: str, filters: Dict[str, Any]) -> str:
+    payload = json.dumps([scope, filters], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def encode_cursor(scope: str, filters: Dict[str, Any], key: Sequence[Any]) -> str:
+    """前のページの最後のキーを不透明なカーソルにする
+
+    scope（一覧の種類と親のID）と絞り込み条件の指紋を含め、別の一覧・条件では使えないようにする。
+    """
+    payload = json.dumps({"k": list(key), "f": _fingerprint(scope, filters)}, separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], scope: str, filters: Dict[str, Any]) -> Optional[tuple]:
+    """カーソルから前のページの最後のキーを取り出す（cursor が None の場合は None）"""
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key, fingerprint = payload["k"], payload["f"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {e}")
+    if fingerprint != _fingerprint(scope, filters) or not isinstance(key, list):
+        raise CursorError("Cursor does not match this list or its filters")
+    return tuple(key)
+
+
+def page_sorted(rows: List[Any], key: Callable[[Any], tuple], limit: int,
+                after: Optional[tuple] = None) -> Tuple[List[Any], Optional[tuple]]:
+    """key の昇順に並んだ rows から、after より後ろを最大 limit 件取得する
+
+    返り値: (1ページ分の行, 続きがある場合は最後の行のキー)
+    """
+    start = bisect.bisect_right(rows, after, key=key) if after else 0
+    page = rows[start:start + limit]
+    if start + limit >= len(rows):
+        return page, None
+    return page, key(page[-1])
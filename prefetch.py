@@ -0,0 +1,158 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from cache_metrics import Histogram
+
+# 事前読み込み1回あたりの所要時間（秒）のバケット上限
+PREFETCH_DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class CachePrefetcher:
+    """会議のキャッシュをバックグラウンドで事前に読み込むクラス
+
+    会議の開始時やWebSocketの接続時に schedule() を呼ぶと、最初の画面表示で必要になる
+    キャッシュを warm(meeting_id, run) で埋める。warm には、渡したコルーチンを
+    同時実行数の上限（全会議で共有）の範囲で並行に実行する run が渡される。
+
+    同じ会議の事前読み込みは、プロセス内では実行中のタスクで、ワーカー間では
+    会議の世代ごとのRedisのキー（prefetch:{meeting_id}:g{世代}）で1回にまとめる。
+    世代が進んだ（キャッシュが無効化された）後は改めて読み込む。実行中に再度要求された場合は、
+    終わった後にもう一度（世代が変わっていれば）読み込む。
+    """
+
+    def __init__(self, cache_manager, warm: Callable[[str, Callable[..., Awaitable[List[Any]]]], Awaitable[None]]):
+        self.cache = cache_manager
+        self.warm = warm
+        self.prefix = 'prefetch:'
+        # 0 の場合は事前読み込みを行わない
+        self.concurrency = int(os.environ.get('CACHE_PREFETCH_CONCURRENCY', 8))
+        # 同じ会議・世代の事前読み込みを他のワーカーと重複させない期間（秒）
+        self.dedupe_ttl = float(os.environ.get('CACHE_PREFETCH_DEDUPE_TTL', 30))
+        self._semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # 実行中に再度要求された会議（終了後に改めて確認する）
+        self._requested_again: Set[str] = set()
+
+        self.scheduled = 0
+        self.deduplicated = {"local": 0, "remote": 0}
+        self.completed = 0
+        self.failed = 0
+        self.keys_warmed = 0
+        self.key_errors = 0
+        self.duration = Histogram(PREFETCH_DURATION_BUCKETS)
+        self.last_prefetch: Optional[Dict[str, Any]] = None
+
+    def schedule(self, meeting_id: str) -> None:
+        """会議の事前読み込みをバックグラウンドで開始する（実行中なら終了後に改めて確認する）"""
+        if self.concurrency <= 0:
+            return
+        if meeting_id in self._tasks:
+            self.deduplicated["local"] += 1
+            self._requested_again.add(meeting_id)
+            return
+        self.scheduled += 1
+        task = asyncio.create_task(self._prefetch(meeting_id))
+        self._tasks[meeting_id] = task
+        task.add_done_callback(lambda t: self._on_done(meeting_id, t))
+
+    def _on_done(self, meeting_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(meeting_id) is task:
+            del self._tasks[meeting_id]
+        if task.cancelled():
+            self._requested_again.discard(meeting_id)
+            return
+        if task.exception() is not None:
+            self.failed += 1
+            print(f"Cache prefetch error for meeting {meeting_id}: {task.exception()}")
+        if meeting_id in self._requested_again:
+            # 実行中に世代が進んでいる可能性があるため、もう一度確認する（同じ世代なら重複として省かれる）
+            self._requested_again.discard(meeting_id)
+            self.schedule(meeting_id)
+
+    async def _prefetch(self, meeting_id: str) -> None:
+        generation = await self.cache.get_generation(meeting_id)
+        claim_key = f"{self.prefix}{meeting_id}:g{generation}"
+        if not await self.cache.claim(claim_key, self.dedupe_ttl):
+            self.deduplicated["remote"] += 1
+            return
+
+        started = time.perf_counter()
+        before = (self.keys_warmed, self.key_errors)
+        await self.warm(meeting_id, self.run)
+        elapsed = time.perf_counter() - started
+        self.duration.observe(elapsed)
+        self.completed += 1
+        self.last_prefetch = {
+            "meeting_id": meeting_id,
+            "generation": generation,
+            "at": time.time(),
+            "seconds": elapsed,
+            "keys": self.keys_warmed - before[0],
+            "errors": self.key_errors - before[1],
+        }
+
+    async def run(self, *coroutines: Awaitable[Any]) -> List[Any]:
+        """コルーチンを同時実行数の上限の範囲で並行に実行し、結果を順に返す（失敗したものは None）"""
+        async def bounded(coroutine: Awaitable[Any]) -> Any:
+            async with self._semaphore:
+                try:
+                    result = await coroutine
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.key_errors += 1
+                    print(f"Cache prefetch key error: {e}")
+                    return None
+                self.keys_warmed += 1
+                return result
+
+        return list(await asyncio.gather(*(bounded(c) for c in coroutines)))
+
+    async def stop(self) -> None:
+        """実行中の事前読み込みを止める（アプリ終了時に呼び出す）"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._requested_again.clear()
+
+    # ----- 統計 -----
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "dedupe_ttl": self.dedupe_ttl,
+            "running": len(self._tasks),
+            "scheduled": self.scheduled,
+            "deduplicated": dict(self.deduplicated),
+            "completed": self.completed,
+            "failed": self.failed,
+            "keys_warmed": self.keys_warmed,
+            "key_errors": self.key_errors,
+            "duration": self.duration.snapshot(),
+            "last_prefetch": self.last_prefetch,
+        }
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP cache_prefetch_scheduled_total Meeting prefetches started",
+            "# TYPE cache_prefetch_scheduled_total counter",
+            f"cache_prefetch_scheduled_total {self.scheduled}",
+            "# HELP cache_prefetch_deduplicated_total Prefetch requests skipped because one was already running or done",
+            "# TYPE cache_prefetch_deduplicated_total counter",
+        ]
+        for scope, count in self.deduplicated.items():
+            lines.append(f'cache_prefetch_deduplicated_total{{scope="{scope}"}} {count}')
+        lines.extend([
+            "# HELP cache_prefetch_keys_total Cache keys filled (or found warm) by prefetching",
+            "# TYPE cache_prefetch_keys_total counter",
+            f'cache_prefetch_keys_total{{result="ok"}} {self.keys_warmed}',
+            f'cache_prefetch_keys_total{{result="error"}} {self.key_errors}',
+            "# HELP cache_prefetch_duration_seconds Time to prefetch one meeting",
+            "# TYPE cache_prefetch_duration_seconds histogram",
+        ])
+        lines.extend(self.duration.render("cache_prefetch_duration_seconds"))
+        return "\n".join(lines) + "\n"
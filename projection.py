@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# GET /meetings/{meeting_id}/full で会議データ以外に含められる部分（include= で指定する）
+PARTS = ('sections', 'items', 'tasks', 'recording_status')
+# fields[...] で返すフィールドを指定できるリソース
+RESOURCES = ('meeting', 'sections', 'items', 'tasks')
+# fields[...] の指定にかかわらず常に返すフィールド
+ALWAYS = ('id',)
+
+
+class ProjectionError(ValueError):
+    """include・fields の指定が不正（不明な部分・リソース・フィールド）"""
+
+
+def _split(value: str) -> List[str]:
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class Projection:
+    """会議データ全体のうち、取得・キャッシュ・返却する部分とフィールド
+
+    parts は含める部分（PARTS の部分集合）、fields はリソースごとに返すフィールド
+    （含まれないリソースは全フィールド）。items を含める場合は sections も含める。
+    """
+
+    def __init__(self, parts: Iterable[str] = PARTS, fields: Optional[Dict[str, Iterable[str]]] = None):
+        self.parts = frozenset(parts)
+        if 'items' in self.parts:
+            self.parts |= {'sections'}
+        self.fields: Dict[str, Tuple[str, ...]] = {
+            resource: tuple(sorted(set(names) | set(ALWAYS)))
+            for resource, names in (fields or {}).items()
+        }
+
+    @classmethod
+    def parse(cls, include: Optional[str], fields: Dict[str, Optional[str]],
+              allowed: Dict[str, Iterable[str]]) -> 'Projection':
+        """クエリパラメータの include と fields[リソース] から作る
+
+        include を省略した場合は全ての部分を含める。allowed はリソースごとに指定できるフィールド。
+        不明な部分・リソース・フィールドは ProjectionError を送出する。
+        """
+        parts = PARTS if include is None else _split(include)
+        unknown = [part for part in parts if part not in PARTS]
+        if unknown:
+            raise ProjectionError(f"Unknown include: {', '.join(unknown)}")
+        selected: Dict[str, List[str]] = {}
+        for resource, value in fields.items():
+            if value is None:
+                continue
+            if resource not in RESOURCES:
+                raise ProjectionError(f"Unknown resource in fields: {resource}")
+            names = _split(value)
+            unknown = [name for name in names if name not in allowed[resource]]
+            if unknown:
+                raise ProjectionError(f"Unknown fields[{resource}]: {', '.join(unknown)}")
+            selected[resource] = names
+        return cls(parts, selected)
+
+    @property
+    def is_full(self) -> bool:
+        """全ての部分を全フィールドで返す（従来のレスポンス）"""
+        return self.parts == frozenset(PARTS) and not self.fields
+
+    def key(self) -> str:
+        """キャッシュキーに付ける正規化した表記（指定の順序・重複によらず同じ）
+
+        例: include=tasks,sections&fields[items]=text → sections,tasks;items=id,text
+        """
+        parts = ','.join(part for part in PARTS if part in self.parts) or '-'
+        fields = ';'.join(f"{resource}={','.join(self.fields[resource])}"
+                          for resource in RESOURCES if resource in self.fields)
+        return f"{parts};{fields}" if fields else parts
+
+    def select(self, resource: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """リソースの辞書から指定されたフィールドだけを取り出す（指定がなければそのまま）"""
+        names = self.fields.get(resource)
+        if names is None:
+            return data
+        return {name: data[name] for name in names if name in data}
+
+    def apply(self, full_data: Dict[str, Any]) -> Dict[str, Any]:
+        """組み立てた会議データ全体から、含める部分と指定されたフィールドだけを残す"""
+        result: Dict[str, Any] = {"meeting": self.select('meeting', full_data["meeting"])}
+        if 'sections' in self.parts:
+            sections = []
+            for section in full_data.get("sections", []):
+                projected = dict(self.select('sections', section))
+                if 'items' in self.parts:
+                    projected["items"] = [self.select('items', item) for item in section.get("items", [])]
+                sections.append(projected)
+            result["sections"] = sections
+        if 'tasks' in self.parts:
+            result["tasks"] = [self.select('tasks', task) for task in full_data.get("tasks", [])]
+        if 'recording_status' in self.parts:
+            result["recording_status"] = full_data.get("recording_status", "stopped")
+        return result
+
+
+# 全ての部分を全フィールドで返す（従来の GET /meetings/{meeting_id}/full）
+FULL = Projection()
@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# 並びのキー（rank）に使う文字（ASCIIの昇順 = 文字列の比較順）
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+_INDEX = {digit: index for index, digit in enumerate(DIGITS)}
+
+# キーの先頭 ORDER_WIDTH 文字は order（整数）を固定長で表す
+ORDER_WIDTH = 4
+MAX_ORDER = BASE ** ORDER_WIDTH - 1
+# order から作るキーの末尾（前後どちらにも間を空ける）
+MID_DIGIT = DIGITS[BASE // 2]
+# これより長くなるキーは作らず、兄弟全体を振り直す
+MAX_RANK_LENGTH = 24
+
+
+class RankError(ValueError):
+    """2つのキーの間に新しいキーを作れない（同じキー・順序が逆・不正な文字）"""
+
+
+def rank_from_order(order: int) -> str:
+    """order（整数）に対応するキー。rank を持たないセクション・項目はこのキーで並ぶ"""
+    order = min(max(int(order), 0), MAX_ORDER)
+    digits = []
+    for _ in range(ORDER_WIDTH):
+        order, digit = divmod(order, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)) + MID_DIGIT
+
+
+def order_from_rank(rank: str) -> int:
+    """キーの先頭から order を取り出す（キーの順序と order の順序は一致する）"""
+    order = 0
+    for digit in rank[:ORDER_WIDTH].ljust(ORDER_WIDTH, DIGITS[0]):
+        order = order * BASE + _INDEX[digit]
+    return order
+
+
+def rank_of(entity: Any) -> str:
+    """セクション・項目（モデルまたは辞書）の並びのキー"""
+    if isinstance(entity, dict):
+        rank, order = entity.get('rank'), entity.get('order', 0)
+    else:
+        rank, order = getattr(entity, 'rank', None), getattr(entity, 'order', 0)
+    return rank or rank_from_order(order or 0)
+
+
+def _id_of(entity: Any) -> str:
+    return entity['id'] if isinstance(entity, dict) else entity.id
+
+
+def rank_between(lower: Optional[str], upper: Optional[str]) -> str:
+    """lower と upper の間に並ぶキーを返す
+
+    None は並びの先頭・末尾を表す。先頭・末尾に置く場合も、隣のキーと同じ order の範囲に
+    収まるキーを返す（後から order で追加したセクション・項目との順序が変わらない）。
+    """
+    if lower is None and upper is None:
+        return rank_from_order(0)
+    if upper is None:
+        upper = rank_from_order(order_from_rank(lower) + 1)
+    if lower is None:
+        order = order_from_rank(upper)
+        lower = rank_from_order(order - 1) if order > 0 else ''
+    for rank in (lower, upper):
+        if rank.endswith(DIGITS[0]) or any(digit not in _INDEX for digit in rank):
+            raise RankError(f"Invalid rank: {rank!r}")
+    if lower >= upper:
+        raise RankError(f"No rank between {lower!r} and {upper!r}")
+    return _midpoint(lower, upper)
+
+
+def _midpoint(lower: str, upper: Optional[str]) -> str:
+    """lower < upper（upper が None の場合は上限なし）の中間のキー（末尾は '0' にならない）"""
+    if upper is not None:
+        # 共通の接頭辞はそのまま残す（lower の足りない桁は '0' とみなす）
+        common = 0
+        while common < len(upper) and (lower[common] if common < len(lower) else DIGITS[0]) == upper[common]:
+            common += 1
+        if common:
+            return upper[:common] + _midpoint(lower[common:], upper[common:])
+    low = _INDEX[lower[0]] if lower else 0
+    high = _INDEX[upper[0]] if upper is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    # 桁が隣り合う場合は lower の桁を残して次の桁で間を取る
+    return DIGITS[low] + _midpoint(lower[1:], None)
+
+
+def spread(count: int) -> List[Tuple[str, int]]:
+    """count 件を振り直す (rank, order) の一覧（order は 1 から連番）"""
+    return [(rank_from_order(order), order) for order in range(1, count + 1)]
+
+
+def insert_index(siblings: List[Any], after_id: Optional[str] = None, before_id: Optional[str] = None) -> int:
+    """after_id の直後（または before_id の直前）の位置。どちらも指定しない場合は末尾
+
+    見つからない場合は KeyError を送出する。
+    """
+    ids = [_id_of(sibling) for sibling in siblings]
+    anchor = after_id if after_id is not None else before_id
+    if anchor is None:
+        return len(ids)
+    if anchor not in ids:
+        raise KeyError(anchor)
+    return ids.index(anchor) + (1 if after_id is not None else 0)
+
+
+def plan_move(siblings: List[Any], moved_id: str, index: int) -> Dict[str, Dict[str, Any]]:
+    """兄弟（moved_id を除く並び順の一覧）の index の位置に moved_id を移す書き込み（ID → フィールド）
+
+    並びのキーは rank のみで、通常は移動するドキュメント1件の rank だけを書き換える
+    （order は兄弟と重複しうるため書き換えない。order を rank に合わせるには兄弟の order の振り直しが必要になる）。
+    間にキーを作れない場合（同じ order が並んでいる、キーが MAX_RANK_LENGTH を超える）は
+    兄弟全体の rank と order を連番で振り直す。
+    """
+    try:
+        rank = rank_between(rank_of(siblings[index - 1]) if index > 0 else None,
+                            rank_of(siblings[index]) if index < len(siblings) else None)
+        if len(rank) <= MAX_RANK_LENGTH:
+            return {moved_id: {'rank': rank}}
+    except RankError:
+        pass
+    ids = [_id_of(sibling) for sibling in siblings]
+    ids.insert(index, moved_id)
+    return {entity_id: {'rank': rank, 'order': order} for entity_id, (rank, order) in zip(ids, spread(len(ids)))}
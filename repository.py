@@ -0,0 +1,395 @@
+import bisect
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ranking import rank_of
+
+
+class OrderedIndex:
+    """親ID → 子IDの索引（並びのキー昇順、同じキーの間は追加順）
+
+    子ごとに並びの位置を覚えておき、追加・削除・順序の変更を二分探索で行う。
+    """
+
+    def __init__(self):
+        # 親ID -> [(並びのキー, 追加順, 子ID), ...]（昇順）
+        self._children: Dict[str, List[Tuple[Any, int, str]]] = {}
+        # 子ID -> (親ID, 並びのキー)
+        self._positions: Dict[str, Tuple[str, Tuple[Any, int, str]]] = {}
+        self._seq = itertools.count()
+
+    def add(self, parent_id: str, child_id: str, order: Any = 0) -> None:
+        """子を追加する（既にある場合は親・順序を付け替える）"""
+        self.remove(child_id)
+        entry = (order, next(self._seq), child_id)
+        bisect.insort(self._children.setdefault(parent_id, []), entry)
+        self._positions[child_id] = (parent_id, entry)
+
+    def remove(self, child_id: str) -> Optional[str]:
+        """子を取り除き、親IDを返す（なければ None）"""
+        position = self._positions.pop(child_id, None)
+        if position is None:
+            return None
+        parent_id, entry = position
+        children = self._children[parent_id]
+        del children[bisect.bisect_left(children, entry)]
+        if not children:
+            del self._children[parent_id]
+        return parent_id
+
+    def reorder(self, child_id: str, order: Any) -> None:
+        """子の順序を変更する（同じ順序なら並びは変えない）"""
+        position = self._positions.get(child_id)
+        if position is None or position[1][0] == order:
+            return
+        self.add(position[0], child_id, order)
+
+    def parent(self, child_id: str) -> Optional[str]:
+        position = self._positions.get(child_id)
+        return position[0] if position else None
+
+    def children(self, parent_id: str) -> List[str]:
+        return [child_id for _, _, child_id in self._children.get(parent_id, ())]
+
+    def page(self, parent_id: str, limit: int, after: Optional[tuple] = None,
+             predicate: Optional[Callable[[str], bool]] = None) -> Tuple[List[str], Optional[tuple]]:
+        """親の子を並び順に最大 limit 件取得する（after は前のページの最後のキー）
+
+        返り値: (子IDの一覧, 続きがある場合は最後の子のキー)
+        """
+        children = self._children.get(parent_id, [])
+        start = bisect.bisect_right(children, tuple(after)) if after else 0
+        page: List[Tuple[Any, int, str]] = []
+        for entry in itertools.islice(children, start, None):
+            if predicate is None or predicate(entry[2]):
+                page.append(entry)
+                if len(page) > limit:
+                    break
+        next_key = page[limit - 1] if len(page) > limit else None
+        return [child_id for _, _, child_id in page[:limit]], next_key
+
+    def pop_parent(self, parent_id: str) -> List[str]:
+        """親に属する子をまとめて取り除き、その子IDを返す"""
+        entries = self._children.pop(parent_id, [])
+        for _, _, child_id in entries:
+            del self._positions[child_id]
+        return [child_id for _, _, child_id in entries]
+
+
+class SortedIndex:
+    """(キー, ID) をキーの昇順（同じキーの間はID順）に並べた索引
+
+    範囲の先頭を二分探索で求めてから順に読み出すため、ページの取得は件数によらない。
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[Any, str]] = []
+        self._keys: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entity_id: str, key: Any) -> None:
+        self.remove(entity_id)
+        bisect.insort(self._entries, (key, entity_id))
+        self._keys[entity_id] = key
+
+    def remove(self, entity_id: str) -> None:
+        if entity_id not in self._keys:
+            return
+        key = self._keys.pop(entity_id)
+        del self._entries[bisect.bisect_left(self._entries, (key, entity_id))]
+
+    def scan(self, after: Optional[Tuple[Any, str]] = None, lower: Any = None) -> Iterator[Tuple[Any, str]]:
+        """after より後ろ、かつキーが lower 以上の (キー, ID) を順に返す"""
+        start = bisect.bisect_right(self._entries, tuple(after)) if after else 0
+        if lower is not None:
+            start = max(start, bisect.bisect_left(self._entries, (lower,)))
+        return itertools.islice(self._entries, start, None)
+
+
+class InMemoryRepository:
+    """会議データのプロセス内リポジトリ
+
+    テンプレート・会議・セクション・項目・タスクをIDのハッシュで保持し、
+    会議→セクション（rank 順）、セクション→項目（rank 順）、会議→タスク（追加順）の
+    二次索引と、会議の一覧のページ取得用の索引（日時順、ステータス別・テンプレート別の日時順）を持つ。
+    IDによる参照は件数によらず O(1)、ページの取得は先頭を二分探索で求めるため件数によらずほぼ一定、
+    全件の一覧は件数に比例する。
+    rank を持たないセクション・項目は order から作るキーで並ぶ（ranking.rank_of）。
+
+    返すモデルは保持しているオブジェクトそのもの。会議のステータス・日時・テンプレート、
+    rank・order や所属（section_id）を変更する場合は索引を更新するため
+    update_meeting / update_section / update_item を使うこと。
+    """
+
+    def __init__(self):
+        self.templates: Dict[str, Any] = {}
+        self.meetings: Dict[str, Any] = {}
+        self.sections: Dict[str, Any] = {}
+        self.items: Dict[str, Any] = {}
+        self.tasks: Dict[str, Any] = {}
+        self.recording_statuses: Dict[str, str] = {}
+
+        self.meeting_sections = OrderedIndex()
+        self.section_items = OrderedIndex()
+        self.meeting_tasks = OrderedIndex()
+        # 会議の一覧の索引（キーは日時）
+        self.meetings_by_datetime = SortedIndex()
+        self.meetings_by_status: Dict[str, SortedIndex] = {}
+        self.meetings_by_template: Dict[str, SortedIndex] = {}
+        # 会議ID -> 索引に登録した (ステータス, テンプレートID)
+        self._meeting_index_keys: Dict[str, Tuple[Any, Any]] = {}
+
+    # ----- テンプレート -----
+    def list_templates(self) -> List[Any]:
+        return list(self.templates.values())
+
+    def get_template(self, template_id: str) -> Optional[Any]:
+        return self.templates.get(template_id)
+
+    def put_template(self, template: Any) -> Any:
+        self.templates[template.id] = template
+        return template
+
+    def delete_template(self, template_id: str) -> bool:
+        return self.templates.pop(template_id, None) is not None
+
+    # ----- 会議 -----
+    def list_meetings(self) -> List[Any]:
+        return list(self.meetings.values())
+
+    def get_meeting(self, meeting_id: str) -> Optional[Any]:
+        return self.meetings.get(meeting_id)
+
+    def put_meeting(self, meeting: Any) -> Any:
+        self.meetings[meeting.id] = meeting
+        self._index_meeting(meeting)
+        return meeting
+
+    def update_meeting(self, meeting_id: str, **fields: Any) -> Optional[Any]:
+        """会議のフィールドを更新する（ステータス・日時・テンプレートの変更は索引にも反映する）"""
+        meeting = self.meetings.get(meeting_id)
+        if meeting is None:
+            return None
+        for field, value in fields.items():
+            setattr(meeting, field, value)
+        self._index_meeting(meeting)
+        return meeting
+
+    def page_meetings(self, limit: int, after: Optional[Tuple[str, str]] = None,
+                      status: Optional[str] = None, template_id: Optional[str] = None,
+                      datetime_from: Optional[str] = None,
+                      datetime_to: Optional[str] = None) -> Tuple[List[Any], Optional[Tuple[str, str]]]:
+        """会議を (日時, ID) 順に最大 limit 件取得する
+
+        status・template_id を指定した場合は、該当する索引のうち件数の少ないものを読み、
+        残りの条件で絞り込む。日時は datetime_from 以上 datetime_to 未満（ISO 8601 の文字列として比較）。
+        after は前のページの最後のキー。返り値: (会議の一覧, 続きがある場合は最後の会議のキー)
+        """
+        indexes = [self.meetings_by_datetime]
+        if status is not None:
+            indexes.append(self.meetings_by_status.get(status, SortedIndex()))
+        if template_id is not None:
+            indexes.append(self.meetings_by_template.get(template_id, SortedIndex()))
+        index = min(indexes, key=len)
+
+        page: List[Any] = []
+        for key, meeting_id in index.scan(after, datetime_from):
+            if datetime_to is not None and key >= datetime_to:
+                break
+            meeting = self.meetings[meeting_id]
+            if status is not None and meeting.status != status:
+                continue
+            if template_id is not None and meeting.template_id != template_id:
+                continue
+            page.append(meeting)
+            if len(page) > limit:
+                break
+        if len(page) <= limit:
+            return page, None
+        last = page[limit - 1]
+        return page[:limit], (last.datetime, last.id)
+
+    def _index_meeting(self, meeting: Any) -> None:
+        self._unindex_meeting(meeting.id)
+        self.meetings_by_datetime.add(meeting.id, meeting.datetime)
+        self.meetings_by_status.setdefault(meeting.status, SortedIndex()).add(meeting.id, meeting.datetime)
+        if meeting.template_id is not None:
+            self.meetings_by_template.setdefault(meeting.template_id, SortedIndex()).add(meeting.id, meeting.datetime)
+        self._meeting_index_keys[meeting.id] = (meeting.status, meeting.template_id)
+
+    def _unindex_meeting(self, meeting_id: str) -> None:
+        keys = self._meeting_index_keys.pop(meeting_id, None)
+        if keys is None:
+            return
+        meeting_status, template_id = keys
+        self.meetings_by_datetime.remove(meeting_id)
+        for indexes, value in ((self.meetings_by_status, meeting_status), (self.meetings_by_template, template_id)):
+            index = indexes.get(value)
+            if index is not None:
+                index.remove(meeting_id)
+                if not len(index):
+                    del indexes[value]
+
+    def delete_meeting(self, meeting_id: str) -> bool:
+        """会議と、そのセクション・項目・タスク・録音状態を削除する"""
+        found = self.meetings.pop(meeting_id, None) is not None
+        self._unindex_meeting(meeting_id)
+        for section_id in self.meeting_sections.pop_parent(meeting_id):
+            self.sections.pop(section_id, None)
+            self._delete_items_of(section_id)
+        for task_id in self.meeting_tasks.pop_parent(meeting_id):
+            self.tasks.pop(task_id, None)
+        self.recording_statuses.pop(meeting_id, None)
+        return found
+
+    # ----- 録音状態 -----
+    def get_recording_status(self, meeting_id: str, default: Optional[str] = None) -> Optional[str]:
+        return self.recording_statuses.get(meeting_id, default)
+
+    def has_recording_status(self, meeting_id: str) -> bool:
+        return meeting_id in self.recording_statuses
+
+    def set_recording_status(self, meeting_id: str, status: str) -> None:
+        self.recording_statuses[meeting_id] = status
+
+    # ----- セクション -----
+    def list_sections(self, meeting_id: str) -> List[Any]:
+        """会議のセクションを rank 順に取得"""
+        return [self.sections[section_id] for section_id in self.meeting_sections.children(meeting_id)]
+
+    def has_sections(self, meeting_id: str) -> bool:
+        return bool(self.meeting_sections.children(meeting_id))
+
+    def get_section(self, section_id: str, meeting_id: Optional[str] = None) -> Optional[Any]:
+        """セクションを取得（meeting_id を指定した場合はその会議に属するもののみ）"""
+        if meeting_id is not None and self.meeting_sections.parent(section_id) != meeting_id:
+            return None
+        return self.sections.get(section_id)
+
+    def section_meeting_id(self, section_id: str) -> Optional[str]:
+        return self.meeting_sections.parent(section_id)
+
+    def put_section(self, meeting_id: str, section: Any) -> Any:
+        self.sections[section.id] = section
+        self.meeting_sections.add(meeting_id, section.id, rank_of(section))
+        return section
+
+    def update_section(self, section_id: str, **fields: Any) -> Optional[Any]:
+        """セクションのフィールドを更新する（rank・order の変更は索引にも反映する）"""
+        section = self.sections.get(section_id)
+        if section is None:
+            return None
+        for field, value in fields.items():
+            setattr(section, field, value)
+        if 'rank' in fields or 'order' in fields:
+            self.meeting_sections.reorder(section_id, rank_of(section))
+        return section
+
+    def delete_section(self, section_id: str) -> bool:
+        """セクションとその項目を削除する"""
+        self.meeting_sections.remove(section_id)
+        self._delete_items_of(section_id)
+        return self.sections.pop(section_id, None) is not None
+
+    # ----- 項目 -----
+    def list_items(self, section_id: str) -> List[Any]:
+        """セクションの項目を rank 順に取得"""
+        return [self.items[item_id] for item_id in self.section_items.children(section_id)]
+
+    def has_items(self, section_id: str) -> bool:
+        return bool(self.section_items.children(section_id))
+
+    def get_item(self, item_id: str, section_id: Optional[str] = None) -> Optional[Any]:
+        """項目を取得（section_id を指定した場合はそのセクションに属するもののみ）"""
+        item = self.items.get(item_id)
+        if item is None or (section_id is not None and item.section_id != section_id):
+            return None
+        return item
+
+    def put_item(self, item: Any) -> Any:
+        """項目を追加する（同じIDの項目があれば置き換える）"""
+        self.items[item.id] = item
+        self.section_items.add(item.section_id, item.id, rank_of(item))
+        return item
+
+    def update_item(self, item_id: str, **fields: Any) -> Optional[Any]:
+        """項目のフィールドを更新する（section_id・rank・order の変更は索引にも反映する）"""
+        item = self.items.get(item_id)
+        if item is None:
+            return None
+        for field, value in fields.items():
+            setattr(item, field, value)
+        if 'section_id' in fields:
+            self.section_items.add(item.section_id, item_id, rank_of(item))
+        elif 'rank' in fields or 'order' in fields:
+            self.section_items.reorder(item_id, rank_of(item))
+        return item
+
+    def delete_item(self, item_id: str) -> Optional[Any]:
+        """項目を削除し、削除した項目を返す"""
+        self.section_items.remove(item_id)
+        return self.items.pop(item_id, None)
+
+    def _delete_items_of(self, section_id: str) -> None:
+        for item_id in self.section_items.pop_parent(section_id):
+            self.items.pop(item_id, None)
+
+    # ----- タスク -----
+    def list_tasks(self, meeting_id: str) -> List[Any]:
+        """会議のタスクを追加順に取得"""
+        return [self.tasks[task_id] for task_id in self.meeting_tasks.children(meeting_id)]
+
+    def page_tasks(self, meeting_id: str, limit: int, after: Optional[tuple] = None,
+                   status: Optional[str] = None, assignee: Optional[str] = None) -> Tuple[List[Any], Optional[tuple]]:
+        """会議のタスクを追加順に最大 limit 件取得する（返り値は page_meetings と同じ形）"""
+        def matches(task_id: str) -> bool:
+            task = self.tasks[task_id]
+            return ((status is None or task.status == status)
+                    and (assignee is None or task.assignee == assignee))
+        task_ids, next_key = self.meeting_tasks.page(
+            meeting_id, limit, after, None if status is None and assignee is None else matches)
+        return [self.tasks[task_id] for task_id in task_ids], next_key
+
+    def has_tasks(self, meeting_id: str) -> bool:
+        return bool(self.meeting_tasks.children(meeting_id))
+
+    def get_task(self, task_id: str, meeting_id: Optional[str] = None) -> Optional[Any]:
+        if meeting_id is not None and self.meeting_tasks.parent(task_id) != meeting_id:
+            return None
+        return self.tasks.get(task_id)
+
+    def put_task(self, meeting_id: str, task: Any) -> Any:
+        """タスクを追加する（同じIDのタスクがあれば置き換える）"""
+        if task.id in self.tasks and self.meeting_tasks.parent(task.id) == meeting_id:
+            # 置き換えの場合は並びの位置を保つ
+            self.tasks[task.id] = task
+            return task
+        self.tasks[task.id] = task
+        self.meeting_tasks.add(meeting_id, task.id)
+        return task
+
+    def delete_task(self, task_id: str) -> Optional[Any]:
+        self.meeting_tasks.remove(task_id)
+        return self.tasks.pop(task_id, None)
+
+    # ----- 一括登録 -----
+    def load(self, templates: Iterable[Any] = (), meetings: Iterable[Any] = (),
+             sections: Optional[Dict[str, Iterable[Any]]] = None, items: Iterable[Any] = (),
+             tasks: Optional[Dict[str, Iterable[Any]]] = None,
+             recording_statuses: Optional[Dict[str, str]] = None) -> None:
+        """初期データをまとめて登録する"""
+        for template in templates:
+            self.put_template(template)
+        for meeting in meetings:
+            self.put_meeting(meeting)
+        for meeting_id, meeting_sections in (sections or {}).items():
+            for section in meeting_sections:
+                self.put_section(meeting_id, section)
+        for item in items:
+            self.put_item(item)
+        for meeting_id, meeting_tasks in (tasks or {}).items():
+            for task in meeting_tasks:
+                self.put_task(meeting_id, task)
+        self.recording_statuses.update(recording_statuses or {})
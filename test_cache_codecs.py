@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from cache_codecs import (HEADER_SIZE, LEGACY_ENTRY_MARKER, COMPRESSION_NONE, CacheCodec,
+                          codec_available, compression_available)
+
+VALUE = {"meeting": {"id": "m1", "title": "定例"}, "items": [{"id": f"i{n}", "text": "x" * 20} for n in range(50)]}
+
+
+@pytest.mark.parametrize("codec", ['json', 'msgpack'])
+@pytest.mark.parametrize("compression", ['none', 'zstd', 'lz4'])
+def test_round_trip_with_metadata(codec, compression):
+    c = CacheCodec(codec, compression, compression_threshold=64)
+    data = c.encode(VALUE, soft_expiry=123.5, cost=0.25)
+    assert c.decode(data) == (VALUE, 123.5, 0.25, False)
+
+
+def test_tombstone_flag_round_trips():
+    c = CacheCodec()
+    assert c.decode(c.encode(None, 1.0, 0.0, tombstone=True)) == (None, 1.0, 0.0, True)
+
+
+def test_values_written_with_another_setting_stay_readable():
+    writer = CacheCodec('msgpack' if codec_available('msgpack') else 'json',
+                        'zstd' if compression_available('zstd') else 'none', compression_threshold=0)
+    reader = CacheCodec()
+    assert reader.decode(writer.encode(VALUE, 5.0, 1.0))[0] == VALUE
+
+
+def test_small_values_are_not_compressed():
+    c = CacheCodec(compression='zstd' if compression_available('zstd') else 'none', compression_threshold=1024)
+    data = c.encode({"id": "m1"}, 0.0, 0.0)
+    assert data[4] == COMPRESSION_NONE and len(data) > HEADER_SIZE
+
+
+def test_legacy_values_without_header():
+    c = CacheCodec()
+    legacy = json.dumps({LEGACY_ENTRY_MARKER: 1, "value": [1, 2], "soft_expiry": 9.0, "cost": 0.5}).encode()
+    assert c.decode(legacy) == ([1, 2], 9.0, 0.5, False)
+    assert c.decode(b'{"id": "m1"}') == ({"id": "m1"}, float('inf'), 0.0, False)
+
+
+def test_unknown_settings_are_rejected():
+    with pytest.raises(ValueError):
+        CacheCodec(codec='pickle')
+    with pytest.raises(ValueError):
+        CacheCodec(compression='gzip')
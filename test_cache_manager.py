@@ -0,0 +1,357 @@
+import asyncio
+
+import fakeredis
+import pytest
+import redis
+
+from cache_manager import _MISS, CacheManager, LocalCache, content_etag
+from circuit_breaker import CLOSED
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Compute:
+    """呼び出し回数を数える計算"""
+
+    def __init__(self, *values, delay=0.01):
+        self.values = list(values)
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.values[min(self.calls, len(self.values)) - 1]
+
+
+def test_connect_enables_the_cache_and_round_trips():
+    manager = CacheManager()
+    manager.redis = fakeredis.aioredis.FakeRedis()
+
+    async def scenario():
+        connected = await manager.connect()
+        await manager.set('meeting:m1', {"id": "m1"}, ttl=60)
+        value = await manager.get('meeting:m1')
+        await manager.close()
+        return connected, value
+
+    assert run(scenario()) == (True, {"id": "m1"})
+
+
+def test_unreachable_redis_disables_the_cache():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    manager = CacheManager()
+    manager.redis = fakeredis.aioredis.FakeRedis(server=server)
+
+    async def scenario():
+        connected = await manager.connect()
+        await manager.set('meeting:m1', {"id": "m1"}, ttl=60)
+        return connected, await manager.get('meeting:m1')
+
+    assert run(scenario()) == (False, None)
+
+
+def test_slow_command_times_out_and_counts_as_failure(cache):
+    cache.command_timeout = 0.01
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(cache._call(asyncio.sleep(1)))
+    assert cache.breaker.consecutive_failures == 1
+
+
+def test_local_cache_evicts_least_recently_used():
+    l1 = LocalCache(max_entries=2, max_bytes=100, ttl=60)
+    l1.set('a', 1, 10)
+    l1.set('b', 2, 10)
+    l1.get('a')
+    l1.set('c', 3, 10)
+    assert l1.get('b') is _MISS and l1.get('a') == 1
+    l1.set('big', 4, 95)
+    assert l1.get('a') is _MISS and l1.current_bytes == 95 and l1.evictions == 3
+    l1.set('huge', 5, 101)
+    assert l1.get('huge') is _MISS
+
+
+def test_writes_invalidate_other_workers_local_cache():
+    server = fakeredis.FakeServer()
+    workers = []
+    for _ in range(2):
+        worker = CacheManager()
+        worker.redis = fakeredis.aioredis.FakeRedis(server=server)
+        workers.append(worker)
+    writer, reader = workers
+
+    async def scenario():
+        for worker in workers:
+            await worker.connect()
+        await asyncio.sleep(0.05)  # 購読の開始を待つ
+        await writer.set('meeting:m1', {"v": 1}, ttl=60)
+        first = await reader.get('meeting:m1')
+        await writer.set('meeting:m1', {"v": 2}, ttl=60)
+        await asyncio.sleep(0.05)
+        second = await reader.get('meeting:m1')
+        for worker in workers:
+            await worker.close()
+        return first, second
+
+    assert run(scenario()) == ({"v": 1}, {"v": 2})
+
+
+@pytest.mark.parametrize('method', ['lua', 'pipeline'])
+def test_invalidation_follows_dependencies_and_detects_cycles(cache, method):
+    async def no_script(key, report):
+        raise redis.ResponseError('NOSCRIPT')
+
+    if method == 'pipeline':
+        cache._invalidate_with_script = no_script
+
+    async def scenario():
+        for key in ('meeting:m1', 'section:s1', 'item:i1', 'task:t1', 'meeting:other'):
+            await cache.set(key, {"key": key}, ttl=60)
+        await cache.add_dependency('meeting:m1', 'section:s1')
+        await cache.add_dependency('meeting:m1', 'task:t1')
+        await cache.add_dependency('section:s1', 'item:i1')
+        await cache.add_dependency('item:i1', 'meeting:m1')
+        report = await cache.invalidate_with_dependencies('meeting:m1')
+        remaining = [key for key in ('meeting:m1', 'section:s1', 'item:i1', 'task:t1', 'meeting:other')
+                     if await cache.get(key) is not None]
+        return report, remaining
+
+    report, remaining = run(scenario())
+    assert remaining == ['meeting:other']
+    assert (report["method"], report["removed_keys"], report["removed_dependency_sets"], report["cycles"]) == \
+        (method, 4, 3, 1)
+
+
+def test_meeting_parts_take_two_round_trips(cache):
+    mget = cache.redis.mget
+    calls = []
+
+    def counting_mget(keys):
+        calls.append(list(keys))
+        return mget(keys)
+
+    async def scenario():
+        await cache.set('meeting:m1:g0', {"id": "m1"}, ttl=60)
+        await cache.set('sections:m1:g0', [{"id": "s1"}, {"id": "s2"}, {"id": "s3"}], ttl=60)
+        await cache.set('items:s1:g0', [{"id": "i1"}], ttl=60)
+        await cache.set('items:s2:g0', [], ttl=60)
+        cache.l1.clear()
+        cache.redis.mget = counting_mget
+        return await cache.get_meeting_with_related('m1')
+
+    meeting = run(scenario())
+    assert len(calls) == 2 and sorted(calls[1]) == ['items:s1:g0', 'items:s2:g0', 'items:s3:g0']
+    assert meeting == {"id": "m1", "sections": [{"id": "s1", "items": [{"id": "i1"}]}, {"id": "s2"}, {"id": "s3"}]}
+
+
+def test_get_many_skips_local_hits_and_tombstones(cache):
+    async def scenario():
+        await cache.set('item:a', {"id": "a"}, ttl=60)
+        await cache.set('item:b', {"id": "b"}, ttl=60)
+        await cache.get_or_compute('item:gone', lambda: asyncio.sleep(0), ttl=60, cache_misses=True)
+        cache.l1.delete('item:b')
+        cache.l2_hits = cache.l2_misses = 0
+        return await cache.get_many(['item:a', 'item:b', 'item:gone', 'item:missing'])
+
+    assert run(scenario()) == {'item:a': {"id": "a"}, 'item:b': {"id": "b"}}
+    assert cache.l2_hits == 1 and cache.l2_misses == 1
+
+
+def test_tombstone_suppresses_repeated_misses(cache):
+    compute = Compute(None)
+
+    async def scenario():
+        first = await cache.get_or_compute('meeting:none', compute, ttl=60, cache_misses=True)
+        second = await cache.get_or_compute('meeting:none', compute, ttl=60, cache_misses=True)
+        await cache.delete('meeting:none')
+        third = await cache.get_or_compute('meeting:none', compute, ttl=60, cache_misses=True)
+        return first, second, third
+
+    assert run(scenario()) == (None, None, None)
+    assert compute.calls == 2
+
+
+def test_created_meeting_replaces_its_tombstone(client):
+    meeting_id = 'test_created_meeting_replaces_its_tombstone'
+    assert client.get(f'/meetings/{meeting_id}').status_code == 404
+    assert client.get(f'/meetings/{meeting_id}').status_code == 404
+    response = client.post('/meetings', json={"id": meeting_id, "title": "t", "datetime": "2025-01-01T00:00:00"})
+    assert response.status_code == 200, response.text
+    assert client.get(f'/meetings/{meeting_id}').json()['id'] == meeting_id
+
+
+@pytest.mark.parametrize('if_none_match, not_modified', [(None, False), ('"other"', False), ('*', True)])
+def test_tagged_value_etag(cache, if_none_match, not_modified):
+    value = {"meeting": {"id": "m1"}}
+
+    async def scenario():
+        await cache.get_or_compute_tagged('meeting_full:m1:g0', Compute(value), ttl=60)
+        return await cache.get_or_compute_tagged('meeting_full:m1:g0', Compute(value), if_none_match=if_none_match,
+                                                 ttl=60)
+
+    tagged = run(scenario())
+    assert tagged.etag == content_etag(value)
+    assert tagged.not_modified is not_modified
+    assert tagged.value == (None if not_modified else value)
+
+
+@pytest.mark.parametrize('path', ['/full', '/full?include=sections&fields[sections]=status', '/sections/status'],
+                         ids=['full', 'projection', 'status'])
+def test_unchanged_meeting_answers_304(client, meeting, path):
+    meeting_id, sections = meeting
+    url = f'/meetings/{meeting_id}{path}'
+    etag = client.get(url).headers['ETag']
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304 and response.headers['ETag'] == etag and not response.content
+
+    response = client.patch(f'/meetings/{meeting_id}/sections/{sections[0]["id"]}/status', json="completed")
+    assert response.status_code == 200, response.text
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_concurrent_misses_compute_once(cache):
+    compute = Compute({"v": 1})
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute('meeting:sf', compute, ttl=60) for _ in range(10)))
+
+    assert run(scenario()) == [{"v": 1}] * 10
+    assert compute.calls == 1
+
+
+def test_misses_on_two_workers_compute_once():
+    server = fakeredis.FakeServer()
+    workers = []
+    for _ in range(2):
+        worker = CacheManager()
+        worker.redis = fakeredis.aioredis.FakeRedis(server=server)
+        worker.breaker.state = CLOSED
+        workers.append(worker)
+    compute = Compute({"v": 1}, delay=0.1)
+
+    async def scenario():
+        return await asyncio.gather(*(worker.get_or_compute('meeting:sf', compute, ttl=60) for worker in workers))
+
+    assert run(scenario()) == [{"v": 1}] * 2
+    assert compute.calls == 1
+
+
+def test_stale_value_is_served_while_refreshing(cache):
+    cache.stale_factor = 100
+    compute = Compute({"v": 1}, {"v": 2})
+
+    async def scenario():
+        await cache.get_or_compute('meeting:swr', compute, ttl=0.05)
+        await asyncio.sleep(0.1)
+        stale = await cache.get_or_compute('meeting:swr', compute, ttl=0.05)
+        await asyncio.gather(*cache._background_tasks)
+        return stale, await cache.get_or_compute('meeting:swr', compute, ttl=60)
+
+    assert run(scenario()) == ({"v": 1}, {"v": 2})
+    assert compute.calls == 2
+
+
+def test_xfetch_refreshes_before_expiry(cache):
+    compute = Compute({"v": 1}, {"v": 2})
+
+    async def scenario():
+        await cache.get_or_compute('meeting:xf', compute, ttl=60)
+        cache.early_refresh_beta = 1e9
+        early = await cache.get_or_compute('meeting:xf', compute, ttl=60)
+        await asyncio.gather(*cache._background_tasks)
+        return early
+
+    assert run(scenario()) == {"v": 1}
+    assert compute.calls == 2
+
+
+def test_background_refresh_losing_lock_does_not_answer_misses(cache):
+    """ロックを取れなかったバックグラウンド再計算の None が、キャッシュミスの待機者に返らない"""
+    cache.lock_wait = 0.1
+    compute = Compute({"v": 1}, {"v": 2})
+    acquire_lock = cache._acquire_lock
+
+    async def scenario():
+        await cache.get_or_compute('meeting:bg', compute, ttl=60)
+        released = asyncio.Event()
+
+        async def contended(lock_key, token):
+            # 他のワーカーがロックを持っている
+            await released.wait()
+            return False
+
+        cache._acquire_lock = contended
+        cache.early_refresh_beta = 1e9
+        await cache.get_or_compute('meeting:bg', compute, ttl=60)  # 古い値を返し、再計算を始める
+        cache.early_refresh_beta = 0
+        await cache.delete('meeting:bg')
+        miss = asyncio.create_task(cache.get_or_compute('meeting:bg', compute, ttl=60))
+        await asyncio.sleep(0.01)
+        released.set()
+        result = await miss
+        cache._acquire_lock = acquire_lock
+        return result
+
+    assert run(scenario()) == {"v": 2}
+
+
+def test_dependency_sets_expire_with_their_entries(cache):
+    async def scenario():
+        await cache.set('meeting:m1', {"id": "m1"}, ttl=30)
+        await cache.set('section:s1', {"id": "s1"}, ttl=120)
+        await cache.add_dependency('meeting:m1', 'section:s1')
+        await cache.add_dependency('meeting:none', 'section:none')
+        return (await cache.redis.pttl('deps:meeting:m1'), await cache.redis.pttl('deps:meeting:none'))
+
+    with_entries, without_entries = run(scenario())
+    assert 60_000 < with_entries <= 120_000
+    assert without_entries == pytest.approx(cache.dependency_ttl * 1000, rel=0.01)
+
+
+def test_sweep_removes_dangling_members(cache):
+    async def scenario():
+        await cache.set('section:s1', {"id": "s1"}, ttl=60)
+        await cache.redis.sadd('deps:meeting:m1', 'section:s1', 'section:gone', 'item:gone')
+        await cache.redis.sadd('deps:meeting:m2', 'section:gone')
+        report = await cache.sweep_dependencies()
+        members = await cache.redis.smembers('deps:meeting:m1')
+        return report, members, await cache.redis.exists('deps:meeting:m2'), await cache.redis.pttl('deps:meeting:m1')
+
+    report, members, m2_exists, ttl = run(scenario())
+    assert members == {b'section:s1'} and not m2_exists and ttl > 0
+    assert (report["members_scanned"], report["members_removed"], report["sets_removed"], report["ttl_assigned"]) == \
+        (4, 3, 1, 1)
+    assert cache.sweep_totals["runs"] == 1 and report["bytes_reclaimed"] > 0
+
+
+def test_generation_bump_retires_derived_keys(cache):
+    async def scenario():
+        key = await cache.meeting_key('m1', 'meeting_full:m1')
+        await cache.set(key, {"v": 1}, ttl=60)
+        await cache.bump_generation('m1')
+        new_key = await cache.meeting_key('m1', 'meeting_full:m1')
+        return key, new_key, await cache.get(new_key), await cache.get(key)
+
+    key, new_key, current, retired = run(scenario())
+    assert (key, new_key) == ('meeting_full:m1:g0', 'meeting_full:m1:g1')
+    assert current is None and retired == {"v": 1}
+
+
+def test_generation_bumps_are_replayed_after_an_outage(cache):
+    async def scenario():
+        cache.breaker.trip()
+        await cache.bump_generation('m1')
+        await cache.invalidate_meeting('m2', ['section:s1'])
+        pending = (set(cache._pending_generations), set(cache._pending_deletes))
+        await cache._flush_pending_invalidations()
+        cache.breaker.state = CLOSED
+        return pending, await cache.get_generation('m1'), await cache.get_generation('m2')
+
+    pending, m1, m2 = run(scenario())
+    assert pending == ({'m1', 'm2'}, {'section:s1'})
+    assert (m1, m2) == (1, 1) and not cache._pending_generations and not cache._pending_deletes
@@ -0,0 +1,44 @@
+from cache_metrics import CacheMetrics, Histogram, key_prefix
+
+
+def test_key_prefix_groups_unknown_keys():
+    assert key_prefix('meeting_full:m1:g3') == 'meeting_full'
+    assert key_prefix('unknown:x') == 'other' and key_prefix('plain') == 'other'
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = Histogram((1, 5, 10))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 2, 3, 20):
+        histogram.observe(value)
+    assert (histogram.quantile(0.25), histogram.quantile(0.5), histogram.quantile(1.0)) == (1, 5, float('inf'))
+
+
+def test_snapshot_hit_ratio_per_prefix():
+    metrics = CacheMetrics()
+    for result in ('hit_l1', 'hit_l2', 'negative', 'miss', 'stale'):
+        metrics.record('get', 'item:i1', result)
+    metrics.record('set', 'meeting:m1', 'ok')
+    metrics.observe_bytes('set', 'meeting:m1', 120)
+    snapshot = metrics.snapshot()
+    assert snapshot['item']['hit_ratio'] == 3 / 5
+    assert snapshot['meeting']['hit_ratio'] is None and snapshot['meeting']['bytes'] == {'set': 120}
+
+
+def test_prometheus_histogram_is_cumulative():
+    metrics = CacheMetrics()
+    metrics.observe_latency('get', 'meeting:m1', 0.0007)
+    metrics.observe_latency('get', 'meeting:m1', 3.0)
+    text = metrics.render_prometheus()
+    assert 'cache_latency_seconds_bucket{op="get",prefix="meeting",le="0.001"} 1' in text
+    assert 'cache_latency_seconds_bucket{op="get",prefix="meeting",le="2.5"} 1' in text
+    assert 'cache_latency_seconds_bucket{op="get",prefix="meeting",le="+Inf"} 2' in text
+    assert 'cache_latency_seconds_count{op="get",prefix="meeting"} 2' in text
+
+
+def test_histogram_renders_without_labels():
+    histogram = Histogram((1, 5))
+    histogram.observe(2)
+    assert histogram.render('lag_seconds') == [
+        'lag_seconds_bucket{le="1"} 0', 'lag_seconds_bucket{le="5"} 1', 'lag_seconds_bucket{le="+Inf"} 1',
+        'lag_seconds_sum 2.0', 'lag_seconds_count 1']
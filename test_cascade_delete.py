@@ -0,0 +1,124 @@
+import asyncio
+
+from cascade_delete import COMPLETED, CascadeDeleter
+from firestore_local import LocalFirestoreClient
+from firestore_store import FirestoreStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def remaining(client):
+    return sum(len(client._collections.get(collection, {})) for collection in ('meetings', 'sections', 'items'))
+
+
+def firestore_docs(app, collection, field, value):
+    return [doc for doc in app.db._collections.get(collection, {}).values() if doc.get(field) == value]
+
+
+def meeting_tree(store, meeting_id, sections, items_per_section):
+    async def put():
+        await store.set('meetings', meeting_id, {"id": meeting_id})
+        for s in range(sections):
+            section_id = f'{meeting_id}_s{s}'
+            await store.set('sections', section_id, {"id": section_id, "meeting_id": meeting_id})
+            for i in range(items_per_section):
+                item_id = f'{section_id}_i{i}'
+                await store.set('items', item_id, {"id": item_id, "meeting_id": meeting_id, "section_id": section_id})
+    return put()
+
+
+def cascade(deleter, meeting_id, invalidated):
+    async def invalidate(job):
+        invalidated.append(job.deleted)
+
+    return deleter.delete('meeting', meeting_id, [('meetings', meeting_id)],
+                          [('sections', 'meeting_id', meeting_id), ('items', 'meeting_id', meeting_id)], invalidate)
+
+
+def test_delete_removes_parent_first_then_children_in_batches():
+    client = LocalFirestoreClient(latency=0)
+    invalidated = []
+
+    async def scenario():
+        store = FirestoreStore(client)
+        deleter = CascadeDeleter(store)
+        deleter.batch_size = 4
+        await meeting_tree(store, 'm1', sections=2, items_per_section=3)
+        return await cascade(deleter, 'm1', invalidated)
+
+    job = run(scenario())
+    assert job.status == COMPLETED and not job.background
+    assert (job.total, job.deleted, job.batches_total, job.batches_done) == (9, 9, 3, 3)
+    # 親を削除した直後（子孫の削除前）に1回だけ無効化する
+    assert invalidated == [1]
+    assert remaining(client) == 0
+
+
+def test_large_tree_continues_in_the_background():
+    client = LocalFirestoreClient(latency=0)
+    invalidated = []
+
+    async def scenario():
+        store = FirestoreStore(client)
+        deleter = CascadeDeleter(store)
+        deleter.batch_size, deleter.background_threshold = 2, 3
+        await meeting_tree(store, 'm1', sections=1, items_per_section=4)
+        job = await cascade(deleter, 'm1', invalidated)
+        background = job.background
+        await asyncio.gather(*deleter._tasks.values())
+        return job, background
+
+    job, background = run(scenario())
+    assert background and job.status == COMPLETED and job.deleted == 6
+    # 終了時にもう一度無効化する
+    assert invalidated == [1, 6]
+    assert remaining(client) == 0
+
+
+def test_delete_section_discards_buffered_items(app, client, meeting):
+    """進行中の会議で溜まっている項目は、セクションの削除後に反映されない"""
+    meeting_id, sections = meeting
+    section_id = sections[0]['id']
+    assert client.post(f'/meetings/{meeting_id}/start').status_code == 200
+    for i in range(3):
+        response = client.post(f'/meetings/{meeting_id}/sections/{section_id}/items', json={
+            "id": f"{meeting_id}_i{i}", "section_id": section_id, "text": "buffered", "order": i})
+        assert response.status_code == 200, response.text
+    assert app.cache_manager.redis_available
+
+    assert client.delete(f'/meetings/{meeting_id}/sections/{section_id}').status_code == 200
+    assert client.post(f'/meetings/{meeting_id}/complete').status_code == 200
+
+    assert firestore_docs(app, 'items', 'section_id', section_id) == []
+    assert section_id not in app.db._collections.get('sections', {})
+    assert [s['id'] for s in client.get(f'/meetings/{meeting_id}/sections').json()] == [s['id'] for s in sections[1:]]
+
+
+def test_delete_section_continues_when_flush_fails(app, client, meeting, monkeypatch):
+    meeting_id, sections = meeting
+    section_id = sections[0]['id']
+
+    async def failing_flush(meeting_id):
+        raise ConnectionError('redis down')
+
+    monkeypatch.setattr(app.write_behind, 'flush', failing_flush)
+    assert client.delete(f'/meetings/{meeting_id}/sections/{section_id}').status_code == 200
+    assert section_id not in app.db._collections.get('sections', {})
+    assert firestore_docs(app, 'items', 'section_id', section_id) == []
+
+
+def test_delete_section_retries_leftover_items(app, client, meeting):
+    """項目の削除が途中で失敗したセクションは、セクションの削除後も再度削除できる"""
+    meeting_id, _ = meeting
+    section_id = f'{meeting_id}_deleted'
+    for i in range(2):
+        item_id = f'{section_id}_i{i}'
+        app.db.collection('items').document(item_id).set(
+            {"id": item_id, "meeting_id": meeting_id, "section_id": section_id, "text": "x", "order": i})
+
+    assert client.delete(f'/meetings/{meeting_id}_other/sections/{section_id}').status_code == 404
+    assert client.delete(f'/meetings/{meeting_id}/sections/{section_id}').status_code == 200
+    assert firestore_docs(app, 'items', 'section_id', section_id) == []
+    assert client.delete(f'/meetings/{meeting_id}/sections/{section_id}').status_code == 404
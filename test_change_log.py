@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from change_log import ChangeLog
+from circuit_breaker import CLOSED, OPEN
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def log(cache):
+    return ChangeLog(cache)
+
+
+def change(entity_id, text='x'):
+    return ('item', 'set', entity_id, {"id": entity_id, "text": text})
+
+
+def test_since_returns_changes_after_version(log):
+    async def scenario():
+        base = (await log.since('m1', None)).version
+        v1 = await log.append('m1', change('i1'))
+        v2 = await log.append('m1', change('i2'), change('i3'))
+        return base, v1, v2, await log.since('m1', base), await log.since('m1', v1)
+
+    base, v1, v2, from_base, from_v1 = run(scenario())
+    assert v1 == base + 1 and v2 == base + 3
+    assert from_base.complete and [c["id"] for c in from_base.changes] == ['i1', 'i2', 'i3']
+    assert from_v1.complete and [c["version"] for c in from_v1.changes] == [v1 + 1, v2]
+    assert from_v1.version == v2
+
+
+def test_since_current_version_has_no_changes(log):
+    async def scenario():
+        version = await log.append('m1', change('i1'))
+        return version, await log.since('m1', version)
+
+    version, result = run(scenario())
+    assert result == (version, [], True)
+
+
+def test_since_none_or_newer_version_needs_snapshot(log):
+    async def scenario():
+        version = await log.append('m1', change('i1'))
+        return version, await log.since('m1', None), await log.since('m1', version + 10)
+
+    version, without_since, newer = run(scenario())
+    assert without_since == (version, [], False)
+    assert newer == (version, [], False)
+
+
+def test_compacted_range_needs_snapshot(log):
+    log.max_entries = 2
+
+    async def scenario():
+        base = (await log.since('m1', None)).version
+        for i in range(4):
+            await log.append('m1', change(f'i{i}'))
+        return base, await log.since('m1', base), await log.since('m1', base + 2)
+
+    base, compacted, kept = run(scenario())
+    assert not compacted.complete and compacted.version == base + 4
+    assert kept.complete and [c["id"] for c in kept.changes] == ['i2', 'i3']
+
+
+def test_failed_append_never_returns_partial_delta(log, cache):
+    """追記に失敗した変更は、失敗前の since にも後の追記後にも差分として返さない"""
+    async def scenario():
+        before = await log.append('m1', change('i1'))
+
+        original = log._append_script
+
+        async def fail(*args, **kwargs):
+            raise ConnectionError('redis down')
+
+        log._append_script = fail
+        assert await log.append('m1', change('lost')) is None
+        log._append_script = original
+
+        # 別のプロセスも欠けの印を見てスナップショットを返す
+        other = ChangeLog(cache)
+        during_gap = await other.since('m1', before)
+        after = await other.append('m1', change('i2'))
+        return before, during_gap, after, await log.since('m1', before), await log.since('m1', after - 1)
+
+    before, during_gap, after, stale, fresh = run(scenario())
+    assert not during_gap.complete
+    assert after > before + 2
+    assert not stale.complete and stale.version == after
+    assert fresh.complete and [c["id"] for c in fresh.changes] == ['i2']
+    assert log.append_errors == 1
+
+
+def test_gap_marked_when_redis_unreachable(log, cache):
+    """Redisに印を付けられなかった欠けは、次にRedisを使うときに付ける"""
+    async def unreachable_append():
+        before = await log.append('m1', change('i1'))
+        cache.breaker.state = OPEN
+        assert await log.append('m1', change('lost')) is None
+        cache.breaker.state = CLOSED
+        result = await log.since('m1', before)
+        marked = await cache.redis.exists(log._gap_key('m1'))
+        return result, marked
+
+    result, marked = run(unreachable_append())
+    assert not result.complete
+    assert marked == 1
+    assert not log._unmarked_gaps
+
+
+def test_discard_removes_log_and_gap(log, cache):
+    async def scenario():
+        await log.append('m1', change('i1'))
+        await cache.redis.set(log._gap_key('m1'), 1)
+        await log.discard('m1')
+        return await cache.redis.keys('changes:m1*')
+
+    assert run(scenario()) == []
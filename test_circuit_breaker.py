@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+import redis
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_trips_after_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.failures == 5
+
+
+def test_open_rejects_and_backs_off():
+    transitions = []
+    breaker = CircuitBreaker('test', reset_timeout=1.0, max_reset_timeout=3.0,
+                             on_transition=lambda previous, state: transitions.append((previous, state)))
+    breaker.trip()
+    first = breaker.retry_delay()
+    assert not breaker.allow() and breaker.rejected == 1
+    breaker.begin_probe()
+    breaker.trip()
+    second = breaker.retry_delay()
+    breaker.begin_probe()
+    breaker.reset()
+    assert 0.8 <= first <= 1.2 and 1.6 <= second <= 2.4
+    assert transitions == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+    assert breaker.allow() and breaker.open_streak == 0
+
+
+def test_redis_available_is_a_plain_read(cache):
+    """状態の確認は拒否として数えず、Redisの呼び出しを省略した場合だけ数える"""
+    cache.breaker.state = OPEN
+    for _ in range(5):
+        assert not cache.redis_available
+    assert cache.breaker.rejected == 0
+
+    assert asyncio.run(cache.get('meeting:m1')) is None
+    assert cache.breaker.rejected == 1
+    assert 'cache_circuit_rejected_total{circuit="redis"} 1' in cache.render_metrics()
+
+
+def test_connection_errors_trip_the_circuit(cache):
+    cache.breaker.failure_threshold = 2
+
+    async def fail():
+        raise redis.ConnectionError('down')
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(redis.ConnectionError):
+                await cache._call(fail())
+
+    # 開いたときの再接続（疎通確認）は行わない
+    cache._start_reconnect = lambda: None
+    asyncio.run(scenario())
+    assert cache.breaker.state == OPEN and not cache.redis_available
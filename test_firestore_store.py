@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+
+from datastore_ops import OP_DELETE, OP_SET, OP_UPDATE
+from firestore_local import LocalFirestoreClient
+from firestore_store import MAX_BATCH_WRITES, FirestoreStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_call_past_deadline_times_out_and_keeps_slot_until_done():
+    async def scenario():
+        store = FirestoreStore(LocalFirestoreClient(latency=0), max_concurrency=1, deadline=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await store.call('get', time.sleep, 0.2)
+        # スレッドで実行中の呼び出しは期限後も枠を使い続ける
+        busy = store.in_flight
+        await asyncio.sleep(0.25)
+        return store, busy
+
+    store, busy = run(scenario())
+    assert busy == 1 and store.in_flight == 0
+    assert store.calls[('get', 'timeout')] == 1
+
+
+def test_waiting_for_a_slot_counts_toward_the_deadline():
+    async def scenario():
+        store = FirestoreStore(LocalFirestoreClient(latency=0), max_concurrency=1, deadline=0.1)
+        slow = asyncio.create_task(store.call('get', time.sleep, 0.3, deadline=1.0))
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await store.call('get', lambda: None)
+        await slow
+        return store
+
+    store = run(scenario())
+    assert store.calls[('get', 'timeout')] == 1 and store.calls[('get', 'ok')] == 1
+
+
+def test_failed_submit_releases_the_slot():
+    async def scenario():
+        store = FirestoreStore(LocalFirestoreClient(latency=0), max_concurrency=1)
+        store.close()
+        with pytest.raises(RuntimeError):
+            await store.call('get', lambda: None)
+        return store
+
+    store = run(scenario())
+    assert store.in_flight == 0 and not store._slots.locked()
+    assert store.calls[('get', 'error')] == 1
+
+
+def test_commit_batch_splits_and_merges_updates():
+    client = LocalFirestoreClient(latency=0)
+
+    async def scenario():
+        store = FirestoreStore(client)
+        await store.set('items', 'i0', {"id": "i0", "text": "a", "rank": "x"})
+        ops = [(OP_SET, 'items', f'i{n}', {"id": f"i{n}"}) for n in range(1, MAX_BATCH_WRITES + 10)]
+        ops += [(OP_UPDATE, 'items', 'i0', {"text": "b"}), (OP_DELETE, 'items', 'i1', None)]
+        await store.commit_batch(ops)
+        return store, await store.get('items', 'i0'), await store.get('items', 'i1')
+
+    store, merged, deleted = run(scenario())
+    assert store.calls[('commit', 'ok')] == 2
+    assert merged == {"id": "i0", "text": "b", "rank": "x"} and deleted is None
@@ -0,0 +1,82 @@
+import time
+
+
+def put_documents(app, collection, *docs):
+    for doc in docs:
+        app.db.collection(collection).document(doc['id']).set(doc)
+
+
+def count_queries(app, monkeypatch):
+    queries = []
+    query = app.firestore_store.query
+
+    async def counting_query(collection, field, value):
+        queries.append((collection, field))
+        return await query(collection, field, value)
+
+    monkeypatch.setattr(app.firestore_store, 'query', counting_query)
+    return queries
+
+
+def test_full_reads_firestore_items_with_one_query(app, client, monkeypatch):
+    """モックデータにない会議は、全セクションの項目を会議IDで1回だけ問い合わせて組み立てる"""
+    meeting_id = 'test_full_reads_firestore_items_with_one_query'
+    put_documents(app, 'meetings', {"id": meeting_id, "title": "t", "datetime": "2025-01-01T00:00:00"})
+    put_documents(app, 'sections', *({"id": f"{meeting_id}_s{n}", "meeting_id": meeting_id, "title": "s", "order": n}
+                                     for n in (2, 1)))
+    put_documents(app, 'items', *({"id": f"{meeting_id}_i{n}", "meeting_id": meeting_id, "section_id": f"{meeting_id}_s1",
+                                   "text": "x", "order": n} for n in (3, 1, 2)))
+    queries = count_queries(app, monkeypatch)
+    monkeypatch.setattr(app.db, 'latency', 0.1)
+
+    started = time.perf_counter()
+    body = client.get(f'/meetings/{meeting_id}/full').json()
+    elapsed = time.perf_counter() - started
+
+    # 5回の読み込み（会議・セクション・項目・タスク・録音状態）を並行に行う
+    assert elapsed < 0.3
+    assert sorted(queries) == [('items', 'meeting_id'), ('sections', 'meeting_id'), ('tasks', 'meeting_id')]
+    assert [s['id'] for s in body['sections']] == [f"{meeting_id}_s1", f"{meeting_id}_s2"]
+    assert [i['id'] for i in body['sections'][0]['items']] == [f"{meeting_id}_i{n}" for n in (1, 2, 3)]
+    assert body['sections'][1]['items'] == [] and body['recording_status'] == 'stopped'
+
+
+def test_bulk_create_writes_children_before_meetings(app, client, monkeypatch):
+    template = client.get('/templates').json()[0]
+    meeting_ids = [f'test_bulk_create_{n}' for n in range(3)]
+    commits = []
+    commit_batch = app.firestore_store.commit_batch
+
+    async def recording_commit_batch(ops, concurrent=False):
+        commits.append(sorted({collection for _, collection, _, _ in ops}))
+        return await commit_batch(ops, concurrent=concurrent)
+
+    monkeypatch.setattr(app.firestore_store, 'commit_batch', recording_commit_batch)
+    response = client.post(f"/templates/{template['id']}/meetings", json=[
+        {"id": meeting_id, "title": "t", "datetime": "2025-01-01T00:00:00"} for meeting_id in meeting_ids])
+    assert response.status_code == 200, response.text
+
+    assert commits == [['items', 'recording_status', 'sections'], ['meetings']]
+    for meeting_id in meeting_ids:
+        assert app.db._collections['meetings'][meeting_id]['template_id'] == template['id']
+        sections = client.get(f'/meetings/{meeting_id}/sections').json()
+        assert [s['title'] for s in sections] == [s['title'] for s in template['sections']]
+
+
+def test_bulk_create_rejects_duplicate_ids(client):
+    template_id = client.get('/templates').json()[0]['id']
+    meeting = {"id": "test_bulk_create_duplicate", "title": "t", "datetime": "2025-01-01T00:00:00"}
+    assert client.post(f'/templates/{template_id}/meetings', json=[meeting, meeting]).status_code == 400
+    assert client.get(f"/meetings/{meeting['id']}").status_code == 404
+
+
+def test_recording_start_buffers_only_open_meetings(app, client, meeting):
+    """存在しない会議・終了した会議の録音開始では、書き込みバッファを使わない"""
+    meeting_id, _ = meeting
+    missing_id = f'{meeting_id}_missing'
+    assert client.post(f'/meetings/{missing_id}/recording/start').status_code == 200
+    assert not client.portal.call(app.write_behind.is_live, missing_id)
+
+    assert client.post(f'/meetings/{meeting_id}/complete').status_code == 200
+    assert client.post(f'/meetings/{meeting_id}/recording/start').status_code == 200
+    assert not client.portal.call(app.write_behind.is_live, meeting_id)
@@ -0,0 +1,100 @@
+import pytest
+
+from pagination import NEXT_CURSOR_HEADER, CursorError, decode_cursor, encode_cursor, page_sorted
+
+
+def key(row):
+    return (row["rank"], row["id"])
+
+
+ROWS = [{"rank": rank, "id": doc_id} for rank, doc_id in [('a', '1'), ('b', '1'), ('b', '2'), ('b', '3'), ('c', '1')]]
+
+
+def walk(rows, limit):
+    pages, after = [], None
+    while True:
+        page, after = page_sorted(rows, key, limit, after)
+        pages.append([key(row) for row in page])
+        if after is None:
+            return pages
+
+
+@pytest.mark.parametrize('limit', [1, 2, 4, 5, 10])
+def test_pages_cover_rows_once(limit):
+    pages = walk(ROWS, limit)
+    assert [k for page in pages for k in page] == [key(row) for row in ROWS]
+    assert all(len(page) <= limit for page in pages)
+
+
+def test_exact_last_page_has_no_cursor():
+    page, after = page_sorted(ROWS, key, 5)
+    assert len(page) == 5 and after is None
+
+
+def test_empty_and_past_the_end():
+    assert page_sorted([], key, 10) == ([], None)
+    assert page_sorted(ROWS, key, 10, ('z', '9')) == ([], None)
+
+
+def test_cursor_after_deleted_row_resumes_at_next():
+    """前のページの最後の行が削除されても、その位置の次から続ける"""
+    rows = [row for row in ROWS if key(row) != ('b', '2')]
+    page, _ = page_sorted(rows, key, 2, ('b', '2'))
+    assert [key(row) for row in page] == [('b', '3'), ('c', '1')]
+
+
+def test_cursor_round_trip_and_scope():
+    cursor = encode_cursor('items:s1', {}, ('b', '2'))
+    assert decode_cursor(cursor, 'items:s1', {}) == ('b', '2')
+    assert decode_cursor(None, 'items:s1', {}) is None
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, 'items:s2', {})
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, 'items:s1', {"status": "open"})
+    with pytest.raises(CursorError):
+        decode_cursor('not-a-cursor', 'items:s1', {})
+
+
+def test_list_items_pages_in_rank_then_id_order(client, meeting):
+    """同じ rank の項目を含むセクションを、ページをまたいで重複・欠落なく返す"""
+    meeting_id, sections = meeting
+    section_id = sections[0]['id']
+    for i in range(12):
+        response = client.post(f'/meetings/{meeting_id}/sections/{section_id}/items', json={
+            "id": f"{meeting_id}_{11 - i:02d}", "section_id": section_id, "text": "x", "order": 5})
+        assert response.status_code == 200, response.text
+    expected = [item['id'] for item in client.get(f'/meetings/{meeting_id}/sections/{section_id}/items').json()]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f'/meetings/{meeting_id}/sections/{section_id}/items', params=params)
+        assert response.status_code == 200, response.text
+        seen += [item['id'] for item in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert seen == expected
+    tied = [item_id for item_id in seen if item_id.startswith(f"{meeting_id}_")]
+    assert tied == sorted(tied) and len(tied) == 12
+
+
+def test_list_items_rejects_cursor_of_other_section(client, meeting):
+    meeting_id, sections = meeting
+    cursor = encode_cursor(f"items:{sections[0]['id']}", {}, ('0001V', 'x'))
+    response = client.get(f"/meetings/{meeting_id}/sections/{sections[1]['id']}/items", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_list_meetings_pages(client, meeting):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get('/meetings', params=params)
+        assert response.status_code == 200, response.text
+        seen += [m['id'] for m in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen))
+    assert meeting[0] in seen
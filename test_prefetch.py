@@ -0,0 +1,61 @@
+import asyncio
+
+from prefetch import CachePrefetcher
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def settle(prefetcher):
+    while prefetcher._tasks:
+        await asyncio.gather(*prefetcher._tasks.values(), return_exceptions=True)
+
+
+def test_prefetch_runs_once_per_generation(cache):
+    warmed = []
+
+    async def warm(meeting_id, run_all):
+        warmed.append(meeting_id)
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        prefetcher = CachePrefetcher(cache, warm)
+        other_worker = CachePrefetcher(cache, warm)
+        prefetcher.schedule('m1')
+        prefetcher.schedule('m1')  # 実行中: 終了後に確認し、同じ世代なので省かれる
+        await settle(prefetcher)
+        other_worker.schedule('m1')
+        await settle(other_worker)
+        await cache.bump_generation('m1')
+        prefetcher.schedule('m1')
+        await settle(prefetcher)
+        return prefetcher, other_worker
+
+    prefetcher, other_worker = run(scenario())
+    assert warmed == ['m1', 'm1']
+    assert prefetcher.deduplicated == {"local": 1, "remote": 1} and prefetcher.completed == 2
+    assert other_worker.deduplicated["remote"] == 1
+
+
+def test_run_is_bounded_and_isolates_failures(cache, monkeypatch):
+    monkeypatch.setenv('CACHE_PREFETCH_CONCURRENCY', '2')
+    running = []
+    peak = []
+
+    async def load(value):
+        running.append(value)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(value)
+        if value == 3:
+            raise RuntimeError('boom')
+        return value
+
+    async def scenario():
+        prefetcher = CachePrefetcher(cache, None)
+        return prefetcher, await prefetcher.run(*(load(n) for n in range(5)))
+
+    prefetcher, results = run(scenario())
+    assert results == [0, 1, 2, None, 4] and max(peak) == 2
+    assert (prefetcher.keys_warmed, prefetcher.key_errors) == (4, 1)
@@ -0,0 +1,54 @@
+import pytest
+
+from projection import FULL, Projection, ProjectionError
+
+ALLOWED = {'meeting': ('id', 'title', 'status'), 'sections': ('id', 'title', 'status'),
+           'items': ('id', 'text'), 'tasks': ('id', 'title')}
+
+FULL_DATA = {
+    "meeting": {"id": "m1", "title": "t", "status": "scheduled"},
+    "sections": [{"id": "s1", "title": "a", "status": "completed", "items": [{"id": "i1", "text": "x"}]}],
+    "tasks": [{"id": "t1", "title": "do"}],
+    "recording_status": "recording",
+}
+
+
+def test_parse_defaults_to_full():
+    assert Projection.parse(None, {'items': None}, ALLOWED).is_full
+
+
+def test_key_is_normalized():
+    a = Projection.parse('tasks,sections', {'items': 'text', 'sections': None}, ALLOWED)
+    b = Projection.parse('sections, tasks,tasks', {'items': 'text,id,text'}, ALLOWED)
+    assert a.key() == b.key() == 'sections,tasks;items=id,text'
+    assert Projection.parse('', {}, ALLOWED).key() == '-'
+
+
+@pytest.mark.parametrize('include, fields', [
+    ('sections,notes', {}),
+    (None, {'comments': 'id'}),
+    (None, {'items': 'text,secret'}),
+])
+def test_parse_rejects_unknown_names(include, fields):
+    with pytest.raises(ProjectionError):
+        Projection.parse(include, fields, ALLOWED)
+
+
+def test_apply_keeps_selected_parts_and_fields():
+    projection = Projection.parse('items', {'sections': 'status', 'meeting': 'title'}, ALLOWED)
+    assert projection.apply(FULL_DATA) == {
+        "meeting": {"id": "m1", "title": "t"},
+        "sections": [{"id": "s1", "status": "completed", "items": [{"id": "i1", "text": "x"}]}],
+    }
+    assert FULL.apply(FULL_DATA) == FULL_DATA
+
+
+def test_full_endpoint_projection(client, meeting):
+    meeting_id, sections = meeting
+    body = client.get(f'/meetings/{meeting_id}/full',
+                      params={'include': 'sections', 'fields[sections]': 'status'}).json()
+    assert set(body) == {'meeting', 'sections'}
+    assert body['sections'] == [{"id": s["id"], "status": s["status"]} for s in sections]
+
+    response = client.get(f'/meetings/{meeting_id}/full', params={'fields[items]': 'secret'})
+    assert response.status_code == 400
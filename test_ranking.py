@@ -0,0 +1,70 @@
+import pytest
+
+from ranking import (MAX_RANK_LENGTH, RankError, insert_index, order_from_rank, plan_move, rank_between,
+                     rank_from_order, rank_of)
+
+
+def sections(*orders):
+    return [{"id": f"s{order}", "order": order, "rank": None} for order in orders]
+
+
+def apply(siblings, moved, moves):
+    """plan_move の書き込みを反映し、rank 順に並べたIDを返す"""
+    docs = {doc["id"]: dict(doc) for doc in siblings + [moved]}
+    for doc_id, fields in moves.items():
+        docs[doc_id].update(fields)
+    return [doc["id"] for doc in sorted(docs.values(), key=rank_of)]
+
+
+def test_rank_from_order_preserves_order():
+    ranks = [rank_from_order(order) for order in range(0, 200)]
+    assert ranks == sorted(ranks)
+    assert [order_from_rank(rank) for rank in ranks] == list(range(0, 200))
+
+
+@pytest.mark.parametrize('lower, upper', [
+    (None, None), ('0001V', None), (None, '0001V'), ('0001V', '0002V'), ('0001V', '0001W'), ('0001V', '0001V1')])
+def test_rank_between_is_strictly_between(lower, upper):
+    rank = rank_between(lower, upper)
+    assert (lower is None or lower < rank) and (upper is None or rank < upper)
+    assert not rank.endswith('0')
+
+
+def test_rank_between_rejects_reversed_bounds():
+    with pytest.raises(RankError):
+        rank_between('0002V', '0001V')
+
+
+def test_move_writes_only_the_moved_rank():
+    """並べ替えは移動するドキュメントの rank だけを書き換え、order は変えない（兄弟と重複させない）"""
+    s1, s2, s3 = sections(1, 2, 3)
+    moves = plan_move([s2, s3], 's1', 1)
+    assert list(moves) == ['s1'] and set(moves['s1']) == {'rank'}
+    assert apply([s2, s3], s1, moves) == ['s2', 's1', 's3']
+
+
+def test_repeated_moves_keep_a_single_write():
+    items = sections(*range(1, 11))
+    for _ in range(40):
+        moved, rest = items[0], items[1:]
+        moves = plan_move(rest, moved["id"], 1)
+        assert len(moves) == 1
+        moved = {**moved, **moves[moved["id"]]}
+        items = sorted(rest + [moved], key=rank_of)
+    assert all(len(rank_of(item)) <= MAX_RANK_LENGTH for item in items)
+
+
+def test_rebalance_when_no_rank_fits():
+    siblings = [{"id": "a", "order": 1, "rank": None}, {"id": "b", "order": 1, "rank": None}]
+    moves = plan_move(siblings, 'c', 1)
+    assert [(doc_id, fields['order']) for doc_id, fields in moves.items()] == [('a', 1), ('c', 2), ('b', 3)]
+    assert [fields['rank'] for fields in moves.values()] == sorted(fields['rank'] for fields in moves.values())
+
+
+def test_insert_index():
+    siblings = sections(1, 2, 3)
+    assert insert_index(siblings) == 3
+    assert insert_index(siblings, after_id='s1') == 1
+    assert insert_index(siblings, before_id='s1') == 0
+    with pytest.raises(KeyError):
+        insert_index(siblings, after_id='missing')
@@ -0,0 +1,74 @@
+from main import Item, Meeting, Section, Task
+from repository import InMemoryRepository
+
+
+def meeting(meeting_id, when, status='scheduled', template_id=None):
+    return Meeting(id=meeting_id, title='t', datetime=when, status=status, template_id=template_id)
+
+
+def test_page_meetings_by_datetime_and_filters():
+    repository = InMemoryRepository()
+    repository.load(meetings=[meeting('m3', '2025-01-03'), meeting('m1', '2025-01-01', 'completed'),
+                              meeting('m2', '2025-01-02', template_id='t1')])
+    page, after = repository.page_meetings(2)
+    assert [m.id for m in page] == ['m1', 'm2'] and after == ('2025-01-02', 'm2')
+    page, after = repository.page_meetings(2, after)
+    assert [m.id for m in page] == ['m3'] and after is None
+    assert [m.id for m in repository.page_meetings(10, status='completed')[0]] == ['m1']
+    assert [m.id for m in repository.page_meetings(10, template_id='t1')[0]] == ['m2']
+    assert [m.id for m in repository.page_meetings(10, datetime_from='2025-01-02', datetime_to='2025-01-03')[0]] == ['m2']
+
+
+def test_update_meeting_reindexes_status():
+    repository = InMemoryRepository()
+    repository.put_meeting(meeting('m1', '2025-01-01'))
+    repository.update_meeting('m1', status='completed')
+    assert repository.page_meetings(10, status='scheduled')[0] == []
+    assert [m.id for m in repository.page_meetings(10, status='completed')[0]] == ['m1']
+
+
+def test_sections_follow_order_and_reorder():
+    repository = InMemoryRepository()
+    repository.put_meeting(meeting('m1', '2025-01-01'))
+    for order in (2, 3, 1):
+        repository.put_section('m1', Section(id=f's{order}', title='x', order=order))
+    assert [section.id for section in repository.list_sections('m1')] == ['s1', 's2', 's3']
+    repository.update_section('s1', order=4)
+    assert [section.id for section in repository.list_sections('m1')] == ['s2', 's3', 's1']
+    assert repository.section_meeting_id('s1') == 'm1'
+
+
+def test_items_follow_rank_and_section_moves():
+    repository = InMemoryRepository()
+    repository.put_meeting(meeting('m1', '2025-01-01'))
+    repository.put_section('m1', Section(id='s1', title='a', order=1))
+    repository.put_section('m1', Section(id='s2', title='b', order=2))
+    for order in (3, 1, 2):
+        repository.put_item(Item(id=f'i{order}', section_id='s1', text='x', order=order))
+    assert [item.id for item in repository.list_items('s1')] == ['i1', 'i2', 'i3']
+    repository.update_item('i1', section_id='s2')
+    assert [item.id for item in repository.list_items('s1')] == ['i2', 'i3']
+    assert [item.id for item in repository.list_items('s2')] == ['i1']
+
+
+def test_delete_meeting_removes_children():
+    repository = InMemoryRepository()
+    repository.put_meeting(meeting('m1', '2025-01-01'))
+    repository.put_section('m1', Section(id='s1', title='a', order=1))
+    repository.put_item(Item(id='i1', section_id='s1', text='x', order=1))
+    repository.put_task('m1', Task(id='t1', text='x', assignee='a', due_date='2025-01-01', status='open'))
+    assert repository.delete_meeting('m1')
+    assert (repository.get_section('s1'), repository.get_item('i1'), repository.get_task('t1')) == (None, None, None)
+    assert repository.page_meetings(10) == ([], None)
+
+
+def test_update_meeting_rejects_different_id(client, meeting):
+    meeting_id, _ = meeting
+    body = {**client.get(f'/meetings/{meeting_id}').json(), "id": f"{meeting_id}_other", "title": "renamed"}
+    response = client.patch(f'/meetings/{meeting_id}', json=body)
+    assert response.status_code == 400
+    assert client.get(f'/meetings/{meeting_id}_other').status_code == 404
+    assert client.get(f'/meetings/{meeting_id}').json()["title"] == "test"
+
+    response = client.patch(f'/meetings/{meeting_id}', json={**body, "id": meeting_id})
+    assert response.status_code == 200 and response.json()["title"] == "renamed"
@@ -0,0 +1,52 @@
+import math
+
+import pytest
+
+from ttl_policy import (COMPLETED, IN_PROGRESS, REASON_COMPLETED, REASON_DEFAULT, REASON_IDLE, REASON_LIVE,
+                        REASON_STATIC, RateTracker, TTLPolicy)
+
+
+def policy():
+    return TTLPolicy(completed_ttl=3600, live_ttl=600, idle_factor=4, hot_factor=2, max_ttl=7200,
+                     live_write_rate=0.05, idle_write_rate=0.001, hot_access_rate=1.0)
+
+
+def test_rate_tracker_decays_by_half_life():
+    tracker = RateTracker(half_life=10, max_entries=2)
+    tracker.observe('m1', now=0)
+    assert tracker.rate('m1', now=10) == pytest.approx(math.log(2) / 10 / 2)
+    tracker.observe('m2', now=0)
+    tracker.observe('m3', now=0)
+    assert len(tracker) == 2 and tracker.rate('m1') == 0.0
+
+
+@pytest.mark.parametrize('status, writes, expected', [
+    (COMPLETED, 0, (3600, REASON_COMPLETED)),
+    (IN_PROGRESS, 0, (600, REASON_LIVE)),
+    (None, 10, (600, REASON_LIVE)),
+    (None, 0, (240, REASON_IDLE)),
+    (None, 1, (60, REASON_DEFAULT)),
+])
+def test_ttl_follows_status_and_write_rate(status, writes, expected):
+    ttl_policy = policy()
+    ttl_policy.observe_status('m1', status)
+    for _ in range(writes):
+        ttl_policy.observe_write('m1')
+    decision = ttl_policy.decide('meeting_full:m1:g0', 60, 'm1')
+    assert (decision.ttl, decision.reason) == expected
+    assert ttl_policy.explain('meeting_full:m1:g0') == decision
+
+
+def test_hot_keys_live_longer_up_to_the_cap():
+    ttl_policy = policy()
+    ttl_policy.observe_status('m1', IN_PROGRESS)
+    for _ in range(1000):
+        ttl_policy.observe_access('m1')
+    assert ttl_policy.decide('meeting_full:m1:g0', 60, 'm1').ttl == 1200
+    ttl_policy.live_ttl = 5000
+    assert ttl_policy.decide('meeting_full:m1:g0', 60, 'm1').ttl == 7200
+
+
+def test_keys_outside_meetings_keep_their_ttl():
+    decision = policy().decide('template:t1', 3600)
+    assert (decision.ttl, decision.reason) == (3600, REASON_STATIC)
@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+
+from circuit_breaker import CLOSED, OPEN
+from datastore_ops import OP_DELETE, OP_SET, OP_UPDATE
+from write_behind import WriteBehindBuffer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Store:
+    """データストアの代わり（反映したバッチを記録する）"""
+
+    def __init__(self, docs=None):
+        self.docs = {key: dict(doc) for key, doc in (docs or {}).items()}
+        self.batches = []
+
+    async def commit_batch(self, ops):
+        self.batches.append(ops)
+        for op, collection, doc_id, data in ops:
+            key = (collection, doc_id)
+            if op == OP_DELETE:
+                self.docs.pop(key, None)
+            elif op == OP_UPDATE:
+                self.docs[key] = {**self.docs.get(key, {}), **data}
+            else:
+                self.docs[key] = dict(data)
+
+    async def get(self, collection, doc_id):
+        doc = self.docs.get((collection, doc_id))
+        return dict(doc) if doc is not None else None
+
+    def query(self, collection, field, value):
+        return [dict(doc) for (c, _), doc in self.docs.items() if c == collection and doc.get(field) == value]
+
+
+@pytest.fixture
+def store():
+    return Store({
+        ('items', 'i1'): {"id": "i1", "section_id": "s1", "meeting_id": "m1", "text": "a"},
+        ('items', 'i2'): {"id": "i2", "section_id": "s1", "meeting_id": "m1", "text": "b"},
+    })
+
+
+@pytest.fixture
+def buffer(cache, store):
+    return WriteBehindBuffer(cache, writer=store.commit_batch, reader=store.get)
+
+
+async def live(buffer, *meeting_ids):
+    for meeting_id in meeting_ids:
+        await buffer.mark_live(meeting_id)
+
+
+def test_not_live_is_not_buffered(buffer):
+    assert run(buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "x"})) is False
+
+
+def test_updates_coalesce_into_one_flushed_document(buffer, store):
+    async def scenario():
+        await live(buffer, 'm1')
+        for i in range(10):
+            assert await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": f"v{i}"})
+        report = await buffer.flush('m1')
+        return report, await buffer.cache.redis.keys('wb:doc:*')
+
+    report, copies = run(scenario())
+    assert report["documents"] == 1 and report["cleared"] == 1
+    assert store.batches == [[(OP_UPDATE, 'items', 'i1', {"text": "v9"})]]
+    assert store.docs[('items', 'i1')]["text"] == "v9"
+    assert copies == []
+
+
+def test_reads_overlay_buffered_writes(buffer, store):
+    async def scenario():
+        await live(buffer, 'm1')
+        await buffer.write('m1', OP_SET, 'items', 'i3', {"id": "i3", "section_id": "s1", "meeting_id": "m1", "text": "c"})
+        await buffer.write('m1', OP_DELETE, 'items', 'i2')
+        await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "x"})
+        docs = await buffer.overlay_query('m1', 'items', 'section_id', 's1', store.query('items', 'section_id', 's1'))
+        return docs, await buffer.overlay_document('items', 'i2', store.docs[('items', 'i2')])
+
+    docs, deleted = run(scenario())
+    assert sorted((doc["id"], doc["text"]) for doc in docs) == [("i1", "x"), ("i3", "c")]
+    assert deleted is None and store.batches == []
+
+
+def test_moved_item_appears_only_in_new_section(buffer, store):
+    """section_id の部分更新で移動した項目は、反映前でも移動先のクエリにだけ現れる"""
+    async def scenario():
+        await live(buffer, 'm1')
+        await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"section_id": "s2", "rank": "m"})
+        old = await buffer.overlay_query('m1', 'items', 'section_id', 's1', store.query('items', 'section_id', 's1'))
+        new = await buffer.overlay_query('m1', 'items', 'section_id', 's2', store.query('items', 'section_id', 's2'))
+        return old, new
+
+    old, new = run(scenario())
+    assert [doc["id"] for doc in old] == ['i2']
+    assert new == [{"id": "i1", "section_id": "s2", "meeting_id": "m1", "text": "a", "rank": "m"}]
+
+
+def test_overlay_reads_only_the_meetings_index(buffer, store):
+    async def scenario():
+        await live(buffer, 'm1', 'm2')
+        await buffer.write('m1', OP_SET, 'items', 'i3', {"id": "i3", "section_id": "s1", "meeting_id": "m1"})
+        await buffer.write('m2', OP_SET, 'items', 'x1', {"id": "x1", "section_id": "s9", "meeting_id": "m2"})
+        docs = await buffer.overlay_query('m1', 'items', 'section_id', 's1', store.query('items', 'section_id', 's1'))
+        return docs, sorted(await buffer.cache.redis.keys('wb:index:*'))
+
+    docs, index_keys = run(scenario())
+    assert sorted(doc["id"] for doc in docs) == ['i1', 'i2', 'i3']
+    assert index_keys == [b'wb:index:m1:items', b'wb:index:m2:items']
+
+
+def test_direct_write_while_redis_down_is_not_overwritten(buffer, store, cache):
+    """遮断中に直接書き込んだドキュメントは、復旧後の反映で古い作業コピーに上書きされない"""
+    async def scenario():
+        await live(buffer, 'm1')
+        await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "buffered"})
+        await asyncio.sleep(0.002)
+
+        cache.breaker.state = OPEN
+        assert not await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "direct"})
+        await store.commit_batch([(OP_UPDATE, 'items', 'i1', {"text": "direct"})])
+        await buffer.superseded('m1', 'items', 'i1')
+        assert buffer.get_stats()["pending_superseded"] == 1
+
+        cache.breaker.state = CLOSED
+        for hook in cache.reconnect_hooks:
+            await hook()
+        await buffer.flush_all()
+        return await buffer.replay()
+
+    restored = run(scenario())
+    assert store.docs[('items', 'i1')]["text"] == "direct"
+    assert buffer.documents_dropped == 1
+    # 捨てた作業コピーはジャーナルの再生でも作り直さない
+    assert restored == 0
+
+
+def test_newer_buffered_write_survives_superseded(buffer, store):
+    async def scenario():
+        await live(buffer, 'm1')
+        await buffer._drop('m1', 'items', 'i1', 0)
+        await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "newer"})
+        await buffer._drop('m1', 'items', 'i1', 0)  # 書き込みより前の直接書き込み
+        await buffer.flush('m1')
+
+    run(scenario())
+    assert store.docs[('items', 'i1')]["text"] == "newer"
+
+
+def test_replay_rebuilds_lost_copies(buffer, store, cache):
+    async def scenario():
+        await live(buffer, 'm1')
+        await buffer.write('m1', OP_SET, 'items', 'i3', {"id": "i3", "section_id": "s1", "text": "new"})
+        await buffer.write('m1', OP_UPDATE, 'items', 'i3', {"text": "edited"})
+        await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "x"})
+        await buffer.write('m1', OP_DELETE, 'items', 'i2')
+        # 作業コピーと未反映セットが失われた（ジャーナルは残っている）
+        await cache.redis.delete('wb:doc:items:i3', 'wb:doc:items:i2', 'wb:dirty:m1')
+        restored = await buffer.replay()
+        again = await buffer.replay()
+        await buffer.flush('m1')
+        return restored, again
+
+    restored, again = run(scenario())
+    assert (restored, again) == (2, 0)
+    assert store.docs[('items', 'i3')] == {"id": "i3", "section_id": "s1", "text": "edited"}
+    assert store.docs[('items', 'i1')]["text"] == "x"
+    assert ('items', 'i2') not in store.docs
+
+
+def test_discard_documents_drops_only_listed(buffer, store):
+    async def scenario():
+        await live(buffer, 'm1')
+        await buffer.write('m1', OP_UPDATE, 'sections', 's1', {"title": "x"})
+        await buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "x"})
+        await buffer.write('m1', OP_UPDATE, 'items', 'i2', {"text": "y"})
+        dropped = await buffer.discard_documents('m1', [('sections', 's1'), ('items', 'i1'), ('items', 'i9')])
+        await buffer.flush('m1')
+        return dropped
+
+    assert run(scenario()) == 2
+    assert store.batches == [[(OP_UPDATE, 'items', 'i2', {"text": "y"})]]
+
+
+def test_errors_are_counted(buffer, cache):
+    async def fail(*args, **kwargs):
+        raise ConnectionError('redis down')
+
+    cache.redis.sismember = fail
+    assert run(buffer.write('m1', OP_UPDATE, 'items', 'i1', {"text": "x"})) is False
+    assert buffer.get_stats()["errors"] == {"is_live": 1}
+    assert 'write_behind_errors_total{op="is_live"} 1' in buffer.render_metrics()
@@ -0,0 +1,188 @@
+import math
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# 会議のステータス
+SCHEDULED = 'scheduled'
+IN_PROGRESS = 'in_progress'
+COMPLETED = 'completed'
+
+# 決定理由
+REASON_STATIC = 'static'        # 会議に属さないキー（エンティティタイプ別のTTLのまま）
+REASON_COMPLETED = 'completed'  # 完了した会議（ほぼ変更されないため長く保持）
+REASON_LIVE = 'live'            # 進行中・書き込みの多い会議（世代による無効化に任せる）
+REASON_IDLE = 'idle'            # 最近書き込みのない会議
+REASON_DEFAULT = 'default'      # 上記以外
+REASONS = (REASON_STATIC, REASON_COMPLETED, REASON_LIVE, REASON_IDLE, REASON_DEFAULT)
+
+
+class TTLDecision(NamedTuple):
+    """キーごとのTTLの決定内容（デバッグ用に保持する）"""
+    ttl: float
+    base_ttl: float
+    reason: str
+    status: Optional[str]
+    write_rate: float   # 会議への書き込み頻度（回/秒）
+    access_rate: float  # 会議から派生するキャッシュの参照頻度（回/秒）
+    hot: bool
+    decided_at: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+class RateTracker:
+    """IDごとの発生頻度（回/秒）を指数移動平均で推定する
+
+    half_life 秒ごとに過去の発生の重みが半分になる。追跡するID数は max_entries までで、
+    古いものから捨てる。
+    """
+
+    def __init__(self, half_life: float = 60.0, max_entries: int = 10000):
+        self.decay = math.log(2) / half_life
+        self.max_entries = max_entries
+        # ID -> (推定頻度, 最終更新時刻)
+        self._rates: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def observe(self, key: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        rate = self.rate(key, now) + self.decay
+        self._rates[key] = (rate, now)
+        self._rates.move_to_end(key)
+        while len(self._rates) > self.max_entries:
+            self._rates.popitem(last=False)
+
+    def rate(self, key: str, now: Optional[float] = None) -> float:
+        entry = self._rates.get(key)
+        if entry is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        rate, updated = entry
+        return rate * math.exp(-self.decay * (now - updated))
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+
+class TTLPolicy:
+    """会議のステータス・書き込み頻度・参照頻度からキーごとのTTLを決めるクラス
+
+    会議から派生するキーは世代番号付きで、書き込みのたびに世代の更新で無効化されるため、
+    TTLは鮮度ではなくメモリの使い方だけを左右する。そのため
+    - completed: ほぼ変更されないので completed_ttl（数時間）保持する
+    - in_progress・書き込みが多い: 短いTTLで再計算を繰り返さず、live_ttl 保持して無効化に任せる
+    - 最近書き込みがない: エンティティタイプ別のTTLの idle_factor 倍
+    - 参照の多い（hot）キーはさらに hot_factor 倍（completed 以外）
+    とし、max_ttl で上限を設ける。ステータスはワーカーごとに観測した値を使う。
+    """
+
+    def __init__(self, completed_ttl: float = 6 * 3600, live_ttl: float = 600,
+                 idle_factor: float = 4.0, hot_factor: float = 2.0, max_ttl: float = 24 * 3600,
+                 live_write_rate: float = 0.05, idle_write_rate: float = 0.001,
+                 hot_access_rate: float = 1.0, half_life: float = 60.0,
+                 max_decisions: int = 1000, max_meetings: int = 10000):
+        self.completed_ttl = completed_ttl
+        self.live_ttl = live_ttl
+        self.idle_factor = idle_factor
+        self.hot_factor = hot_factor
+        self.max_ttl = max_ttl
+        self.live_write_rate = live_write_rate
+        self.idle_write_rate = idle_write_rate
+        self.hot_access_rate = hot_access_rate
+        self.max_decisions = max_decisions
+        self.max_meetings = max_meetings
+
+        self._statuses: "OrderedDict[str, str]" = OrderedDict()
+        self.writes = RateTracker(half_life, max_meetings)
+        self.accesses = RateTracker(half_life, max_meetings)
+        # キー -> 直近の決定（新しいものほど後ろ）
+        self._decisions: "OrderedDict[str, TTLDecision]" = OrderedDict()
+        self.decision_counts: Dict[str, int] = defaultdict(int)
+
+    def observe_status(self, meeting_id: str, status: Optional[str]) -> None:
+        """会議のステータスを記録（会議データの取得・ステータスの変更時に呼ぶ）"""
+        if not status:
+            return
+        self._statuses[meeting_id] = status
+        self._statuses.move_to_end(meeting_id)
+        while len(self._statuses) > self.max_meetings:
+            self._statuses.popitem(last=False)
+
+    def forget(self, meeting_id: str) -> None:
+        """削除された会議の情報を捨てる"""
+        self._statuses.pop(meeting_id, None)
+
+    def observe_write(self, meeting_id: str) -> None:
+        self.writes.observe(meeting_id)
+
+    def observe_access(self, meeting_id: str) -> None:
+        self.accesses.observe(meeting_id)
+
+    def decide(self, key: str, base_ttl: float, meeting_id: Optional[str] = None) -> TTLDecision:
+        """キーのTTLを決め、決定内容を記録して返す"""
+        status = None
+        write_rate = access_rate = 0.0
+        hot = False
+        if meeting_id is None:
+            ttl, reason = base_ttl, REASON_STATIC
+        else:
+            status = self._statuses.get(meeting_id)
+            write_rate = self.writes.rate(meeting_id)
+            access_rate = self.accesses.rate(meeting_id)
+            if status == COMPLETED:
+                ttl, reason = max(base_ttl, self.completed_ttl), REASON_COMPLETED
+            elif status == IN_PROGRESS or write_rate >= self.live_write_rate:
+                ttl, reason = max(base_ttl, self.live_ttl), REASON_LIVE
+            elif write_rate < self.idle_write_rate:
+                ttl, reason = base_ttl * self.idle_factor, REASON_IDLE
+            else:
+                ttl, reason = base_ttl, REASON_DEFAULT
+            if reason != REASON_COMPLETED and access_rate >= self.hot_access_rate:
+                ttl *= self.hot_factor
+                hot = True
+            ttl = min(ttl, max(base_ttl, self.max_ttl))
+
+        decision = TTLDecision(ttl, base_ttl, reason, status, write_rate, access_rate, hot, time.time())
+        self._decisions[key] = decision
+        self._decisions.move_to_end(key)
+        while len(self._decisions) > self.max_decisions:
+            self._decisions.popitem(last=False)
+        self.decision_counts[reason] += 1
+        return decision
+
+    def explain(self, key: str) -> Optional[TTLDecision]:
+        """キーに対する直近の決定を取得（このワーカーで決めたもののみ）"""
+        return self._decisions.get(key)
+
+    def recent(self, limit: int = 100, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """直近の決定を新しい順に取得"""
+        result = []
+        for key in reversed(self._decisions):
+            if prefix and not key.startswith(prefix):
+                continue
+            result.append({"key": key, **self._decisions[key].to_dict()})
+            if len(result) >= limit:
+                break
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "completed_ttl": self.completed_ttl,
+            "live_ttl": self.live_ttl,
+            "idle_factor": self.idle_factor,
+            "hot_factor": self.hot_factor,
+            "max_ttl": self.max_ttl,
+            "tracked_meetings": len(self._statuses),
+            "decisions": dict(self.decision_counts),
+        }
+
+    def render_prometheus(self, namespace: str = 'cache') -> List[str]:
+        """Prometheusのテキスト形式の行を返す"""
+        lines = [
+            f"# HELP {namespace}_ttl_decisions_total TTL policy decisions by reason",
+            f"# TYPE {namespace}_ttl_decisions_total counter",
+        ]
+        for reason in REASONS:
+            lines.append(f'{namespace}_ttl_decisions_total{{reason="{reason}"}} {self.decision_counts.get(reason, 0)}')
+        return lines
@@ -0,0 +1,676 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cache_metrics import Histogram
+from datastore_ops import OP_DELETE, OP_SET, OP_UPDATE
+
+# 作業コピー（Redisのハッシュ）の予約フィールド
+# それ以外のフィールドはドキュメントのフィールドをJSONで保持する
+FIELD_OP = '__op'
+FIELD_VERSION = '__version'
+
+# 反映の遅れ（秒）のバケット上限
+FLUSH_LAG_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# ジャーナルに追記し、作業コピーに反映するLuaスクリプト
+# 部分更新はフィールドを上書きし、全体の上書き・削除はそれまでのフィールドを置き換える。
+# 作業コピーのバージョンにはジャーナルのIDを使う（削除・再作成をまたいでも一意）。
+# KEYS: {ジャーナル, 作業コピー, 未反映セット, 会議・コレクション別の索引, 未反映の会議の一覧}
+# ARGV: {操作, コレクション, ドキュメントID, データ(JSON), 未反映セットのメンバー, 会議ID, (フィールド, 値)...}
+WRITE_LUA = """
+local id = redis.call('XADD', KEYS[1], '*', 'op', ARGV[1], 'collection', ARGV[2], 'doc_id', ARGV[3], 'data', ARGV[4])
+if ARGV[1] == 'update' then
+    redis.call('HSETNX', KEYS[2], '__op', 'update')
+else
+    redis.call('DEL', KEYS[2])
+    redis.call('HSET', KEYS[2], '__op', ARGV[1])
+end
+for i = 7, #ARGV, 2 do
+    redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+redis.call('HSET', KEYS[2], '__version', id)
+redis.call('SADD', KEYS[3], ARGV[5])
+redis.call('SADD', KEYS[4], ARGV[3])
+redis.call('SADD', KEYS[5], ARGV[6])
+return id
+"""
+
+# 反映済みの作業コピーを削除するLuaスクリプト
+# 読み出した後に更新されたドキュメント（バージョンが変わったもの）は残し、次回の反映に回す。
+# 作業コピーが既にない（他のワーカーが反映済み）場合は未反映セットと索引からのみ削除する。
+# KEYS: {未反映セット, 会議・コレクション別の索引..., 作業コピー...}（索引と作業コピーは同数）
+# ARGV: {ドキュメント数, (未反映セットのメンバー, ドキュメントID, バージョン)...}
+CLEAR_FLUSHED_LUA = """
+local count = tonumber(ARGV[1])
+local cleared = 0
+for i = 1, count do
+    local doc_key = KEYS[1 + count + i]
+    local base = 1 + (i - 1) * 3
+    local version = redis.call('HGET', doc_key, '__version')
+    if version == false or version == ARGV[base + 3] then
+        redis.call('DEL', doc_key)
+        redis.call('SREM', KEYS[1], ARGV[base + 1])
+        redis.call('SREM', KEYS[1 + i], ARGV[base + 2])
+        cleared = cleared + 1
+    end
+end
+return cleared
+"""
+
+# 直接書き込んだドキュメントの作業コピーを削除するLuaスクリプト
+# 直接書き込んだ時刻より後に溜めた書き込み（バージョンのミリ秒が大きいもの）は残す。
+# 削除した場合はジャーナルに drop を追記し、ジャーナルの再生で作業コピーが復元されないようにする。
+# KEYS: {ジャーナル, 作業コピー, 未反映セット, 会議・コレクション別の索引}
+# ARGV: {コレクション, ドキュメントID, 未反映セットのメンバー, 直接書き込んだ時刻（ミリ秒）}
+DROP_LUA = """
+local version = redis.call('HGET', KEYS[2], '__version')
+if version == false or tonumber(string.match(version, '^(%d+)')) > tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('XADD', KEYS[1], '*', 'op', 'drop', 'collection', ARGV[1], 'doc_id', ARGV[2], 'data', '{}')
+redis.call('DEL', KEYS[2])
+redis.call('SREM', KEYS[3], ARGV[3])
+redis.call('SREM', KEYS[4], ARGV[2])
+return 1
+"""
+
+# ジャーナルから作り直した作業コピーを書き込むLuaスクリプト
+# 作業コピーが残っている（その後に書き込まれた）ドキュメントは上書きせず、未反映セットと索引にだけ戻す。
+# KEYS: {作業コピー, 未反映セット, 会議・コレクション別の索引, 未反映の会議の一覧}
+# ARGV: {操作, バージョン, 未反映セットのメンバー, ドキュメントID, 会議ID, (フィールド, 値)...}
+RESTORE_LUA = """
+local restored = 0
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], '__op', ARGV[1], '__version', ARGV[2])
+    for i = 6, #ARGV, 2 do
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    restored = 1
+end
+redis.call('SADD', KEYS[2], ARGV[3])
+redis.call('SADD', KEYS[3], ARGV[4])
+redis.call('SADD', KEYS[4], ARGV[5])
+return restored
+"""
+
+# ジャーナルの操作のうち、作業コピーを捨てたことを表すもの（直接書き込み・セクションの削除）
+OP_DROP = 'drop'
+
+
+def _encode_fields(data: Dict[str, Any]) -> Dict[str, str]:
+    return {field: json.dumps(value, ensure_ascii=False) for field, value in data.items()}
+
+
+def _decode_fields(raw: Dict[Any, Any]) -> Tuple[Optional[str], Optional[str], Dict[str, Any]]:
+    """作業コピーのハッシュから (操作, バージョン, フィールド) を取り出す"""
+    op = None
+    version = None
+    data: Dict[str, Any] = {}
+    for field, value in raw.items():
+        field = field.decode('utf-8') if isinstance(field, bytes) else field
+        value = value.decode('utf-8') if isinstance(value, bytes) else value
+        if field == FIELD_OP:
+            op = value
+        elif field == FIELD_VERSION:
+            version = value
+        else:
+            data[field] = json.loads(value)
+    return op, version, data
+
+
+def _decode(value: Any) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _replay_entries(entries: List[Tuple[Any, Dict[Any, Any]]],
+                    state: Dict[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]) -> None:
+    """ジャーナルの記録を WRITE_LUA と同じ規則で畳み込む（state: (コレクション, ID) -> (操作, バージョン, フィールド)）"""
+    for stream_id, fields in entries:
+        fields = {_decode(k): _decode(v) for k, v in fields.items()}
+        op = fields['op']
+        key = (fields['collection'], fields['doc_id'])
+        if op == OP_DROP:
+            state.pop(key, None)
+            continue
+        data = json.loads(fields['data']) if op != OP_DELETE else {}
+        previous = state.get(key)
+        if op == OP_UPDATE and previous is not None:
+            state[key] = (previous[0], _decode(stream_id), {**previous[2], **data})
+        else:
+            state[key] = (op, _decode(stream_id), data)
+
+
+def _stream_id_time(stream_id: Any) -> float:
+    """ストリームID（ミリ秒-連番）からUNIX時間を取り出す"""
+    if isinstance(stream_id, bytes):
+        stream_id = stream_id.decode('utf-8')
+    return int(stream_id.split('-', 1)[0]) / 1000
+
+
+def _next_stream_id(stream_id: Any) -> str:
+    """指定したIDの直後のストリームID（XTRIM MINID の境界に使う）"""
+    if isinstance(stream_id, bytes):
+        stream_id = stream_id.decode('utf-8')
+    ms, seq = stream_id.split('-', 1)
+    return f"{ms}-{int(seq) + 1}"
+
+
+class WriteBehindBuffer:
+    """進行中の会議に対する書き込みをRedisに溜め、まとめてデータストアに反映するクラス
+
+    - 書き込みはRedisの追記専用ジャーナル（Stream）に記録し、同じトランザクションで
+      ドキュメントごとの作業コピー（ハッシュ）に反映する。同じドキュメントへの連続した更新は
+      作業コピー上で1件にまとまる。
+    - 作業コピーは一定間隔で（いずれか1つのワーカーが）、または会議の完了時に、
+      max_batch_size 件ずつのバッチでデータストアに書き込む。
+    - 反映が済んだジャーナルは削除する。残っているジャーナルの最も古い記録からの経過時間を
+      反映の遅れ（flush lag）として公開する。
+    - 起動時（最初の定期反映の前）にジャーナルを再生し、失われた作業コピーを作り直す。
+    - クエリ結果への重ね合わせは会議ごとの索引を使い、その会議の未反映のドキュメントだけを読む。
+
+    Redisが使えない場合（サーキットが open の場合）は溜めずに、呼び出し側が直接書き込み、
+    superseded() で古い作業コピーを捨てる（遮断中の分はRedisの復旧時に捨てる）。
+    ジャーナルと作業コピーの永続性はRedisの永続化設定（AOF）に依存する。
+    """
+
+    def __init__(self, cache_manager, writer: Callable[[List[Tuple[str, str, str, Dict[str, Any]]]], Awaitable[None]],
+                 reader: Optional[Callable[[str, str], Awaitable[Optional[Dict[str, Any]]]]] = None):
+        self.cache = cache_manager
+        # (操作, コレクション, ドキュメントID, データ) のリストを1バッチで書き込む関数
+        self.writer = writer
+        # (コレクション, ドキュメントID) からデータストアのドキュメントを読む関数
+        # （部分更新でクエリの条件を満たすようになったドキュメントの重ね合わせに使う）
+        self.reader = reader
+        self.prefix = 'wb:'
+        self.flush_interval = float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL', 2.0))
+        # Firestoreのバッチ書き込みの上限は500件
+        self.max_batch_size = min(int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500)), 500)
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_script = None
+        self._clear_script = None
+        self._drop_script = None
+        self._restore_script = None
+        self._replayed = False
+        # Redisが使えない間に直接書き込んだドキュメント: (会議ID, コレクション, ドキュメントID) -> 時刻（ミリ秒）
+        self._superseded: Dict[Tuple[str, str, str], int] = {}
+        # 復旧時（キャッシュの再開前）に古い作業コピーを捨てる
+        self.cache.reconnect_hooks.append(self.drop_superseded)
+
+        self.mutations = 0
+        self.documents_flushed = 0
+        self.batches = 0
+        self.flush_errors = 0
+        self.documents_dropped = 0
+        self.documents_restored = 0
+        # 操作 -> Redisのエラー件数
+        self.errors: Dict[str, int] = defaultdict(int)
+        # 反映が完了した時点で、最も古い未反映の記録から経過していた秒数
+        self.flush_lag = Histogram(FLUSH_LAG_BUCKETS)
+        # 直近に計測した、未反映の記録のうち最も古いものの経過秒数
+        self.current_lag = 0.0
+        self.last_flush: Optional[Dict[str, Any]] = None
+
+    # ----- キー -----
+    def _live_key(self) -> str:
+        return f"{self.prefix}live"
+
+    def _meetings_key(self) -> str:
+        return f"{self.prefix}meetings"
+
+    def _journal_key(self, meeting_id: str) -> str:
+        return f"{self.prefix}journal:{meeting_id}"
+
+    def _dirty_key(self, meeting_id: str) -> str:
+        return f"{self.prefix}dirty:{meeting_id}"
+
+    def _index_key(self, meeting_id: str, collection: str) -> str:
+        return f"{self.prefix}index:{meeting_id}:{collection}"
+
+    def _doc_key(self, collection: str, doc_id: str) -> str:
+        return f"{self.prefix}doc:{collection}:{doc_id}"
+
+    # ----- 会議の状態 -----
+    async def mark_live(self, meeting_id: str) -> None:
+        """会議を書き込みを溜める対象にする（会議の開始時に呼び出す）"""
+        if not self.cache.allow_redis():
+            return
+        try:
+            await self.cache._call(self.cache.redis.sadd(self._live_key(), meeting_id))
+        except Exception:
+            self.errors['mark_live'] += 1
+
+    async def unmark_live(self, meeting_id: str) -> None:
+        """会議を書き込みを溜める対象から外す（会議の完了時、反映後に呼び出す）"""
+        if not self.cache.allow_redis():
+            return
+        try:
+            await self.cache._call(self.cache.redis.srem(self._live_key(), meeting_id))
+        except Exception:
+            self.errors['unmark_live'] += 1
+
+    async def is_live(self, meeting_id: str) -> bool:
+        if not self.cache.allow_redis():
+            return False
+        try:
+            return bool(await self.cache._call(self.cache.redis.sismember(self._live_key(), meeting_id)))
+        except Exception:
+            self.errors['is_live'] += 1
+            return False
+
+    # ----- 書き込み -----
+    async def write(self, meeting_id: str, op: str, collection: str, doc_id: str,
+                    data: Optional[Dict[str, Any]] = None) -> bool:
+        """書き込みを溜める（溜めた場合は True、呼び出し側で直接書き込む必要がある場合は False）
+
+        会議が進行中でない場合やRedisが使えない場合は溜めない。
+        """
+        if not await self.is_live(meeting_id):
+            return False
+        data = data or {}
+        fields: List[str] = []
+        if op != OP_DELETE:
+            for field, value in _encode_fields(data).items():
+                fields.extend([field, value])
+        try:
+            # ジャーナルへの追記と作業コピーへの反映をアトミックに行う
+            if self._write_script is None:
+                self._write_script = self.cache.redis.register_script(WRITE_LUA)
+            await self.cache._call(self._write_script(
+                keys=[
+                    self._journal_key(meeting_id),
+                    self._doc_key(collection, doc_id),
+                    self._dirty_key(meeting_id),
+                    self._index_key(meeting_id, collection),
+                    self._meetings_key(),
+                ],
+                args=[op, collection, doc_id, json.dumps(data, ensure_ascii=False),
+                      f"{collection}/{doc_id}", meeting_id, *fields],
+            ))
+            self.mutations += 1
+            return True
+        except Exception:
+            self.errors['write'] += 1
+            return False
+
+    async def superseded(self, meeting_id: str, collection: str, doc_id: str) -> None:
+        """溜めずに直接書き込んだドキュメントの作業コピーを捨てる（直接書き込みの成功後に呼び出す）
+
+        古い作業コピーが後の反映で直接書き込んだ内容を上書きしないようにする。
+        Redisが使えない場合は記録しておき、復旧時（drop_superseded）に捨てる。
+        """
+        written_at = int(time.time() * 1000)
+        if self.cache.allow_redis():
+            try:
+                await self._drop(meeting_id, collection, doc_id, written_at)
+                return
+            except Exception:
+                self.errors['supersede'] += 1
+        if len(self._superseded) >= self.cache.max_pending_invalidations:
+            self.errors['supersede'] += 1
+            return
+        self._superseded[(meeting_id, collection, doc_id)] = written_at
+
+    async def drop_superseded(self) -> None:
+        """Redisが使えない間に直接書き込んだドキュメントの作業コピーを捨てる"""
+        for key, written_at in list(self._superseded.items()):
+            await self._drop(*key, written_at)
+            del self._superseded[key]
+
+    async def _drop(self, meeting_id: str, collection: str, doc_id: str, written_at: int) -> None:
+        if self._drop_script is None:
+            self._drop_script = self.cache.redis.register_script(DROP_LUA)
+        dropped = await self.cache._call(self._drop_script(
+            keys=[self._journal_key(meeting_id), self._doc_key(collection, doc_id),
+                  self._dirty_key(meeting_id), self._index_key(meeting_id, collection)],
+            args=[collection, doc_id, f"{collection}/{doc_id}", written_at],
+        ))
+        self.documents_dropped += dropped
+
+    # ----- 読み込み時の重ね合わせ -----
+    async def overlay_document(self, collection: str, doc_id: str,
+                               doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """データストアから読んだドキュメントに未反映の書き込みを重ねる"""
+        if not self.cache.allow_redis():
+            return doc
+        try:
+            raw = await self.cache._call(self.cache.redis.hgetall(self._doc_key(collection, doc_id)))
+        except Exception:
+            self.errors['overlay'] += 1
+            return doc
+        return self._apply(raw, doc)
+
+    async def overlay_query(self, meeting_id: str, collection: str, field: str, value: Any,
+                            docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """会議に属するドキュメントのクエリ結果に未反映の書き込みを重ねる（追加・削除・条件の変化を含む）
+
+        部分更新でクエリの条件を満たすようになったドキュメント（別のセクションへ移動した項目など）は、
+        データストアから元のドキュメントを読んで重ねる。
+        """
+        if not self.cache.allow_redis():
+            return docs
+        try:
+            doc_ids = await self.cache._call(self.cache.redis.smembers(self._index_key(meeting_id, collection)))
+            if not doc_ids:
+                return docs
+            doc_ids = [_decode(d) for d in doc_ids]
+            pipe = self.cache.redis.pipeline(transaction=False)
+            for doc_id in doc_ids:
+                pipe.hgetall(self._doc_key(collection, doc_id))
+            copies = await self.cache._call(pipe.execute())
+        except Exception:
+            self.errors['overlay'] += 1
+            return docs
+
+        by_id = {doc.get('id'): doc for doc in docs}
+        moved_in = []
+        for doc_id, raw in zip(doc_ids, copies):
+            if not raw:
+                continue
+            base = by_id.get(doc_id)
+            if base is None and self.reader is not None:
+                op, _, data = _decode_fields(raw)
+                if op == OP_UPDATE and data.get(field) == value:
+                    moved_in.append((doc_id, raw))
+                    continue
+            merged = self._apply(raw, base)
+            if merged is not None and merged.get(field) == value:
+                by_id[doc_id] = merged
+            else:
+                by_id.pop(doc_id, None)
+        if moved_in:
+            bases = await asyncio.gather(*(self.reader(collection, doc_id) for doc_id, _ in moved_in))
+            for (doc_id, raw), base in zip(moved_in, bases):
+                merged = self._apply(raw, base)
+                if merged is not None:
+                    by_id[doc_id] = merged
+        return list(by_id.values())
+
+    @staticmethod
+    def _apply(raw: Dict[Any, Any], doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not raw:
+            return doc
+        op, _, data = _decode_fields(raw)
+        if op == OP_DELETE:
+            return None
+        if op == OP_SET:
+            return data
+        # 部分更新は元のドキュメントがある場合のみ反映される（データストアの update と同じ）
+        return {**doc, **data} if doc is not None else None
+
+    # ----- 反映 -----
+    async def flush(self, meeting_id: str) -> Dict[str, Any]:
+        """会議の未反映の書き込みをバッチでデータストアに反映する"""
+        report = {
+            "meeting_id": meeting_id,
+            "documents": 0,
+            "batches": 0,
+            "cleared": 0,
+            "lag_seconds": 0.0,
+            "errors": 0,
+        }
+        if not self.cache.allow_redis():
+            return report
+
+        journal_key = self._journal_key(meeting_id)
+        dirty_key = self._dirty_key(meeting_id)
+        pipe = self.cache.redis.pipeline(transaction=False)
+        pipe.xrange(journal_key, count=1)
+        pipe.xrevrange(journal_key, count=1)
+        pipe.smembers(dirty_key)
+        oldest, newest, members = await self.cache._call(pipe.execute())
+        if oldest:
+            report["lag_seconds"] = max(0.0, time.time() - _stream_id_time(oldest[0][0]))
+
+        members = sorted(_decode(m) for m in members)
+        for start in range(0, len(members), self.max_batch_size):
+            chunk = members[start:start + self.max_batch_size]
+            pipe = self.cache.redis.pipeline(transaction=False)
+            for member in chunk:
+                collection, doc_id = member.split('/', 1)
+                pipe.hgetall(self._doc_key(collection, doc_id))
+            copies = await self.cache._call(pipe.execute())
+
+            ops = []
+            flushed = []
+            for member, raw in zip(chunk, copies):
+                collection, doc_id = member.split('/', 1)
+                if not raw:
+                    # 作業コピーが消えている（他のワーカーが反映済み）
+                    flushed.append((member, collection, doc_id, None))
+                    continue
+                op, version, data = _decode_fields(raw)
+                ops.append((op, collection, doc_id, data))
+                flushed.append((member, collection, doc_id, version))
+            try:
+                if ops:
+                    await self.writer(ops)
+                    report["batches"] += 1
+                    report["documents"] += len(ops)
+            except Exception:
+                report["errors"] += 1
+                continue
+            report["cleared"] += await self._clear_flushed(meeting_id, flushed)
+
+        if report["errors"] == 0:
+            # 読み出し前までのジャーナルは全て反映済み
+            if newest:
+                await self.cache._call(self.cache.redis.xtrim(
+                    journal_key, minid=_next_stream_id(newest[0][0]), approximate=False))
+            pipe = self.cache.redis.pipeline(transaction=False)
+            pipe.scard(dirty_key)
+            pipe.sismember(self._live_key(), meeting_id)
+            remaining, live = await self.cache._call(pipe.execute())
+            if not remaining and not live:
+                await self.cache._call(self.cache.redis.srem(self._meetings_key(), meeting_id))
+            if report["documents"] or newest:
+                self.flush_lag.observe(report["lag_seconds"])
+
+        self.documents_flushed += report["documents"]
+        self.batches += report["batches"]
+        self.flush_errors += report["errors"]
+        if report["documents"]:
+            self.last_flush = {**report, "finished_at": time.time()}
+        return report
+
+    async def _clear_flushed(self, meeting_id: str, flushed: List[tuple]) -> int:
+        """反映後に変更されていない作業コピーを削除する"""
+        if not flushed:
+            return 0
+        if self._clear_script is None:
+            self._clear_script = self.cache.redis.register_script(CLEAR_FLUSHED_LUA)
+        dirty_key = self._dirty_key(meeting_id)
+        index_keys = [self._index_key(meeting_id, collection) for _, collection, _, _ in flushed]
+        doc_keys = [self._doc_key(collection, doc_id) for _, collection, doc_id, _ in flushed]
+        args: List[Any] = [len(flushed)]
+        for member, _, doc_id, version in flushed:
+            args.extend([member, doc_id, version or ''])
+        return await self.cache._call(self._clear_script(keys=[dirty_key, *index_keys, *doc_keys], args=args))
+
+    async def discard(self, meeting_id: str) -> int:
+        """会議の未反映の書き込みを反映せずに破棄する（会議の削除時に呼び出す）
+
+        破棄した作業コピーの件数を返す。
+        """
+        if not self.cache.allow_redis():
+            return 0
+        try:
+            dirty_key = self._dirty_key(meeting_id)
+            members = await self.cache._call(self.cache.redis.smembers(dirty_key))
+            members = [_decode(m) for m in members]
+            pipe = self.cache.redis.pipeline(transaction=True)
+            for member in members:
+                collection, doc_id = member.split('/', 1)
+                pipe.delete(self._doc_key(collection, doc_id), self._index_key(meeting_id, collection))
+            pipe.delete(self._journal_key(meeting_id), dirty_key)
+            pipe.srem(self._live_key(), meeting_id)
+            pipe.srem(self._meetings_key(), meeting_id)
+            await self.cache._call(pipe.execute())
+            return len(members)
+        except Exception:
+            self.errors['discard'] += 1
+            return 0
+
+    async def discard_documents(self, meeting_id: str, documents: List[Tuple[str, str]]) -> int:
+        """会議の一部のドキュメントの未反映の書き込みを反映せずに破棄する（セクションの削除時に呼び出す）
+
+        documents は (コレクション, ドキュメントID) のリスト。破棄した作業コピーの件数を返す。
+        """
+        if not documents or not self.cache.allow_redis():
+            return 0
+        written_at = int(time.time() * 1000)
+        before = self.documents_dropped
+        try:
+            members = await self.cache._call(self.cache.redis.smembers(self._dirty_key(meeting_id)))
+            dirty = {_decode(m) for m in members}
+            for collection, doc_id in documents:
+                if f"{collection}/{doc_id}" in dirty:
+                    await self._drop(meeting_id, collection, doc_id, written_at)
+        except Exception:
+            self.errors['discard'] += 1
+        return self.documents_dropped - before
+
+    # ----- ジャーナルの再生 -----
+    async def replay(self) -> int:
+        """ジャーナルを再生し、失われた作業コピーを作り直す（起動時、最初の反映の前に呼び出す）
+
+        反映済みのジャーナルは反映のたびに切り詰めるため、残っている記録は未反映の書き込み。
+        作業コピーが残っているドキュメントはそのまま使う。作り直した作業コピーの件数を返す。
+        """
+        if self._restore_script is None:
+            self._restore_script = self.cache.redis.register_script(RESTORE_LUA)
+        journal_prefix = self._journal_key('')
+        restored = 0
+        async for journal_key in self.cache.redis.scan_iter(match=f"{journal_prefix}*", count=1000):
+            journal_key = _decode(journal_key)
+            meeting_id = journal_key[len(journal_prefix):]
+            state: Dict[Tuple[str, str], Tuple[str, str, Dict[str, Any]]] = {}
+            start = '-'
+            while True:
+                entries = await self.cache._call(self.cache.redis.xrange(journal_key, min=start, count=1000))
+                _replay_entries(entries, state)
+                if len(entries) < 1000:
+                    break
+                start = _next_stream_id(entries[-1][0])
+            for (collection, doc_id), (op, version, data) in state.items():
+                fields: List[str] = []
+                for field, value in _encode_fields(data).items():
+                    fields.extend([field, value])
+                restored += await self.cache._call(self._restore_script(
+                    keys=[self._doc_key(collection, doc_id), self._dirty_key(meeting_id),
+                          self._index_key(meeting_id, collection), self._meetings_key()],
+                    args=[op, version, f"{collection}/{doc_id}", doc_id, meeting_id, *fields],
+                ))
+        self.documents_restored += restored
+        return restored
+
+    async def flush_all(self) -> List[Dict[str, Any]]:
+        """未反映の書き込みがある全ての会議を反映する"""
+        if not self.cache.allow_redis():
+            return []
+        # 直接書き込んだドキュメントの古い作業コピーを先に捨てる
+        await self.drop_superseded()
+        meeting_ids = await self.cache._call(self.cache.redis.smembers(self._meetings_key()))
+        reports = []
+        lag = 0.0
+        for meeting_id in meeting_ids:
+            meeting_id = _decode(meeting_id)
+            report = await self.flush(meeting_id)
+            lag = max(lag, report["lag_seconds"])
+            reports.append(report)
+        self.current_lag = lag
+        return reports
+
+    def start(self) -> None:
+        """一定間隔で反映するバックグラウンドタスクを開始する（アプリ起動時に呼び出す）"""
+        if self._flush_task is None and self.flush_interval > 0:
+            self._flush_task = asyncio.create_task(self._run_flusher())
+
+    async def stop(self) -> None:
+        """バックグラウンドタスクを止め、残りを反映する（アプリ終了時に呼び出す）"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush_all()
+        except Exception:
+            self.errors['flush_all'] += 1
+
+    async def _run_flusher(self) -> None:
+        lock_key = f"{self.cache.lock_prefix}write-behind-flush"
+        while True:
+            await asyncio.sleep(self.flush_interval * random.uniform(0.8, 1.2))
+            token = uuid.uuid4().hex
+            try:
+                # 反映はいずれか1つのワーカーだけが行う
+                if not self.cache.allow_redis() or not await self.cache._acquire_lock(lock_key, token):
+                    continue
+                try:
+                    if not self._replayed:
+                        await self.replay()
+                        self._replayed = True
+                    await self.flush_all()
+                finally:
+                    await self.cache._release_lock(lock_key, token)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors['flush_all'] += 1
+
+    # ----- 統計 -----
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "flush_interval": self.flush_interval,
+            "max_batch_size": self.max_batch_size,
+            "mutations": self.mutations,
+            "documents_flushed": self.documents_flushed,
+            "batches": self.batches,
+            "flush_errors": self.flush_errors,
+            "documents_dropped": self.documents_dropped,
+            "documents_restored": self.documents_restored,
+            "pending_superseded": len(self._superseded),
+            "errors": dict(self.errors),
+            "current_lag_seconds": self.current_lag,
+            "flush_lag": self.flush_lag.snapshot(),
+            "last_flush": self.last_flush,
+        }
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP write_behind_mutations_total Writes buffered for live meetings",
+            "# TYPE write_behind_mutations_total counter",
+            f"write_behind_mutations_total {self.mutations}",
+            "# HELP write_behind_documents_flushed_total Coalesced documents written to the datastore",
+            "# TYPE write_behind_documents_flushed_total counter",
+            f"write_behind_documents_flushed_total {self.documents_flushed}",
+            "# HELP write_behind_batches_total Batches written to the datastore",
+            "# TYPE write_behind_batches_total counter",
+            f"write_behind_batches_total {self.batches}",
+            "# HELP write_behind_flush_errors_total Batches that failed to write",
+            "# TYPE write_behind_flush_errors_total counter",
+            f"write_behind_flush_errors_total {self.flush_errors}",
+            "# HELP write_behind_documents_dropped_total Buffered copies discarded after a direct write or a section delete",
+            "# TYPE write_behind_documents_dropped_total counter",
+            f"write_behind_documents_dropped_total {self.documents_dropped}",
+            "# HELP write_behind_documents_restored_total Buffered copies rebuilt from the journal at startup",
+            "# TYPE write_behind_documents_restored_total counter",
+            f"write_behind_documents_restored_total {self.documents_restored}",
+            "# HELP write_behind_errors_total Redis errors by operation (the write falls back or is retried)",
+            "# TYPE write_behind_errors_total counter",
+        ]
+        for op, count in sorted(self.errors.items()):
+            lines.append(f'write_behind_errors_total{{op="{op}"}} {count}')
+        lines += [
+            "# HELP write_behind_flush_lag_seconds Age of the oldest unflushed journal entry at the last flush cycle",
+            "# TYPE write_behind_flush_lag_seconds gauge",
+            f"write_behind_flush_lag_seconds {self.current_lag}",
+            "# HELP write_behind_flush_lag_seconds_observed Age of the oldest journal entry when its flush completed",
+            "# TYPE write_behind_flush_lag_seconds_observed histogram",
+        ]
+        lines += self.flush_lag.render("write_behind_flush_lag_seconds_observed")
+        return "\n".join(lines) + "\n"